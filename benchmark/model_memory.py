@@ -0,0 +1,313 @@
+"""
+Measures the memory held by the high-volume models, against the models as before they are slotted.
+
+Before, each model has a ``__dict__`` and holds the ``Contract`` sent by TWS with it, which is a new object each time.
+Now, the models are slotted and hold the contract identifier, with the latest contract kept in ``contract_registry``.
+
+The executions are built from the archived executions, and the extrema points from the archived bars.
+
+Run with ``python -m benchmark.model_memory``.
+"""
+import argparse
+import dataclasses
+import glob
+import os
+import platform
+import sys
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, TypedDict
+
+import numpy as np
+import pandas as pd
+from ibapi.contract import Contract
+
+from trade_ibkr.calc.px_data.extrema.model import ExtremaDataPoint
+from trade_ibkr.fake_tws import FakeTwsConfig
+from trade_ibkr.model import GroupedOrderExecution, OrderExecution, PxData
+from trade_ibkr.utils import contract_registry, print_log, print_warning
+from .px_data_stages import load_archive_bars
+from .utils import dump_benchmark_report, get_change_text, load_benchmark_report
+
+_DEFAULT_EXECUTION_DIRECTORY = "archive/executions"
+
+_DEFAULT_ARCHIVE_FILE = "archive/futures/NQ/20220222-20220307-1.csv"
+
+
+class ModelMemoryData(TypedDict):
+    bytes: int
+    bytesPerObject: float
+
+
+class ModelMemoryResult(TypedDict):
+    key: str
+    count: int
+    legacy: ModelMemoryData
+    slotted: ModelMemoryData
+    # Ratio of the bytes reduced from `legacy`
+    reduction: float
+
+
+class ModelMemoryReport(TypedDict):
+    timestamp: str
+    python: str
+    platform: str
+    numpy: str
+    repeat: int
+    results: list[ModelMemoryResult]
+
+
+def _make_legacy_model(model: type) -> type:
+    # Same fields without slots, holding the contract instead of its identifier
+    model_fields = []
+
+    for model_field in dataclasses.fields(model):
+        name, type_ = model_field.name, model_field.type
+        if name == "contract_id":
+            name, type_ = "contract", Contract
+
+        model_fields.append((
+            name, type_,
+            dataclasses.field(
+                default=model_field.default, default_factory=model_field.default_factory, init=model_field.init,
+            )
+        ))
+
+    namespace = {}
+    if post_init := getattr(model, "__post_init__", None):
+        namespace["__post_init__"] = post_init
+
+    return dataclasses.make_dataclass(f"Legacy{model.__name__}", model_fields, namespace=namespace, kw_only=True)
+
+
+_LegacyOrderExecution = _make_legacy_model(OrderExecution)
+
+_LegacyGroupedOrderExecution = _make_legacy_model(GroupedOrderExecution)
+
+_LegacyExtremaDataPoint = _make_legacy_model(ExtremaDataPoint)
+
+
+def _parse_contract(contract_text: str) -> Contract:
+    # `Contract.__str__()` saved in the execution dataframe
+    values = contract_text.split(",")
+
+    contract = Contract()
+    contract.conId = int(values[0])
+    contract.symbol = values[1]
+    contract.secType = values[2]
+    contract.lastTradeDateOrContractMonth = values[3]
+    contract.strike = float(values[4] or 0)
+    contract.right = values[5]
+    contract.multiplier = values[6]
+    contract.exchange = values[7]
+    contract.primaryExchange = values[8]
+    contract.currency = values[9]
+    contract.localSymbol = values[10]
+    contract.tradingClass = values[11]
+
+    return contract
+
+
+def load_archive_executions(directory: str) -> pd.DataFrame:
+    """Returns the archived execution dataframes under ``directory`` combined."""
+    file_paths = sorted(glob.glob(os.path.join(directory, "**", "*.csv"), recursive=True))
+
+    df = pd.concat([pd.read_csv(file_path) for file_path in file_paths], ignore_index=True)
+    df["time_completed"] = pd.to_datetime(df["time_completed"])
+
+    return df
+
+
+def _make_executions(df: pd.DataFrame, *, repeat: int, is_legacy: bool) -> list[Any]:
+    model = _LegacyOrderExecution if is_legacy else OrderExecution
+    executions = []
+
+    for run_idx in range(repeat):
+        for idx, (contract_text, time_completed, side, quantity, avg_price, realized_pnl) in enumerate(zip(
+                df["contract"], df["time_completed"], df["side"], df["quantity"], df["avg_price"], df["realized_pnl"]
+        )):
+            # TWS sends a new contract with each execution
+            contract = _parse_contract(contract_text)
+
+            executions.append(model(
+                exec_id=f"{run_idx:04d}.{idx:08d}.01.01",
+                order_id=run_idx * len(df) + idx,
+                **({"contract": contract} if is_legacy else {"contract_id": contract_registry.register(contract)}),
+                local_time_original=time_completed.strftime("%Y%m%d  %H:%M:%S"),
+                side=side,
+                cumulative_quantity=Decimal(int(quantity)),
+                avg_price=float(avg_price),
+                realized_pnl=None if pd.isna(realized_pnl) else float(realized_pnl),
+            ))
+
+    return executions
+
+
+def _make_grouped_executions(df: pd.DataFrame, *, repeat: int, is_legacy: bool) -> list[Any]:
+    model = _LegacyGroupedOrderExecution if is_legacy else GroupedOrderExecution
+    grouped_executions = []
+
+    for _ in range(repeat):
+        for contract_text, time_completed, side, quantity, avg_price, realized_pnl in zip(
+                df["contract"], df["time_completed"], df["side"], df["quantity"], df["avg_price"], df["realized_pnl"]
+        ):
+            contract = _parse_contract(contract_text)
+
+            grouped_executions.append(model(
+                **({"contract": contract} if is_legacy else {"contract_id": contract_registry.register(contract)}),
+                time_completed=time_completed.to_pydatetime(),
+                side=side,
+                quantity=Decimal(int(quantity)),
+                avg_price=float(avg_price),
+                realized_pnl=None if pd.isna(realized_pnl) else float(realized_pnl),
+            ))
+
+    return grouped_executions
+
+
+def _make_extrema_points(points: list[ExtremaDataPoint], *, repeat: int, is_legacy: bool) -> list[Any]:
+    model = _LegacyExtremaDataPoint if is_legacy else ExtremaDataPoint
+
+    return [
+        model(
+            epoch_sec=point.epoch_sec,
+            length=point.length,
+            diff=point.diff,
+            diff_sma_ratio=point.diff_sma_ratio,
+            px=point.px,
+            direction=point.direction,
+        )
+        for _ in range(repeat)
+        for point in points
+    ]
+
+
+def measure_memory(make_objects: Callable[[], list[Any]]) -> ModelMemoryData:
+    """Returns the bytes still allocated after ``make_objects()``, while the objects it returns are kept alive."""
+    tracemalloc.start()
+
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        objects = make_objects()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    size = after - before
+
+    return {
+        "bytes": size,
+        "bytesPerObject": size / len(objects) if objects else 0,
+    }
+
+
+def run_model_memory_case(
+        *, key: str, count: int, make_objects: Callable[[bool], list[Any]],
+) -> ModelMemoryResult:
+    legacy = measure_memory(lambda: make_objects(True))
+    slotted = measure_memory(lambda: make_objects(False))
+
+    return {
+        "key": key,
+        "count": count,
+        "legacy": legacy,
+        "slotted": slotted,
+        "reduction": 1 - slotted["bytes"] / legacy["bytes"] if legacy["bytes"] else 0,
+    }
+
+
+def _print_result(result: ModelMemoryResult):
+    print_log(
+        f"[cyan]{result['key']}[/cyan]: "
+        f"legacy {result['legacy']['bytes'] / 1024:.1f} KB ({result['legacy']['bytesPerObject']:.0f} B each) / "
+        f"slotted {result['slotted']['bytes'] / 1024:.1f} KB ({result['slotted']['bytesPerObject']:.0f} B each) / "
+        f"[green]-{result['reduction'] * 100:.1f}%[/green]"
+    )
+
+
+def compare_model_memory_reports(report: ModelMemoryReport, baseline: ModelMemoryReport):
+    """Print the changes of the slotted bytes per object of the cases in both ``report`` and ``baseline``."""
+    baseline_results = {result["key"]: result for result in baseline["results"]}
+
+    print_log(f"[yellow]Compared to the report at {baseline['timestamp']}[/yellow]")
+
+    for result in report["results"]:
+        if not (baseline_result := baseline_results.get(result["key"])):
+            print_warning(f"No baseline of {result['key']}", force=True)
+            continue
+
+        print_log(
+            f"[cyan]{result['key']}[/cyan]: "
+            f"{get_change_text(result['slotted']['bytesPerObject'], baseline_result['slotted']['bytesPerObject'])} "
+            f"B each"
+        )
+
+
+def run_model_memory_benchmark(*, execution_directory: str, archive_file: str, repeat: int) -> ModelMemoryReport:
+    report: ModelMemoryReport = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "repeat": repeat,
+        "results": [],
+    }
+
+    execution_df = load_archive_executions(execution_directory)
+    count = len(execution_df) * repeat
+
+    bars, period_sec = load_archive_bars(archive_file)
+    px_data = PxData(
+        contract=FakeTwsConfig().contracts[0].to_contract_details(),
+        period_sec=period_sec,
+        is_major=False,
+        bars=bars,
+    )
+    points = px_data.extrema.points
+
+    cases: list[tuple[str, int, Callable[[bool], list[Any]]]] = [
+        (
+            f"OrderExecution x {count}", count,
+            lambda is_legacy: _make_executions(execution_df, repeat=repeat, is_legacy=is_legacy)
+        ),
+        (
+            f"GroupedOrderExecution x {count}", count,
+            lambda is_legacy: _make_grouped_executions(execution_df, repeat=repeat, is_legacy=is_legacy)
+        ),
+        (
+            f"ExtremaDataPoint x {len(points) * repeat}", len(points) * repeat,
+            lambda is_legacy: _make_extrema_points(points, repeat=repeat, is_legacy=is_legacy)
+        ),
+    ]
+
+    for key, case_count, make_objects in cases:
+        result = run_model_memory_case(key=key, count=case_count, make_objects=make_objects)
+
+        report["results"].append(result)
+        _print_result(result)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--executions", default=_DEFAULT_EXECUTION_DIRECTORY,
+        help="Directory of the archived executions, searched recursively"
+    )
+    parser.add_argument("--archive", default=_DEFAULT_ARCHIVE_FILE, help="Archived bars for the extrema points")
+    parser.add_argument("--repeat", type=int, default=10, help="Copies of the archived data to build")
+    parser.add_argument("--output", help="Report file path")
+    parser.add_argument("--compare", help="Report file path to compare with")
+    args = parser.parse_args()
+
+    model_memory_report = run_model_memory_benchmark(
+        execution_directory=args.executions,
+        archive_file=args.archive,
+        repeat=args.repeat,
+    )
+    dump_benchmark_report(model_memory_report, name="model-memory", file_path=args.output)
+
+    if args.compare:
+        compare_model_memory_reports(model_memory_report, load_benchmark_report(args.compare))
@@ -0,0 +1,90 @@
+"""
+Measures the order placement round trip of ``IBapiServer`` against the fake TWS.
+
+Run with ``python -m benchmark.order_latency``.
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from trade_ibkr.enums import OrderLatencySpan, OrderSideConst
+from trade_ibkr.fake_tws import FakeTws, FakeTwsConfig, make_fake_tws_app
+from trade_ibkr.model import BrokerAccount, OnExecutionFetchedParams, Position
+from trade_ibkr.obj import IBapiServer
+from trade_ibkr.perf import order_latency_tracer
+from trade_ibkr.utils import ContractParams, make_futures_contract, print_log
+
+
+async def _noop(_):
+    pass
+
+
+def _make_app(fake_tws: FakeTws) -> IBapiServer:
+    app = make_fake_tws_app(IBapiServer)()
+    app.use_fake_tws(fake_tws)
+
+    app.set_on_position_fetched(None)
+    app.set_on_open_order_fetched(None)
+    app.set_on_order_filled(_noop)
+    app.set_on_executions_fetched(_noop, lambda: OnExecutionFetchedParams())
+
+    return app
+
+
+def run_order_latency_benchmark(*, order_count: int, interval_sec: float, config: FakeTwsConfig) -> str:
+    order_latency_tracer.reset()
+
+    fake_tws = FakeTws(config)
+    app = _make_app(fake_tws)
+    app.activate(0, 0)
+
+    while app._order_valid_id is None:
+        time.sleep(0.01)
+
+    contract = make_futures_contract(ContractParams(symbol="MNQM2", exchange="GLOBEX", type_="Futures"))
+    contract.conId = 1
+    account = BrokerAccount(app, Position([]))
+
+    for idx in range(order_count):
+        side: OrderSideConst = "BUY" if idx % 2 == 0 else "SELL"
+
+        with order_latency_tracer.signal("benchmark"):
+            account.place_order(contract, side, Decimal(1), None)
+
+        time.sleep(interval_sec)
+
+    histogram = order_latency_tracer.get_histogram(OrderLatencySpan.FILL_TO_POSITION)
+    timeout = time.time() + 10
+    while histogram.count < order_count and time.time() < timeout:
+        time.sleep(0.01)
+
+    app.disconnect()
+
+    for span in OrderLatencySpan:
+        data = order_latency_tracer.get_histogram(span).to_dict()
+
+        if not data["count"]:
+            print_log(f"{span.key:>20}: (no data)")
+            continue
+
+        print_log(
+            f"{span.key:>20}: count {data['count']} / avg {data['avgMs']:.3f} ms / "
+            f"p50 {data['p50Ms']:.3f} ms / p99 {data['p99Ms']:.3f} ms / max {data['maxMs']:.3f} ms"
+        )
+
+    return order_latency_tracer.dump_to_file()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between each order")
+    parser.add_argument("--ack-delay", type=float, default=0.002)
+    parser.add_argument("--fill-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    run_order_latency_benchmark(
+        order_count=args.orders,
+        interval_sec=args.interval,
+        config=FakeTwsConfig(ack_delay_sec=args.ack_delay, fill_delay_sec=args.fill_delay),
+    )
@@ -0,0 +1,312 @@
+"""
+Measures each stage of building ``PxData``, from the bars to the socket message.
+
+Stages run in the same order as ``PxData.__init__()`` on a fresh dataframe for each repetition,
+over the synthetic random walk bars and the archived bars at each of the window sizes.
+
+Run with ``python -m benchmark.px_data_stages``.
+"""
+import argparse
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, TypedDict
+
+import numpy as np
+import pandas as pd
+from ibapi.contract import ContractDetails
+from pandas import DataFrame
+
+from trade_ibkr.calc import analyze_extrema, calc_support_resistance_levels
+from trade_ibkr.enums import PxDataCol
+from trade_ibkr.fake_tws import FakeTwsConfig
+from trade_ibkr.model import BarDataDict, MarketSessionIndex, PxData
+from trade_ibkr.utils import print_log, print_warning, to_socket_message_px_data
+from .utils import dump_benchmark_report, format_ms, get_change_text, load_benchmark_report
+
+# 2022-03-02 20:00 at Chicago, so the synthetic bars always cover the 17:00 market date change
+_SYNTHETIC_LAST_EPOCH_SEC = 1646272800
+
+_DEFAULT_ARCHIVE_FILE = "archive/futures/NQ/20220222-20220307-1.csv"
+
+
+class PxDataStageData(TypedDict):
+    minMs: float
+    medianMs: float
+    meanMs: float
+    maxMs: float
+
+
+class PxDataStagesResult(TypedDict):
+    key: str
+    source: str
+    periodSec: int
+    rows: int
+    stages: dict[str, PxDataStageData]
+    totalMedianMs: float
+    # Dataframe after all stages
+    memoryKb: float
+    objectColumns: list[str]
+
+
+class PxDataStagesReport(TypedDict):
+    timestamp: str
+    python: str
+    platform: str
+    numpy: str
+    pandas: str
+    repeat: int
+    results: list[PxDataStagesResult]
+
+
+def _stage_df_init(px_data: PxData, bars: list[BarDataDict]):
+    px_data.dataframe = DataFrame(bars)
+
+
+def _stage_sr_levels(px_data: PxData, _):
+    px_data.sr_levels_data = calc_support_resistance_levels(px_data.dataframe)
+
+
+def _stage_extrema_analysis(px_data: PxData, _):
+    px_data.extrema = analyze_extrema(px_data.dataframe)
+
+
+def _stage_serialize(px_data: PxData, _):
+    to_socket_message_px_data(px_data)
+
+
+# Same order as `PxData.__init__()`, each stage depends on the stages before it
+_STAGES: list[tuple[str, Callable[[PxData, list[BarDataDict]], Any]]] = [
+    ("dfInit", _stage_df_init),
+    ("date", lambda px_data, _: px_data._proc_df_date()),
+    ("ema120", lambda px_data, _: px_data._proc_df_ema120()),
+    ("smas", lambda px_data, _: px_data._proc_df_smas()),
+    ("amplitude", lambda px_data, _: px_data._proc_df_amplitude()),
+    ("diff", lambda px_data, _: px_data._proc_df_diff()),
+    ("extrema", lambda px_data, _: px_data._proc_df_extrema()),
+    ("vwap", lambda px_data, _: px_data._proc_df_vwap()),
+    ("srLevels", _stage_sr_levels),
+    ("extremaAnalysis", _stage_extrema_analysis),
+    ("serialize", _stage_serialize),
+]
+
+
+def make_synthetic_bars(*, count: int, period_sec: int, seed: int = 0) -> list[BarDataDict]:
+    """Random walk bars ending at ``_SYNTHETIC_LAST_EPOCH_SEC``, the same bars are generated for the same seed."""
+    rng = np.random.default_rng(seed)
+
+    closes = 14000 + np.cumsum(rng.normal(0, 2.5, count))
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    highs = np.maximum(opens, closes) + np.abs(rng.normal(0, 1.5, count))
+    lows = np.minimum(opens, closes) - np.abs(rng.normal(0, 1.5, count))
+    volumes = rng.integers(100, 5000, count)
+
+    first_epoch_sec = _SYNTHETIC_LAST_EPOCH_SEC - (count - 1) * period_sec
+
+    return [
+        {
+            PxDataCol.OPEN: float(opens[idx]),
+            PxDataCol.HIGH: float(highs[idx]),
+            PxDataCol.LOW: float(lows[idx]),
+            PxDataCol.CLOSE: float(closes[idx]),
+            PxDataCol.EPOCH_SEC: first_epoch_sec + idx * period_sec,
+            PxDataCol.VOLUME: int(volumes[idx]),
+        }
+        for idx in range(count)
+    ]
+
+
+def load_archive_bars(file_path: str) -> tuple[list[BarDataDict], int]:
+    """
+    Returns the bars and the period in seconds of the archived file ``<start>-<end>-<period in minutes>.csv``.
+
+    Both the saved ``PxData`` (``epoch_sec`` / ``volume``) and the chart exports (``time`` / ``Volume``) are accepted.
+    """
+    period_sec = int(os.path.splitext(os.path.basename(file_path))[0].split("-")[-1]) * 60
+
+    df = pd.read_csv(file_path)
+
+    if "epoch_sec" in df.columns:
+        epoch_sec = df["epoch_sec"]
+    else:
+        epoch_sec = pd.to_datetime(df["time"], utc=True).astype("int64") // 1_000_000_000
+
+    volume = df["volume"] if "volume" in df.columns else df["Volume"].fillna(0)
+
+    return [
+        {
+            PxDataCol.OPEN: float(open_),
+            PxDataCol.HIGH: float(high),
+            PxDataCol.LOW: float(low),
+            PxDataCol.CLOSE: float(close),
+            PxDataCol.EPOCH_SEC: int(epoch),
+            PxDataCol.VOLUME: int(vol),
+        }
+        for open_, high, low, close, epoch, vol
+        in zip(df["open"], df["high"], df["low"], df["close"], epoch_sec, volume)
+    ], period_sec
+
+
+def _make_px_data_shell(*, contract: ContractDetails, period_sec: int) -> PxData:
+    # `__init__()` is skipped, so the stages can be run one by one
+    px_data = PxData.__new__(PxData)
+    px_data.contract = contract
+    px_data.period_sec = period_sec
+    px_data.is_major = False
+    px_data.version = None
+    px_data.market_sessions = MarketSessionIndex()
+
+    return px_data
+
+
+def run_px_data_stages_case(
+        *, source: str, bars: list[BarDataDict], period_sec: int, repeat: int, contract: ContractDetails,
+) -> PxDataStagesResult:
+    durations: dict[str, list[float]] = {stage_name: [] for stage_name, _ in _STAGES}
+    px_data: PxData | None = None
+
+    # First run warms up the caches and the lazily loaded modules
+    for run_idx in range(repeat + 1):
+        px_data = _make_px_data_shell(contract=contract, period_sec=period_sec)
+
+        for stage_name, stage in _STAGES:
+            start = time.perf_counter()
+            stage(px_data, bars)
+            duration = time.perf_counter() - start
+
+            if run_idx:
+                durations[stage_name].append(duration * 1000)
+
+    stages: dict[str, PxDataStageData] = {
+        stage_name: {
+            "minMs": min(stage_durations),
+            "medianMs": statistics.median(stage_durations),
+            "meanMs": statistics.mean(stage_durations),
+            "maxMs": max(stage_durations),
+        }
+        for stage_name, stage_durations in durations.items()
+    }
+
+    return {
+        "key": f"{source}@{period_sec} x {len(bars)}",
+        "source": source,
+        "periodSec": period_sec,
+        "rows": len(bars),
+        "stages": stages,
+        "totalMedianMs": sum(stage["medianMs"] for stage in stages.values()),
+        "memoryKb": px_data.dataframe.memory_usage(deep=True).sum() / 1024,
+        "objectColumns": [str(col) for col, dtype in px_data.dataframe.dtypes.items() if dtype == object],
+    }
+
+
+def _print_result(result: PxDataStagesResult):
+    print_log(
+        f"[cyan]{result['key']}[/cyan] - total {format_ms(result['totalMedianMs'])} ms / "
+        f"{result['memoryKb']:.1f} KB / {len(result['objectColumns'])} object columns"
+    )
+
+    for stage_name, stage in sorted(result["stages"].items(), key=lambda item: item[1]["medianMs"], reverse=True):
+        print_log(
+            f"  {stage_name:>16}: median {format_ms(stage['medianMs'])} ms / "
+            f"min {format_ms(stage['minMs'])} ms / max {format_ms(stage['maxMs'])} ms / "
+            f"{stage['medianMs'] / result['totalMedianMs'] * 100:.1f}%"
+        )
+
+
+def compare_px_data_stages_reports(report: PxDataStagesReport, baseline: PxDataStagesReport):
+    """Print the changes of the median of each stage of the cases in both ``report`` and ``baseline``."""
+    baseline_results = {result["key"]: result for result in baseline["results"]}
+
+    print_log(f"[yellow]Compared to the report at {baseline['timestamp']}[/yellow]")
+
+    for result in report["results"]:
+        if not (baseline_result := baseline_results.get(result["key"])):
+            print_warning(f"No baseline of {result['key']}", force=True)
+            continue
+
+        print_log(
+            f"[cyan]{result['key']}[/cyan] - "
+            f"total {get_change_text(result['totalMedianMs'], baseline_result['totalMedianMs'])} ms / "
+            f"memory {get_change_text(result['memoryKb'], baseline_result['memoryKb'])} KB"
+        )
+
+        for stage_name, stage in result["stages"].items():
+            baseline_stage = baseline_result["stages"].get(stage_name)
+
+            print_log(
+                f"  {stage_name:>16}: "
+                f"{get_change_text(stage['medianMs'], baseline_stage['medianMs'] if baseline_stage else None)} ms"
+            )
+
+
+def run_px_data_stages_benchmark(
+        *, windows: list[int], repeat: int, synthetic_period_sec: int, archive_files: list[str],
+) -> PxDataStagesReport:
+    report: PxDataStagesReport = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "repeat": repeat,
+        "results": [],
+    }
+
+    contract = FakeTwsConfig().contracts[0].to_contract_details()
+
+    sources: list[tuple[str, list[BarDataDict], int]] = [(
+        "synthetic",
+        make_synthetic_bars(count=max(windows), period_sec=synthetic_period_sec),
+        synthetic_period_sec,
+    )]
+    for archive_file in archive_files:
+        archive_bars, archive_period_sec = load_archive_bars(archive_file)
+        sources.append((os.path.basename(archive_file), archive_bars, archive_period_sec))
+
+    for source, bars, period_sec in sources:
+        for window in windows:
+            if window > len(bars):
+                print_warning(f"Skipping window {window} of {source}, which only has {len(bars)} bars", force=True)
+                continue
+
+            try:
+                result = run_px_data_stages_case(
+                    source=source, bars=bars[-window:], period_sec=period_sec, repeat=repeat, contract=contract
+                )
+            except (ValueError, IndexError) as ex:
+                # For example, the window only has a single market date or too few extrema
+                print_warning(f"Skipping window {window} of {source}: {ex}", force=True)
+                continue
+
+            report["results"].append(result)
+            _print_result(result)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--windows", default="500,2000,10000", help="Bar counts of the Px data, comma separated")
+    parser.add_argument("--repeat", type=int, default=10, help="Measured runs of each case")
+    parser.add_argument("--period", type=int, default=60, help="Period seconds of the synthetic bars")
+    parser.add_argument(
+        "--archive", action="append",
+        help=f"Archived bars file, can be specified multiple times (default: {_DEFAULT_ARCHIVE_FILE})"
+    )
+    parser.add_argument("--output", help="Report file path")
+    parser.add_argument("--compare", help="Report file path to compare with")
+    args = parser.parse_args()
+
+    px_data_stages_report = run_px_data_stages_benchmark(
+        windows=[int(window) for window in args.windows.split(",")],
+        repeat=args.repeat,
+        synthetic_period_sec=args.period,
+        archive_files=args.archive or [_DEFAULT_ARCHIVE_FILE],
+    )
+    dump_benchmark_report(px_data_stages_report, name="px-data-stages", file_path=args.output)
+
+    if args.compare:
+        compare_px_data_stages_reports(px_data_stages_report, load_benchmark_report(args.compare))
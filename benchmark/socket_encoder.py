@@ -0,0 +1,246 @@
+"""
+Compares the socket message encoders with ``legacy``, which encodes the messages as before the encoders exist.
+
+Each encoder encodes the same Px data and execution messages. The output is checked byte by byte against
+``legacy``, and the data parsed from it is checked as well, as the compact encoders format the numbers differently.
+
+Run with ``python -m benchmark.socket_encoder``.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, TypedDict
+
+import numpy as np
+from ibapi.contract import ContractDetails
+from pandas import DataFrame
+
+from trade_ibkr.fake_tws import FakeTwsConfig
+from trade_ibkr.model import GroupedOrderExecution, OrderExecutionCollection, PxData
+from trade_ibkr.model.execution.df_init import init_exec_dataframe
+from trade_ibkr.utils import (
+    OrjsonSocketMessageEncoder, SocketMessageEncoder, StdlibSocketMessageEncoder, contract_registry,
+    get_socket_message_encoder, print_log, print_warning, set_socket_message_encoder, to_socket_message_execution,
+    to_socket_message_px_data, to_socket_message_px_data_list,
+)
+from trade_ibkr.utils.socket.utils import df_rows_to_list_of_data
+from .px_data_stages import make_synthetic_bars
+from .utils import dump_benchmark_report, format_ms, get_change_text, load_benchmark_report
+
+
+class SocketEncoderData(TypedDict):
+    medianMs: float
+    minMs: float
+    bytes: int
+    # Same bytes as `legacy`
+    isIdentical: bool
+    # Same data as `legacy` once parsed
+    isEquivalent: bool
+
+
+class SocketEncoderResult(TypedDict):
+    key: str
+    encoders: dict[str, SocketEncoderData]
+
+
+class SocketEncoderReport(TypedDict):
+    timestamp: str
+    python: str
+    platform: str
+    numpy: str
+    repeat: int
+    results: list[SocketEncoderResult]
+
+
+class _LegacySocketMessageEncoder(StdlibSocketMessageEncoder):
+    # Builds the dict of each row, then encodes them all with `json`
+    name = "legacy"
+
+    def encode_rows(self, df: DataFrame, columns: dict[str, str]) -> str:
+        return json.dumps(df_rows_to_list_of_data(df, columns))
+
+
+def _make_encoders() -> list[SocketMessageEncoder]:
+    encoders: list[SocketMessageEncoder] = [_LegacySocketMessageEncoder(), StdlibSocketMessageEncoder()]
+
+    try:
+        encoders.append(OrjsonSocketMessageEncoder())
+    except ImportError:
+        print_warning("`orjson` not installed, only `legacy` and `json` are measured", force=True)
+
+    return encoders
+
+
+def _make_px_data(*, contract: ContractDetails, count: int) -> PxData:
+    return PxData(
+        contract=contract,
+        period_sec=60,
+        is_major=False,
+        bars=make_synthetic_bars(count=count, period_sec=60),
+    )
+
+
+def _make_execution_collection(*, px_data: PxData, count: int) -> OrderExecutionCollection:
+    # Alternating entries and exits over the bars of `px_data`
+    times = np.linspace(0, len(px_data.dataframe) - 2, count).astype(int)
+    start = px_data.earliest_time.to_pydatetime()
+
+    executions = [
+        GroupedOrderExecution(
+            contract_id=contract_registry.register(px_data.contract.contract),
+            time_completed=start + timedelta(seconds=int(idx) * px_data.period_sec + 30),
+            side="BOT" if order % 2 == 0 else "SLD",
+            quantity=Decimal(1),
+            avg_price=float(px_data.dataframe.iloc[idx]["close"]),
+            realized_pnl=None if order % 2 == 0 else float(px_data.dataframe.iloc[idx]["diff"]) * 2,
+        )
+        for order, idx in enumerate(times)
+    ]
+
+    # `__init__()` groups the raw executions from TWS, which is skipped
+    collection = OrderExecutionCollection.__new__(OrderExecutionCollection)
+    collection._executions_dataframe = {
+        px_data.contract_identifier: init_exec_dataframe(executions, multiplier=2, px_data=px_data)
+    }
+
+    return collection
+
+
+def run_socket_encoder_case(
+        *, key: str, to_message: Callable[[], str], encoders: list[SocketMessageEncoder], repeat: int,
+) -> SocketEncoderResult:
+    encoder_original = get_socket_message_encoder()
+    messages: dict[str, str] = {}
+    durations: dict[str, list[float]] = {}
+
+    try:
+        for encoder in encoders:
+            set_socket_message_encoder(encoder)
+            durations[encoder.name] = []
+
+            # First run warms up the caches
+            for run_idx in range(repeat + 1):
+                start = time.perf_counter()
+                messages[encoder.name] = to_message()
+                duration = time.perf_counter() - start
+
+                if run_idx:
+                    durations[encoder.name].append(duration * 1000)
+    finally:
+        set_socket_message_encoder(encoder_original)
+
+    reference = messages[_LegacySocketMessageEncoder.name]
+    reference_data = json.loads(reference)
+
+    return {
+        "key": key,
+        "encoders": {
+            name: {
+                "medianMs": statistics.median(durations[name]),
+                "minMs": min(durations[name]),
+                "bytes": len(message.encode()),
+                "isIdentical": message == reference,
+                "isEquivalent": json.loads(message) == reference_data,
+            }
+            for name, message in messages.items()
+        },
+    }
+
+
+def _print_result(result: SocketEncoderResult):
+    print_log(f"[cyan]{result['key']}[/cyan]")
+
+    reference_ms = result["encoders"][_LegacySocketMessageEncoder.name]["medianMs"]
+
+    for name, data in result["encoders"].items():
+        print_log(
+            f"  {name:>8}: median {get_change_text(data['medianMs'], reference_ms)} ms / "
+            f"min {format_ms(data['minMs'])} ms / {data['bytes']} B / "
+            f"{'identical' if data['isIdentical'] else 'equivalent' if data['isEquivalent'] else '[red]DIFFERENT[/red]'}"
+        )
+
+
+def compare_socket_encoder_reports(report: SocketEncoderReport, baseline: SocketEncoderReport):
+    """Print the changes of the median of each encoder of the cases in both ``report`` and ``baseline``."""
+    baseline_results = {result["key"]: result for result in baseline["results"]}
+
+    print_log(f"[yellow]Compared to the report at {baseline['timestamp']}[/yellow]")
+
+    for result in report["results"]:
+        if not (baseline_result := baseline_results.get(result["key"])):
+            print_warning(f"No baseline of {result['key']}", force=True)
+            continue
+
+        print_log(f"[cyan]{result['key']}[/cyan]")
+
+        for name, data in result["encoders"].items():
+            baseline_data = baseline_result["encoders"].get(name)
+
+            print_log(
+                f"  {name:>8}: "
+                f"{get_change_text(data['medianMs'], baseline_data['medianMs'] if baseline_data else None)} ms"
+            )
+
+
+def run_socket_encoder_benchmark(*, windows: list[int], executions: int, repeat: int) -> SocketEncoderReport:
+    report: SocketEncoderReport = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "repeat": repeat,
+        "results": [],
+    }
+
+    contract = FakeTwsConfig().contracts[0].to_contract_details()
+    encoders = _make_encoders()
+
+    px_data_list = [_make_px_data(contract=contract, count=window) for window in windows]
+
+    cases: list[tuple[str, Callable[[], str]]] = [
+        (f"pxData x {len(px_data.dataframe)}", lambda px_data=px_data: to_socket_message_px_data(px_data))
+        for px_data in px_data_list
+    ]
+    cases.append((
+        f"pxDataList x {len(px_data_list)}",
+        lambda: to_socket_message_px_data_list(px_data_list)
+    ))
+
+    execution_collection = _make_execution_collection(px_data=px_data_list[-1], count=executions)
+    cases.append((
+        f"execution x {executions}",
+        lambda: to_socket_message_execution(execution_collection)
+    ))
+
+    for key, to_message in cases:
+        result = run_socket_encoder_case(key=key, to_message=to_message, encoders=encoders, repeat=repeat)
+
+        report["results"].append(result)
+        _print_result(result)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--windows", default="500,2000,10000", help="Bar counts of the Px data, comma separated")
+    parser.add_argument("--executions", type=int, default=1000, help="Grouped executions of the execution message")
+    parser.add_argument("--repeat", type=int, default=10, help="Measured runs of each case")
+    parser.add_argument("--output", help="Report file path")
+    parser.add_argument("--compare", help="Report file path to compare with")
+    args = parser.parse_args()
+
+    socket_encoder_report = run_socket_encoder_benchmark(
+        windows=[int(window) for window in args.windows.split(",")],
+        executions=args.executions,
+        repeat=args.repeat,
+    )
+    dump_benchmark_report(socket_encoder_report, name="socket-encoder", file_path=args.output)
+
+    if args.compare:
+        compare_socket_encoder_reports(socket_encoder_report, load_benchmark_report(args.compare))
@@ -0,0 +1,507 @@
+"""
+Measures the load capacity of the ``IBapiServer`` Px pipeline, from the ticks received to the socket emitter.
+
+The archived bars are replayed by the fake TWS at each of the total tick rates, spread across the contracts.
+Every contract is subscribed for each of the periods, so the load is ``contracts x periods`` Px data.
+The messages are queued to a virtual client, whose queue is drained without sending anything.
+
+Run with ``python -m benchmark.tick_load``.
+"""
+import argparse
+import asyncio
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Coroutine, DefaultDict, Iterable, TypedDict
+
+from trade_ibkr.app.server.const import fast_api_socket
+from trade_ibkr.app.server.emitter import SocketClientQueueData, socket_emitter
+from trade_ibkr.app.server.handler import on_market_data_received, on_px_updated
+from trade_ibkr.app.server.subscription import socket_subscriptions
+from trade_ibkr.const import console
+from trade_ibkr.enums import SocketEvent
+from trade_ibkr.fake_tws import FakeTws, FakeTwsConfig, make_fake_tws_app
+from trade_ibkr.model import OnExecutionFetchedParams
+from trade_ibkr.obj import IBapiServer
+from trade_ibkr.perf import LatencyHistogram, LatencyHistogramData
+from trade_ibkr.utils import print_log, print_warning
+from .utils import dump_benchmark_report, format_ms, get_change_text, load_benchmark_report
+
+# Socket ID of the virtual client subscribed to everything, the same as a client not sending its subscription
+_BENCHMARK_SID = "benchmark"
+
+
+class TickLoadEmitData(TypedDict):
+    count: int
+    totalBytes: int
+    avgBytes: float | None
+    maxBytes: int
+    # From the time the fake TWS should send the tick, so the queueing behind the slow ticks is included
+    latencyFromTick: LatencyHistogramData
+    # From the time the callback starts, which is the processing time of the pipeline only
+    latencyFromCallback: LatencyHistogramData
+
+
+class TickLoadResult(TypedDict):
+    key: str
+    tickRate: float
+    contracts: int
+    periodsSec: list[int]
+    durationSec: float
+    ticksExpected: int
+    ticksReceived: int
+    barUpdatesReceived: int
+    achievedTickRate: float
+    # Estimated ticks which are due but not sent yet at the end because the pipeline falls behind
+    ticksBehindSchedule: int
+    maxScheduleLagMs: float
+    callbackDuration: LatencyHistogramData
+    emits: dict[str, TickLoadEmitData]
+    # Queue of the virtual client, `None` if the client is not added
+    emitter: SocketClientQueueData | None
+    # Market ticks / bar updates received but not emitted because of the debouncing
+    coalescedMarket: int
+    coalescedBars: int
+    cpuSec: float
+    cpuUsPerTick: float | None
+    cpuUtilization: float
+    allocatedBlocksGrowth: int
+    tracedMemoryGrowthKb: float | None
+    tracedMemoryPeakKb: float | None
+    cachedBarsGrowth: int
+
+
+class TickLoadReport(TypedDict):
+    timestamp: str
+    python: str
+    platform: str
+    barUpdateEveryNTicks: int
+    ticksPerBar: int
+    results: list[TickLoadResult]
+
+
+@dataclass(kw_only=True)
+class _EmitStats:
+    count: int = 0
+    total_bytes: int = 0
+    max_bytes: int = 0
+    latency_from_tick: LatencyHistogram = field(default_factory=LatencyHistogram)
+    latency_from_callback: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def to_dict(self) -> TickLoadEmitData:
+        return {
+            "count": self.count,
+            "totalBytes": self.total_bytes,
+            "avgBytes": self.total_bytes / self.count if self.count else None,
+            "maxBytes": self.max_bytes,
+            "latencyFromTick": self.latency_from_tick.to_dict(),
+            "latencyFromCallback": self.latency_from_callback.to_dict(),
+        }
+
+
+class _TickLoadProbe:
+    """
+    Instruments the app and ``socket_emitter.publish()``.
+
+    The fake TWS calls the app on a single thread, and the handlers emit within the callbacks,
+    so the tick being processed is tracked without any locking.
+    """
+
+    def __init__(self, fake_tws: FakeTws):
+        self._fake_tws = fake_tws
+        self._recording = False
+
+        self.ticks_received = 0
+        self.bar_updates_received = 0
+        self.max_schedule_lag_sec: float = 0
+        self.last_tick_due: float = 0
+        self.callback_duration = LatencyHistogram()
+        self.emits: DefaultDict[str, _EmitStats] = defaultdict(_EmitStats)
+
+        self._tick_due: float = 0
+        self._callback_start: float = 0
+
+    def start(self):
+        self._recording = True
+
+    def stop(self):
+        self._recording = False
+
+    def wrap_callbacks(self, app: IBapiServer):
+        tick_price = app.tickPrice
+        historical_data_update = app.historicalDataUpdate
+
+        def wrapped_tick_price(*args):
+            self._on_callback_start()
+            tick_price(*args)
+
+            if self._recording:
+                self.ticks_received += 1
+                self.last_tick_due = self._tick_due
+                self.callback_duration.record(time.perf_counter() - self._callback_start)
+
+        def wrapped_historical_data_update(*args):
+            self._on_callback_start()
+            historical_data_update(*args)
+
+            if self._recording:
+                self.bar_updates_received += 1
+                self.callback_duration.record(time.perf_counter() - self._callback_start)
+
+        # Instance attributes, so the fake TWS calls them instead of the methods
+        app.tickPrice = wrapped_tick_price
+        app.historicalDataUpdate = wrapped_historical_data_update
+
+    def _on_callback_start(self):
+        self._callback_start = time.perf_counter()
+        self._tick_due = self._fake_tws.scheduler.current_due or self._callback_start
+
+        if self._recording:
+            self.max_schedule_lag_sec = max(self.max_schedule_lag_sec, self._callback_start - self._tick_due)
+
+    def wrap_publish(self, publish):
+        def wrapped_publish(event: str, message: str, sids: Iterable[str], **kwargs):
+            if self._recording:
+                published = time.perf_counter()
+
+                stats = self.emits[event]
+                stats.count += 1
+                stats.total_bytes += len(message)
+                stats.max_bytes = max(stats.max_bytes, len(message))
+                stats.latency_from_tick.record(published - self._tick_due)
+                stats.latency_from_callback.record(published - self._callback_start)
+
+            publish(event, message, sids, **kwargs)
+
+        return wrapped_publish
+
+
+class _SocketLoopThread:
+    """Event loop of the socket server, which the queue of the virtual client runs on."""
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def run(self, coro: Coroutine):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+
+async def _noop(*_, **__):
+    pass
+
+
+async def _add_benchmark_client():
+    socket_emitter.add_client(_BENCHMARK_SID)
+    socket_subscriptions.subscribe(_BENCHMARK_SID)
+
+
+async def _remove_benchmark_client():
+    socket_subscriptions.remove(_BENCHMARK_SID)
+    socket_emitter.remove_client(_BENCHMARK_SID)
+
+
+def _to_bar_size(period_sec: int) -> str:
+    if period_sec >= 86400:
+        return f"{period_sec // 86400} day"
+
+    if period_sec >= 60:
+        return f"{period_sec // 60} min{'s' if period_sec > 60 else ''}"
+
+    return f"{period_sec} secs"
+
+
+def _to_duration(period_sec: int, bar_count: int) -> str:
+    duration_sec = period_sec * bar_count
+
+    # Duration in seconds is limited to 1 day
+    if duration_sec > 86400:
+        return f"{-(-duration_sec // 86400)} D"
+
+    return f"{duration_sec} S"
+
+
+def _make_app(fake_tws: FakeTws) -> IBapiServer:
+    app = make_fake_tws_app(IBapiServer)()
+    app.use_fake_tws(fake_tws)
+
+    app.set_on_position_fetched(None)
+    app.set_on_open_order_fetched(None)
+    app.set_on_order_filled(_noop)
+    app.set_on_executions_fetched(_noop, lambda: OnExecutionFetchedParams())
+
+    return app
+
+
+def _get_cached_bar_count(app: IBapiServer) -> int:
+    return sum(len(entry.data) for entry in app._px_data_cache.data.values())
+
+
+def run_tick_load_case(
+        *,
+        tick_rate: float, contract_count: int, periods_sec: list[int], bar_count: int,
+        duration_sec: float, warmup_sec: float, trace_memory: bool, config: FakeTwsConfig,
+        socket_loop: _SocketLoopThread,
+) -> TickLoadResult:
+    if contract_count > len(config.contracts):
+        raise ValueError(f"Only {len(config.contracts)} contracts are available in the fake TWS")
+
+    config.tick_rate_per_sec = tick_rate / contract_count
+
+    fake_tws = FakeTws(config)
+    app = _make_app(fake_tws)
+    probe = _TickLoadProbe(fake_tws)
+    probe.wrap_callbacks(app)
+    socket_emitter.publish = probe.wrap_publish(publish_original := socket_emitter.publish)
+
+    app.activate(0, 0)
+
+    px_data_req_ids: list[int] = []
+    for fake_contract in config.contracts[:contract_count]:
+        for period_sec in periods_sec:
+            px_data_req_ids.append(app.get_px_data_keep_update(
+                contract=fake_contract.to_contract(),
+                duration=_to_duration(period_sec, bar_count),
+                bar_size=_to_bar_size(period_sec),
+                period_sec=period_sec,
+                is_major=False,
+                on_px_data_updated=on_px_updated,
+                on_market_data_received=on_market_data_received,
+            ))
+
+    while not app.is_all_px_data_ready():
+        time.sleep(0.05)
+
+    socket_subscriptions.register_px_data(app, px_data_req_ids)
+    socket_loop.run(_add_benchmark_client())
+
+    time.sleep(warmup_sec)
+
+    if trace_memory:
+        tracemalloc.start()
+
+    traced_start = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    blocks_start = sys.getallocatedblocks()
+    cached_bars_start = _get_cached_bar_count(app)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    probe.start()
+    time.sleep(duration_sec)
+    probe.stop()
+
+    wall_end = time.perf_counter()
+    wall_sec = wall_end - wall_start
+    cpu_sec = time.process_time() - cpu_start
+    blocks_growth = sys.getallocatedblocks() - blocks_start
+    cached_bars_growth = _get_cached_bar_count(app) - cached_bars_start
+
+    traced_growth_kb = traced_peak_kb = None
+    if trace_memory:
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        traced_growth_kb = (traced_current - traced_start) / 1024
+        traced_peak_kb = traced_peak / 1024
+        tracemalloc.stop()
+
+    app.disconnect()
+    emitter_data = next(
+        (data for data in socket_emitter.get_queue_data() if data["sid"] == _BENCHMARK_SID),
+        None
+    )
+    socket_loop.run(_remove_benchmark_client())
+    socket_emitter.publish = publish_original
+
+    ticks_expected = int(tick_rate * wall_sec)
+    ticks_behind = int(max(0., wall_end - probe.last_tick_due) * tick_rate) if probe.ticks_received else ticks_expected
+    emits = {event: stats.to_dict() for event, stats in probe.emits.items()}
+
+    return {
+        "key": f"{tick_rate:g}/s x {contract_count} contracts x {','.join(map(str, periods_sec))}",
+        "tickRate": tick_rate,
+        "contracts": contract_count,
+        "periodsSec": periods_sec,
+        "durationSec": wall_sec,
+        "ticksExpected": ticks_expected,
+        "ticksReceived": probe.ticks_received,
+        "barUpdatesReceived": probe.bar_updates_received,
+        "achievedTickRate": probe.ticks_received / wall_sec,
+        "ticksBehindSchedule": ticks_behind,
+        "maxScheduleLagMs": probe.max_schedule_lag_sec * 1000,
+        "callbackDuration": probe.callback_duration.to_dict(),
+        "emits": emits,
+        "emitter": emitter_data,
+        "coalescedMarket": probe.ticks_received - probe.emits[SocketEvent.PX_UPDATED_MARKET].count,
+        "coalescedBars": probe.bar_updates_received - probe.emits[SocketEvent.PX_UPDATED].count,
+        "cpuSec": cpu_sec,
+        "cpuUsPerTick": cpu_sec / probe.ticks_received * 1E6 if probe.ticks_received else None,
+        "cpuUtilization": cpu_sec / wall_sec,
+        "allocatedBlocksGrowth": blocks_growth,
+        "tracedMemoryGrowthKb": traced_growth_kb,
+        "tracedMemoryPeakKb": traced_peak_kb,
+        "cachedBarsGrowth": cached_bars_growth,
+    }
+
+
+def _print_result(result: TickLoadResult):
+    print_log(f"[cyan]{result['key']}[/cyan]")
+    print_log(
+        f"  Ticks: {result['ticksReceived']} / {result['ticksExpected']} expected "
+        f"({result['achievedTickRate']:.1f}/s, max lag {result['maxScheduleLagMs']:.2f} ms) / "
+        f"bar updates: {result['barUpdatesReceived']}"
+    )
+    print_log(
+        f"  CPU: {result['cpuUtilization'] * 100:.1f}% / "
+        f"{format_ms(result['cpuUsPerTick'])} us per tick / "
+        f"callback p50 {format_ms(result['callbackDuration']['p50Ms'])} ms "
+        f"p99 {format_ms(result['callbackDuration']['p99Ms'])} ms"
+    )
+
+    for event, emit in result["emits"].items():
+        latency = emit["latencyFromTick"]
+
+        print_log(
+            f"  {event:>16}: {emit['count']} emits / avg {emit['avgBytes'] or 0:.0f} B / "
+            f"p50 {format_ms(latency['p50Ms'])} ms / p99 {format_ms(latency['p99Ms'])} ms / "
+            f"max {format_ms(latency['maxMs'])} ms"
+        )
+
+    if emitter := result.get("emitter"):
+        print_log(
+            f"  Queue: {emitter['sent']} sent / {emitter['dropped']} dropped / {emitter['pending']} pending / "
+            f"lag p50 {format_ms(emitter['lag']['p50Ms'])} ms / p99 {format_ms(emitter['lag']['p99Ms'])} ms"
+        )
+
+    print_log(
+        f"  Coalesced: {result['coalescedMarket']} market / {result['coalescedBars']} bars / "
+        f"memory: {result['allocatedBlocksGrowth']:+d} blocks, {result['cachedBarsGrowth']:+d} bars"
+        + (
+            f", {result['tracedMemoryGrowthKb']:+.1f} KB (peak {result['tracedMemoryPeakKb']:.1f} KB)"
+            if result["tracedMemoryGrowthKb"] is not None else ""
+        )
+    )
+
+
+def compare_tick_load_reports(report: TickLoadReport, baseline: TickLoadReport):
+    """Print the changes of the key metrics of the cases in both ``report`` and ``baseline``."""
+    baseline_results = {result["key"]: result for result in baseline["results"]}
+
+    print_log(f"[yellow]Compared to the report at {baseline['timestamp']}[/yellow]")
+
+    for result in report["results"]:
+        if not (baseline_result := baseline_results.get(result["key"])):
+            print_warning(f"No baseline of {result['key']}", force=True)
+            continue
+
+        print_log(f"[cyan]{result['key']}[/cyan]")
+        print_log(
+            f"  CPU us per tick: {get_change_text(result['cpuUsPerTick'], baseline_result['cpuUsPerTick'])} / "
+            f"achieved tick rate: "
+            f"{get_change_text(result['achievedTickRate'], baseline_result['achievedTickRate'])}"
+        )
+
+        for event, emit in result["emits"].items():
+            if not (baseline_emit := baseline_result["emits"].get(event)):
+                continue
+
+            print_log(
+                f"  {event:>16}: "
+                f"p50 {get_change_text(emit['latencyFromTick']['p50Ms'], baseline_emit['latencyFromTick']['p50Ms'])}"
+                f" ms / "
+                f"p99 {get_change_text(emit['latencyFromTick']['p99Ms'], baseline_emit['latencyFromTick']['p99Ms'])}"
+                f" ms / "
+                f"bytes {get_change_text(emit['avgBytes'], baseline_emit['avgBytes'])}"
+            )
+
+
+def run_tick_load_benchmark(
+        *,
+        tick_rates: list[float], contract_count: int, periods_sec: list[int], bar_count: int,
+        duration_sec: float, warmup_sec: float, trace_memory: bool, verbose: bool,
+        ticks_per_bar: int, bar_update_every_n_ticks: int,
+) -> TickLoadReport:
+    report: TickLoadReport = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "barUpdateEveryNTicks": bar_update_every_n_ticks,
+        "ticksPerBar": ticks_per_bar,
+        "results": [],
+    }
+
+    # Nothing is actually sent, only the payloads and the queueing are measured
+    emit_original = fast_api_socket._sio.emit
+    fast_api_socket._sio.emit = _noop
+
+    socket_loop = _SocketLoopThread()
+    socket_loop.start()
+
+    try:
+        for tick_rate in tick_rates:
+            config = FakeTwsConfig(ticks_per_bar=ticks_per_bar, bar_update_every_n_ticks=bar_update_every_n_ticks)
+
+            # Handlers print on every update, which is suppressed to keep the benchmark output readable
+            console.quiet = not verbose
+
+            try:
+                result = run_tick_load_case(
+                    tick_rate=tick_rate, contract_count=contract_count, periods_sec=periods_sec,
+                    bar_count=bar_count, duration_sec=duration_sec, warmup_sec=warmup_sec,
+                    trace_memory=trace_memory, config=config, socket_loop=socket_loop,
+                )
+            finally:
+                console.quiet = False
+
+            report["results"].append(result)
+            _print_result(result)
+    finally:
+        socket_loop.stop()
+        fast_api_socket._sio.emit = emit_original
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="10,100,1000,10000", help="Total ticks per second, comma separated")
+    parser.add_argument("--contracts", type=int, default=2)
+    parser.add_argument("--periods", default="60,300", help="Period seconds of the Px data, comma separated")
+    parser.add_argument("--bars", type=int, default=1440, help="History bar count of each Px data")
+    parser.add_argument("--duration", type=float, default=10, help="Measured seconds of each rate")
+    parser.add_argument("--warmup", type=float, default=1, help="Seconds before measuring each rate")
+    parser.add_argument("--ticks-per-bar", type=int, default=4)
+    parser.add_argument("--bar-update-every", type=int, default=1, help="Send bar update once every N ticks")
+    parser.add_argument("--trace-memory", action="store_true", help="Trace memory growth, slows down the pipeline")
+    parser.add_argument("--verbose", action="store_true", help="Show the logs of the handlers")
+    parser.add_argument("--output", help="Report file path")
+    parser.add_argument("--compare", help="Report file path to compare with")
+    args = parser.parse_args()
+
+    tick_load_report = run_tick_load_benchmark(
+        tick_rates=[float(rate) for rate in args.rates.split(",")],
+        contract_count=args.contracts,
+        periods_sec=[int(period) for period in args.periods.split(",")],
+        bar_count=args.bars,
+        duration_sec=args.duration,
+        warmup_sec=args.warmup,
+        trace_memory=args.trace_memory,
+        verbose=args.verbose,
+        ticks_per_bar=args.ticks_per_bar,
+        bar_update_every_n_ticks=args.bar_update_every,
+    )
+    dump_benchmark_report(tick_load_report, name="tick-load", file_path=args.output)
+
+    if args.compare:
+        compare_tick_load_reports(tick_load_report, load_benchmark_report(args.compare))
@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from trade_ibkr.utils import print_log
+
+
+def format_ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+def get_change_text(current: float | None, baseline: float | None) -> str:
+    if current is None or baseline is None:
+        return "-"
+
+    if not baseline:
+        return f"{current:.2f}"
+
+    return f"{current:.2f} ({(current - baseline) / baseline * 100:+.1f}%)"
+
+
+def dump_benchmark_report(report: Any, *, name: str, file_path: str | None = None) -> str:
+    """Save ``report`` as JSON to ``file_path``, or ``benchmark-<name>-<timestamp>.json`` if not given."""
+    file_path = file_path or f"benchmark-{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+
+    with open(file_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print_log(f"[yellow]Benchmark report saved to {file_path}[/yellow]")
+
+    return file_path
+
+
+def load_benchmark_report(file_path: str) -> Any:
+    with open(file_path) as f:
+        return json.load(f)
@@ -0,0 +1,20 @@
+import argparse
+
+from trade_ibkr.fake_tws import FakeTwsConfig, FakeTwsServer
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fake TWS replaying the archived bars")
+    parser.add_argument("--port", type=int, default=8384, help="8384 is the demo port, 8383 is the live port")
+    parser.add_argument("--tick-rate", type=float, default=4, help="Ticks per second for each contract")
+    parser.add_argument("--ticks-per-bar", type=int, default=4)
+    parser.add_argument("--fill-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    FakeTwsServer(
+        port=args.port,
+        config=FakeTwsConfig(
+            tick_rate_per_sec=args.tick_rate,
+            ticks_per_bar=args.ticks_per_bar,
+            fill_delay_sec=args.fill_delay,
+        ),
+    ).serve_forever()
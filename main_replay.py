@@ -0,0 +1,31 @@
+import argparse
+import time
+
+from trade_ibkr.app import run_bot_spread, run_ib_server
+from trade_ibkr.capture import CaptureReplay, make_capture_replay_app
+from trade_ibkr.obj import IBapiServer, IBautoBotSpread
+from trade_ibkr.utils import print_log
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a capture of the TWS callbacks into the server or the bot")
+    parser.add_argument("file", help="Capture file path")
+    parser.add_argument("--target", choices=["server", "bot-spread"], default="server")
+    parser.add_argument("--speed", type=float, default=1, help="Replay speed multiplier, 0 to replay at max speed")
+    args = parser.parse_args()
+
+    replay = CaptureReplay(args.file, speed=args.speed or None)
+    cpu_start = time.process_time()
+
+    if args.target == "server":
+        app = run_ib_server(app_cls=make_capture_replay_app(IBapiServer, replay))
+    else:
+        app = run_bot_spread(app_cls=make_capture_replay_app(IBautoBotSpread, replay))
+
+    replay.wait_done()
+    app.disconnect()
+
+    cpu_sec = time.process_time() - cpu_start
+    print_log(
+        f"[Capture] {replay.records_fed / replay.duration_sec:.0f} records/s / "
+        f"CPU {cpu_sec:.3f} s ({cpu_sec / max(replay.records_fed, 1) * 1E6:.1f} us per record)"
+    )
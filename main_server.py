@@ -1,7 +1,6 @@
 import uvicorn
 
-from trade_ibkr.app import run_ib_server
-from trade_ibkr.const import fast_api
+from trade_ibkr.app import fast_api, run_ib_server
 from trade_ibkr.utils import set_current_process_to_highest_priority
 
 
@@ -1,8 +1,11 @@
 from decimal import Decimal
+from typing import Type
 
 import numpy as np
 from pandas import Series
 
+from trade_ibkr.capture import get_capture_file_path
+from trade_ibkr.config import get_config, print_config
 from trade_ibkr.model import Commodity, CommodityPair, OnBotSpreadPxUpdatedEvent
 from trade_ibkr.obj import IBautoBotSpread
 from trade_ibkr.strategy import SpreadTradeParams, spread_trading_strategy
@@ -17,11 +20,13 @@ async def on_px_updated(e: OnBotSpreadPxUpdatedEvent):
     spread_trading_strategy(SpreadTradeParams(e=e))
 
 
-def run_bot_spread():
+def run_bot_spread(*, app_cls: Type[IBautoBotSpread] = IBautoBotSpread) -> IBautoBotSpread:
+    print_config()
+
     contract_mnq = make_futures_contract("MNQH2", "GLOBEX")
     contract_mym = make_futures_contract("MYM  MAR 22", "ECBOT")
 
-    app = IBautoBotSpread(
+    app = app_cls(
         commodity_pair=CommodityPair(
             buy_on_high=Commodity(contract=contract_mnq, quantity=Decimal(2)),
             buy_on_low=Commodity(contract=contract_mym, quantity=Decimal(6)),
@@ -29,7 +34,11 @@ def run_bot_spread():
         ),
         on_px_updated=on_px_updated,
     )
+    if capture_directory := get_config().system.capture_directory:
+        app.start_capture(get_capture_file_path(capture_directory, "bot-spread"))
     app.activate(
         8384,  # FIXME: Force demo
         77
     )
+
+    return app
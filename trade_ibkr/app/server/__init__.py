@@ -1 +1,2 @@
+from .const import fast_api, fast_api_socket
 from .main import run_ib_server
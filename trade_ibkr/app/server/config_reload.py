@@ -0,0 +1,192 @@
+import asyncio
+import os
+import time
+from typing import TypedDict
+
+import yaml
+
+from trade_ibkr.config import CONFIG_FILE_PATH, Config, ConfigError, get_config, load_config, set_config
+from trade_ibkr.obj import IBapiServer
+from trade_ibkr.utils import print_error, print_log, print_warning
+from .px_data import PX_DATA_OWNER_CONFIG, PxDataSeriesManager, get_px_data_series_configs
+
+
+class ConfigReloadResult(TypedDict):
+    # Unique identifiers of the Px data rebuilt with the new config
+    rebuilt: list[str]
+    # Unique identifiers of the Px data added
+    added: list[str]
+    # Unique identifiers of the Px data removed
+    removed: list[str]
+    # Px data series not ready in time, which are canceled
+    failed: list[str]
+    # Changed config which only takes effect after restarting the server
+    restartRequired: list[str]
+
+
+def _get_restart_required(config_old: Config, config_new: Config) -> list[str]:
+    system_old, system_new = config_old.system, config_new.system
+
+    changed = {
+        "system.demo": system_old.demo != system_new.demo,
+        "system.account": system_old.account != system_new.account,
+        "system.profiler": system_old.profiler != system_new.profiler,
+        "system.config-reload": system_old.config_reload != system_new.config_reload,
+        "system.capture-directory": system_old.capture_directory != system_new.capture_directory,
+        "server.client-id": config_old.server.client_id != config_new.server.client_id,
+    }
+
+    return [name for name, is_changed in changed.items() if is_changed]
+
+
+def _is_px_data_changed(config_old: Config, config_new: Config, period_sec: int) -> bool:
+    data_old, data_new = config_old.data, config_new.data
+
+    return (
+            data_old.sma != data_new.sma
+            or data_old.retention != data_new.retention
+            or data_old.trend_window.get(period_sec) != data_new.trend_window.get(period_sec)
+            or data_old.get_diff_sma_window(period_sec) != data_new.get_diff_sma_window(period_sec)
+            or config_old.sr_level.multiplier != config_new.sr_level.multiplier
+            or config_old.sr_level.strong_threshold != config_new.sr_level.strong_threshold
+    )
+
+
+class ServerConfigReloader:
+    """
+    Reload the config, then apply the change to the running server without reconnecting to TWS.
+
+    Only the Px data affected by the change are rebuilt, from the bars already cached.
+    Px data series added to or removed from the config are requested or released one by one.
+    Px update frequencies and the rest of the config read on use take effect right away.
+
+    Reload runs on the event loop of the socket server, one at a time.
+    """
+
+    def __init__(self, app: IBapiServer, px_data_series: PxDataSeriesManager):
+        self._app = app
+        self._px_data_series = px_data_series
+
+        self._lock = asyncio.Lock()
+        self._config_mtime = self._get_config_mtime()
+
+    @staticmethod
+    def _get_config_mtime() -> int | None:
+        try:
+            return os.stat(CONFIG_FILE_PATH).st_mtime_ns
+        except OSError:
+            return None
+
+    async def reload(self) -> ConfigReloadResult:
+        """
+        Reload the config from ``config.yaml`` and apply it.
+
+        :raises ConfigError: if the config is invalid, in which case the current config is kept
+        """
+        async with self._lock:
+            self._config_mtime = self._get_config_mtime()
+
+            config_old = get_config()
+            config_new = load_config()
+
+            set_config(config_new)
+
+            return await self._apply(config_old, config_new)
+
+    async def watch(self, interval_sec: float):
+        """Reload the config on change of ``config.yaml``, checking every ``interval_sec``."""
+        while True:
+            await asyncio.sleep(interval_sec)
+
+            if self._get_config_mtime() == self._config_mtime:
+                continue
+
+            print_log("[Config] Config file changed, reloading")
+
+            try:
+                await self.reload()
+            except (ConfigError, OSError, yaml.YAMLError) as ex:
+                print_error(f"[Config] Current config kept as the new config failed to load: {ex}")
+
+    async def _apply(self, config_old: Config, config_new: Config) -> ConfigReloadResult:
+        start = time.perf_counter()
+
+        series_configs = get_px_data_series_configs(config_new.server.contract)
+
+        result: ConfigReloadResult = {
+            "rebuilt": [],
+            "added": [],
+            "removed": [],
+            "failed": [],
+            "restartRequired": _get_restart_required(config_old, config_new),
+        }
+
+        # Keys compare the contract and the period only, so the keys of the new config are kept to compare the requests
+        keys_new = {key: key for key in series_configs}
+
+        # Resampled series go first, so their base series are canceled on release
+        for key in sorted(self._px_data_series.get_keys(PX_DATA_OWNER_CONFIG), key=lambda key: not key.is_resampled):
+            # Requested again if the request changed, such as the duration
+            if (key_new := keys_new.get(key)) and key_new.request == key.request:
+                continue
+
+            identifier = self._px_data_series.get_identifier(key) or str(key)
+
+            # Kept if also added on request
+            if await self._px_data_series.release(key, PX_DATA_OWNER_CONFIG):
+                result["removed"].append(identifier)
+
+        refresh_req_ids: dict[int, bool] = {}
+
+        for key, req_id in self._px_data_series.req_ids.items():
+            is_major_changed = (
+                    key in series_configs
+                    and self._app.set_px_data_is_major(req_id, series_configs[key][1].is_major)
+            )
+            is_rebuild_indicators = (
+                    config_old.data.get_diff_sma_window(key.period_sec)
+                    != config_new.data.get_diff_sma_window(key.period_sec)
+            )
+
+            if (
+                    is_rebuild_indicators
+                    or is_major_changed
+                    or _is_px_data_changed(config_old, config_new, key.period_sec)
+            ):
+                refresh_req_ids[req_id] = is_rebuild_indicators
+
+        # Refreshing calls the handlers, which run their own event loop
+        await asyncio.to_thread(self._refresh_px_data, refresh_req_ids)
+        result["rebuilt"].extend(
+            self._app.get_px_data_from_cache(req_id).unique_identifier for req_id in refresh_req_ids
+        )
+
+        config_keys = set(self._px_data_series.get_keys(PX_DATA_OWNER_CONFIG))
+        added_req_ids = await self._px_data_series.acquire(
+            {key: series_config for key, series_config in series_configs.items() if key not in config_keys},
+            PX_DATA_OWNER_CONFIG,
+        )
+
+        for key, req_id in added_req_ids.items():
+            if req_id is None:
+                result["failed"].append(str(key))
+                continue
+
+            result["added"].append(self._px_data_series.get_identifier(key))
+
+        if result["restartRequired"]:
+            print_warning(
+                f"[Config] Restart the server to apply the change of {', '.join(result['restartRequired'])}",
+                force=True
+            )
+
+        print_log(
+            f"[Config] Reloaded in {time.perf_counter() - start:.3f} s - "
+            f"{len(result['rebuilt'])} rebuilt / {len(result['added'])} added / {len(result['removed'])} removed"
+        )
+
+        return result
+
+    def _refresh_px_data(self, refresh_req_ids: dict[int, bool]):
+        for req_id, is_rebuild_indicators in refresh_req_ids.items():
+            self._app.refresh_px_data(req_id, rebuild_indicators=is_rebuild_indicators)
@@ -0,0 +1,246 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Iterable, TypeAlias, TypedDict
+
+from trade_ibkr.enums import SocketEvent
+from trade_ibkr.perf import LatencyHistogram, LatencyHistogramData, metric_socket_emit_errors, metric_socket_emit_lag
+from trade_ibkr.utils import print_error, print_warning
+from .const import fast_api_socket
+
+# Only the latest message of each key of these events is needed, so the older unsent messages are replaced
+CONFLATED_EVENTS: set[str] = {SocketEvent.PX_UPDATED, SocketEvent.PX_UPDATED_MARKET}
+
+# Max count of the unsent messages of a client, the conflated messages are dropped from the oldest beyond this
+SOCKET_CLIENT_QUEUE_MAX_SIZE = 64
+
+ConflationKey: TypeAlias = tuple[str, str | int | None]
+
+
+@dataclass(kw_only=True)
+class SocketThrottle:
+    """Throttle of a conflated event of a client, the urgent messages are always sent right away."""
+
+    # Min seconds between the messages of the same key
+    interval_sec: float = 0
+    # Drop the messages not urgent, such as the market Px not breaking the high / low of the current bar
+    urgent_only: bool = False
+
+
+class SocketClientQueueData(TypedDict):
+    sid: str
+    pending: int
+    sent: int
+    # Conflated messages replaced or dropped before sent
+    dropped: int
+    # Messages failed to send, such as the client disconnected while sending
+    failed: int
+    # From the time the message is published to the time it is sent to the client
+    lag: LatencyHistogramData
+
+
+class _SocketClientQueue:
+    """
+    Unsent messages of a single client, which are only accessed from the event loop of the socket server.
+
+    Messages of the conflated events are kept the latest only for each key, and held until the throttle allows.
+    Other messages, such as the orders and the fills, are always sent in order and never dropped.
+    """
+
+    def __init__(self, sid: str, *, max_size: int):
+        self.sid = sid
+        self.max_size = max_size
+        self.throttles: dict[str, SocketThrottle] = {}
+
+        # Value is the event, the message, the time when the replaced message is published,
+        # and if any of the replaced messages is urgent
+        self._conflated: OrderedDict[ConflationKey, tuple[str, str, float, bool]] = OrderedDict()
+        self._ordered: deque[tuple[str, str, float]] = deque()
+        self._last_sent: dict[ConflationKey, float] = {}
+        self._has_message = asyncio.Event()
+
+        self.sent: int = 0
+        self.dropped: int = 0
+        self.failed: int = 0
+        self.lag = LatencyHistogram()
+
+    def __len__(self) -> int:
+        return len(self._conflated) + len(self._ordered)
+
+    def put(self, event: str, message: str, *, key: str | int | None, published: float, is_urgent: bool):
+        if event in CONFLATED_EVENTS:
+            conflation_key = (event, key)
+            replaced = self._conflated.get(conflation_key)
+
+            if (
+                    not is_urgent
+                    and not (replaced and replaced[3])
+                    and (throttle := self.throttles.get(event))
+                    and throttle.urgent_only
+            ):
+                # Only this message is dropped, the unsent message of the same key is kept
+                self.dropped += 1
+                return
+
+            if replaced:
+                # Lag counts from the oldest unsent message, so it shows how stale the client is
+                published = replaced[2]
+                is_urgent = is_urgent or replaced[3]
+                self.dropped += 1
+
+            self._conflated[conflation_key] = (event, message, published, is_urgent)
+        else:
+            self._ordered.append((event, message, published))
+
+        while len(self) > self.max_size and self._conflated:
+            self._conflated.popitem(last=False)
+            self.dropped += 1
+
+        self._has_message.set()
+
+    def _get_due(self, key: ConflationKey, is_urgent: bool) -> float:
+        if is_urgent or not (throttle := self.throttles.get(key[0])):
+            return 0
+
+        return self._last_sent.get(key, 0) + throttle.interval_sec
+
+    def _pop(self) -> tuple[str, str, float] | float | None:
+        """
+        Get the next message to send.
+
+        If all unsent messages are throttled, returns the time when the earliest of them is due.
+        Returns ``None`` if nothing to send.
+        """
+        # Orders and fills are sent first
+        if self._ordered:
+            return self._ordered.popleft()
+
+        now = time.perf_counter()
+        due_earliest: float | None = None
+
+        for key, (event, message, published, is_urgent) in self._conflated.items():
+            if (due := self._get_due(key, is_urgent)) <= now:
+                del self._conflated[key]
+                self._last_sent[key] = now
+                return event, message, published
+
+            due_earliest = min(due, due_earliest or due)
+
+        return due_earliest
+
+    async def run(self):
+        while True:
+            item = self._pop()
+
+            if isinstance(item, tuple):
+                event, message, published = item
+
+                try:
+                    await fast_api_socket.emit(event, message, to=self.sid)
+                except Exception as ex:
+                    # The next messages are still sent, until the client is removed on disconnect
+                    self.failed += 1
+                    metric_socket_emit_errors.labels(event).inc()
+                    print_error(f"[Socket] Failed to send `{event}` to {self.sid}: {ex}")
+                    continue
+
+                lag = time.perf_counter() - published
+
+                self.sent += 1
+                self.lag.record(lag)
+                metric_socket_emit_lag.labels(event).observe(lag)
+                continue
+
+            self._has_message.clear()
+
+            try:
+                await asyncio.wait_for(
+                    self._has_message.wait(),
+                    timeout=item - time.perf_counter() if item is not None else None,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def to_dict(self) -> SocketClientQueueData:
+        return {
+            "sid": self.sid,
+            "pending": len(self),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "lag": self.lag.to_dict(),
+        }
+
+
+class SocketEmitter:
+    """
+    Sends the messages to each client from its own queue, so a slow client does not block the others or the publisher.
+
+    Messages are published from any thread, and sent from the event loop of the socket server.
+    """
+
+    def __init__(self, *, max_size: int = SOCKET_CLIENT_QUEUE_MAX_SIZE):
+        self._max_size = max_size
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queues: dict[str, _SocketClientQueue] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def add_client(self, sid: str):
+        """Must be called from the event loop of the socket server."""
+        self._loop = asyncio.get_running_loop()
+
+        queue = _SocketClientQueue(sid, max_size=self._max_size)
+        self._queues[sid] = queue
+        self._tasks[sid] = self._loop.create_task(queue.run())
+
+    def remove_client(self, sid: str):
+        """Must be called from the event loop of the socket server."""
+        self._queues.pop(sid, None)
+
+        if task := self._tasks.pop(sid, None):
+            task.cancel()
+
+    def set_throttle(self, sid: str, event: str, throttle: SocketThrottle | None):
+        """Must be called from the event loop of the socket server. ``None`` removes the throttle."""
+        if (queue := self._queues.get(sid)) is None:
+            return
+
+        if throttle:
+            queue.throttles[event] = throttle
+        else:
+            queue.throttles.pop(event, None)
+
+    def _put(
+            self, event: str, message: str, sids: Iterable[str],
+            key: str | int | None, published: float, is_urgent: bool,
+    ):
+        for sid in sids:
+            if (queue := self._queues.get(sid)) is None:
+                # Disconnected before the message is queued
+                continue
+
+            queue.put(event, message, key=key, published=published, is_urgent=is_urgent)
+
+            if len(queue) > queue.max_size:
+                print_warning(f"[Socket] {len(queue)} messages pending for {sid}, which could not be dropped")
+
+    def publish(
+            self, event: str, message: str, sids: Iterable[str], *,
+            key: str | int | None = None, is_urgent: bool = False,
+    ):
+        """
+        Queue ``message`` to the clients ``sids`` without waiting for it to be sent. Thread-safe.
+
+        ``is_urgent`` bypasses the throttle of the clients.
+        """
+        if not self._loop:
+            return
+
+        self._loop.call_soon_threadsafe(self._put, event, message, sids, key, time.perf_counter(), is_urgent)
+
+    def get_queue_data(self) -> list[SocketClientQueueData]:
+        return [queue.to_dict() for queue in list(self._queues.values())]
+
+
+socket_emitter = SocketEmitter()
@@ -1,4 +1,3 @@
-from trade_ibkr.const import fast_api_socket
 from trade_ibkr.enums import SocketEvent
 from trade_ibkr.line import line_notify
 from trade_ibkr.model import (
@@ -7,50 +6,54 @@ from trade_ibkr.model import (
 )
 from trade_ibkr.obj import IBapiServer
 from trade_ibkr.utils import (
-    print_log,
+    get_detailed_contract_identifier, print_log,
     to_socket_message_error, to_socket_message_execution, to_socket_message_open_order, to_socket_message_order_filled,
     to_socket_message_position, to_socket_message_px_data, to_socket_message_px_data_market,
 )
-from .utils import get_execution_on_fetched_params
+from .subscription import socket_subscriptions
+from .utils import GetPxDataReqIds, get_execution_on_fetched_params
 
 
 async def on_px_updated(e: OnPxDataUpdatedEventNoAccount):
-    print_log(f"[TWS] Px Updated / HST ({e})")
-    await fast_api_socket.emit(
+    print_log(f"[TWS] Px Updated / HST ({e})", rate_limit_key="px-updated-hst")
+    socket_subscriptions.emit(
         SocketEvent.PX_UPDATED,
-        to_socket_message_px_data(e.px_data)
+        lambda: to_socket_message_px_data(e.px_data),
+        key=e.px_data.unique_identifier,
     )
 
 
 async def on_market_data_received(e: OnMarketDataReceivedEvent):
-    print_log(f"[TWS] Px Updated / MKT ({e})")
-    await fast_api_socket.emit(
+    print_log(f"[TWS] Px Updated / MKT ({e})", rate_limit_key="px-updated-mkt")
+    socket_subscriptions.emit(
         SocketEvent.PX_UPDATED_MARKET,
-        to_socket_message_px_data_market(e.contract, e.px)
+        lambda: to_socket_message_px_data_market(e.contract, e.px),
+        key=get_detailed_contract_identifier(e.contract),
+        is_urgent=e.is_hl_broken,
     )
 
 
 async def on_position_fetched(e: OnPositionFetchedEvent):
-    print_log(f"[TWS] Fetched positions ({e})")
-    await fast_api_socket.emit(
+    print_log(f"[TWS] Fetched positions ({e})", rate_limit_key="position-fetched")
+    socket_subscriptions.emit(
         SocketEvent.POSITION,
-        to_socket_message_position(e.position)
+        lambda: to_socket_message_position(e.position)
     )
 
 
 async def on_open_order_fetched(e: OnOpenOrderFetchedEvent):
     print_log(f"[TWS] Fetched open orders ({e})")
-    await fast_api_socket.emit(
+    socket_subscriptions.emit(
         SocketEvent.OPEN_ORDER,
-        to_socket_message_open_order(e.open_order)
+        lambda: to_socket_message_open_order(e.open_order)
     )
 
 
 async def on_executions_fetched(e: OnExecutionFetchedEvent):
     print_log(f"[TWS] Fetched executions ({e})")
-    await fast_api_socket.emit(
+    socket_subscriptions.emit(
         SocketEvent.EXECUTION,
-        to_socket_message_execution(e.executions)
+        lambda: to_socket_message_execution(e.executions)
     )
 
 
@@ -59,19 +62,19 @@ async def on_order_filled(e: OnOrderFilledEvent):
 
     line_notify.send_order_filled_message(e)
 
-    await fast_api_socket.emit(
+    socket_subscriptions.emit(
         SocketEvent.ORDER_FILLED,
-        to_socket_message_order_filled(e)
+        lambda: to_socket_message_order_filled(e)
     )
 
 
 async def on_error(e: OnErrorEvent):
-    await fast_api_socket.emit(SocketEvent.ERROR, to_socket_message_error(e))
+    socket_subscriptions.emit(SocketEvent.ERROR, lambda: to_socket_message_error(e))
 
 
-def register_handlers(app: IBapiServer, px_data_req_ids: list[int]):
+def register_handlers(app: IBapiServer, get_px_data_req_ids: GetPxDataReqIds):
     app.set_on_position_fetched(on_position_fetched)
     app.set_on_open_order_fetched(on_open_order_fetched)
     app.set_on_order_filled(on_order_filled)
-    app.set_on_executions_fetched(on_executions_fetched, get_execution_on_fetched_params(app, px_data_req_ids))
+    app.set_on_executions_fetched(on_executions_fetched, get_execution_on_fetched_params(app, get_px_data_req_ids))
     app.set_on_error(on_error)
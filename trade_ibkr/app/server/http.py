@@ -0,0 +1,142 @@
+import asyncio
+
+from fastapi import HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from trade_ibkr.config import ConfigError, get_config
+from trade_ibkr.enums import LogLevel
+from trade_ibkr.perf import (
+    CallbackProfilerData, METRICS_CONTENT_TYPE, OrderLatencyData, callback_profiler, metric_event_loop_lag,
+    metrics_registry, monitor_event_loop_lag, order_latency_tracer,
+)
+from trade_ibkr.utils import from_socket_message_px_data_series, get_log_level, print_warning, set_log_level
+from .config_reload import ConfigReloadResult, ServerConfigReloader
+from .const import fast_api
+from .emitter import SocketClientQueueData, socket_emitter
+from .px_data import (
+    PxDataSeriesData, PxDataSeriesHistoryData, PxDataSeriesManager, PxDataSeriesMemoryData, PxDataSeriesQuoteData,
+)
+
+
+def _start_event_loop_lag_monitor():
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        print_warning("[Metrics] Event loop lag is not monitored as no event loop is running", force=True)
+        return
+
+    loop.create_task(monitor_event_loop_lag(metric_event_loop_lag))
+
+
+def _start_config_watch(config_reloader: ServerConfigReloader):
+    if not (reload_config := get_config().system.config_reload).watch:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        print_warning("[Config] Config file is not watched as no event loop is running", force=True)
+        return
+
+    loop.create_task(config_reloader.watch(reload_config.interval_sec))
+
+
+def register_http_endpoints(config_reloader: ServerConfigReloader, px_data_series: PxDataSeriesManager):
+    _start_event_loop_lag_monitor()
+    _start_config_watch(config_reloader)
+
+    @fast_api.get("/latency/order")
+    async def get_order_latency(last_n_orders: int = 50) -> OrderLatencyData:
+        return order_latency_tracer.snapshot(last_n_orders=last_n_orders)
+
+    @fast_api.post("/latency/order/dump")
+    async def dump_order_latency() -> dict[str, str]:
+        return {"path": order_latency_tracer.dump_to_file()}
+
+    @fast_api.post("/latency/order/reset")
+    async def reset_order_latency() -> dict[str, bool]:
+        order_latency_tracer.reset()
+        return {"success": True}
+
+    @fast_api.get("/profile/callbacks")
+    async def get_callback_profile(top_n: int | None = None) -> CallbackProfilerData:
+        return callback_profiler.snapshot(top_n=top_n)
+
+    @fast_api.post("/profile/callbacks/reset")
+    async def reset_callback_profile() -> dict[str, bool]:
+        callback_profiler.reset()
+        return {"success": True}
+
+    @fast_api.get("/socket/clients")
+    async def get_socket_clients() -> list[SocketClientQueueData]:
+        return socket_emitter.get_queue_data()
+
+    @fast_api.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics() -> PlainTextResponse:
+        return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+    @fast_api.post("/config/reload")
+    async def reload_config() -> ConfigReloadResult:
+        try:
+            return await config_reloader.reload()
+        except ConfigError as ex:
+            raise HTTPException(status_code=422, detail=str(ex)) from ex
+
+    @fast_api.get("/px-data")
+    async def get_px_data_series() -> list[PxDataSeriesData]:
+        return px_data_series.get_series_data()
+
+    @fast_api.get("/px-data/memory")
+    async def get_px_data_memory() -> list[PxDataSeriesMemoryData]:
+        return px_data_series.get_memory_data()
+
+    @fast_api.get("/px-data/{identifier}/history")
+    async def get_px_data_history(identifier: str) -> PxDataSeriesHistoryData:
+        try:
+            return px_data_series.get_history_data(identifier)
+        except KeyError as ex:
+            raise HTTPException(status_code=404, detail=ex.args[0]) from ex
+
+    @fast_api.get("/px-data/{identifier}/quote")
+    async def get_px_data_quote(identifier: str) -> PxDataSeriesQuoteData:
+        try:
+            quote = px_data_series.get_quote_data(identifier)
+        except KeyError as ex:
+            raise HTTPException(status_code=404, detail=ex.args[0]) from ex
+
+        if not quote:
+            raise HTTPException(status_code=503, detail=f"Px data of {identifier} not ready")
+
+        return quote
+
+    @fast_api.post("/px-data")
+    async def add_px_data_series(request: Request) -> dict[str, str]:
+        try:
+            identifier = await px_data_series.add_on_request(
+                from_socket_message_px_data_series((await request.body()).decode())
+            )
+        except KeyError as ex:
+            raise HTTPException(status_code=422, detail=f"`{ex.args[0]}` is required") from ex
+        except ValueError as ex:
+            raise HTTPException(status_code=422, detail=str(ex)) from ex
+
+        if not identifier:
+            raise HTTPException(status_code=504, detail="Px data not ready in time")
+
+        return {"identifier": identifier}
+
+    @fast_api.delete("/px-data/{identifier}")
+    async def remove_px_data_series(identifier: str) -> dict[str, bool]:
+        try:
+            return {"canceled": await px_data_series.remove_on_request(identifier)}
+        except KeyError as ex:
+            raise HTTPException(status_code=404, detail=ex.args[0]) from ex
+
+    @fast_api.get("/log/level")
+    async def get_current_log_level() -> dict[str, str]:
+        return {"level": get_log_level().name.lower()}
+
+    @fast_api.post("/log/level/{level}")
+    async def set_current_log_level(level: str) -> dict[str, str]:
+        set_log_level(LogLevel.from_name(level))
+        return {"level": get_log_level().name.lower()}
@@ -1,59 +1,45 @@
 import time
+from typing import Type
 
-from trade_ibkr.const import IS_DEMO, SERVER_CLIENT_ID_DEMO, SERVER_CLIENT_ID_LIVE, SERVER_CONTRACTS
+from trade_ibkr.capture import get_capture_file_path
+from trade_ibkr.config import get_config, print_config
 from trade_ibkr.obj import IBapiServer
-from trade_ibkr.utils import ContractParams, TYPE_TO_CONTRACT_FUNCTION, print_log, print_warning
-from .handler import on_market_data_received, on_px_updated, register_handlers
+from trade_ibkr.utils import print_log
+from .config_reload import ServerConfigReloader
+from .handler import register_handlers
+from .http import register_http_endpoints
+from .px_data import PX_DATA_OWNER_CONFIG, PxDataSeriesManager, get_px_data_series_configs
 from .socket import register_socket_endpoints
 from .utils import show_warnings_as_needed
 
 
 def run_ib_server(
         *,
-        is_demo: bool | None = None, client_id: int | None = None
+        is_demo: bool | None = None, client_id: int | None = None, app_cls: Type[IBapiServer] = IBapiServer,
 ) -> IBapiServer:
-    is_demo = IS_DEMO if is_demo is None else is_demo
+    print_config()
 
-    app = IBapiServer()
+    config = get_config()
+    is_demo = config.system.demo if is_demo is None else is_demo
+
+    app = app_cls()
+    if capture_directory := config.system.capture_directory:
+        app.start_capture(get_capture_file_path(capture_directory, "server"))
     app.activate(
         8384 if is_demo else 8383,  # Configured at TWS
-        client_id or (SERVER_CLIENT_ID_LIVE if is_demo else SERVER_CLIENT_ID_DEMO)
+        client_id or (config.server.client_id.live if is_demo else config.server.client_id.demo)
     )
 
-    px_data_req_ids: list[int] = []
-
-    for contract in SERVER_CONTRACTS:
-        for contract_data in contract["data"]:
-            contract_params = ContractParams(
-                symbol=contract["symbol"],
-                exchange=contract["exchange"],
-                type_=contract["type"],
-            )
-
-            if not contract_data.get("enable", True):
-                print_warning(f"Skipping contract creation of {contract_params} as it is not enabled")
-
-            contract_maker = TYPE_TO_CONTRACT_FUNCTION.get(contract_params.type_)
-
-            if not contract_maker:
-                raise ValueError(f"Contract {contract_params} do not have corresponding maker function")
-
-            px_data_req_ids.append(app.get_px_data_keep_update(
-                contract=contract_maker(contract_params),
-                duration=contract_data["duration"],
-                bar_size=contract_data["bar-size"],
-                period_sec=contract_data["period-secs"],
-                is_major=contract_data.get("is-major", False),
-                on_px_data_updated=on_px_updated,
-                on_market_data_received=on_market_data_received,
-            ))
+    px_data_series = PxDataSeriesManager(app)
+    px_data_series.request_nowait(get_px_data_series_configs(config.server.contract), PX_DATA_OWNER_CONFIG)
 
     while not app.is_all_px_data_ready():
         time.sleep(0.25)
         print_log("[System] Waiting for the initial data to ready")
 
-    register_socket_endpoints(app, px_data_req_ids)
-    register_handlers(app, px_data_req_ids)
+    register_socket_endpoints(app, px_data_series)
+    register_http_endpoints(ServerConfigReloader(app, px_data_series), px_data_series)
+    register_handlers(app, px_data_series.get_px_data_req_ids)
     show_warnings_as_needed(is_demo=is_demo)
 
     return app
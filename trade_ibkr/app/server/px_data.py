@@ -0,0 +1,477 @@
+import asyncio
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TypedDict
+
+from trade_ibkr.calc import VwapValue
+from trade_ibkr.config import ServerContractConfig, ServerContractDataConfig
+from trade_ibkr.model import PxDataHistory, PxDataMemoryUsage
+from trade_ibkr.obj import IBapiServer
+from trade_ibkr.utils import (
+    ContractParams, PxDataSeriesSocketMessagePack, TYPE_TO_CONTRACT_FUNCTION, print_log, print_warning,
+    release_socket_message_px_data,
+)
+from .handler import on_market_data_received, on_px_updated
+from .subscription import socket_subscriptions
+
+# Owner of the Px data series listed in the config
+PX_DATA_OWNER_CONFIG = "config"
+# Owner of the Px data series added on request at runtime
+PX_DATA_OWNER_API = "api"
+# Owner of the base Px data series of the resampled ones
+PX_DATA_OWNER_RESAMPLE = "resample"
+
+# Standard deviations from the VWAP of each VWAP band in the quote
+VWAP_BAND_STDEV_MULTIPLIERS = (1., 2.)
+
+
+@dataclass(frozen=True, kw_only=True)
+class PxDataSeriesKey:
+    """
+    Px data series of a contract and a period, which is the unique identifier of the Px data.
+
+    How the bars are requested is not compared, so all requests of the same contract and period share a series.
+    """
+    symbol: str
+    exchange: str
+    type_: str
+    period_sec: int
+    duration: str = field(compare=False)
+    bar_size: str = field(compare=False)
+    # Resampled from the base series of the contract instead of requested
+    is_resampled: bool = field(default=False, compare=False)
+
+    @property
+    def request(self) -> tuple[str, str, bool]:
+        """How the bars of the series are requested."""
+        return self.duration, self.bar_size, self.is_resampled
+
+    def __str__(self) -> str:
+        if self.is_resampled:
+            return f"{self.symbol}@{self.period_sec} (resampled)"
+
+        return f"{self.symbol}@{self.period_sec} ({self.duration} / {self.bar_size})"
+
+
+PxDataSeriesConfig = tuple[ServerContractConfig, ServerContractDataConfig]
+
+
+class PxDataSeriesData(TypedDict):
+    # Unique identifier of the Px data, `None` if not ready
+    identifier: str | None
+    symbol: str
+    exchange: str
+    type: str
+    duration: str
+    barSize: str
+    periodSec: int
+    isResampled: bool
+    # Count of the references of each owner
+    owners: dict[str, int]
+
+
+class PxDataSeriesMemoryData(PxDataMemoryUsage):
+    # Unique identifier of the Px data, `None` if not ready
+    identifier: str | None
+    symbol: str
+    periodSec: int
+
+
+class PxDataSeriesHistoryData(PxDataHistory):
+    identifier: str
+
+
+class PxDataSeriesVwapBand(TypedDict):
+    stdevMultiplier: float
+    lower: float
+    upper: float
+
+
+class PxDataSeriesQuoteData(TypedDict):
+    identifier: str
+    periodSec: int
+    close: float
+    # `None` until the bars of the diff SMA window are received
+    diffSma: float | None
+    # `None` if VWAP is not calculated for the period, or no volume traded in the current session yet
+    vwap: float | None
+    vwapStdev: float | None
+    vwapBands: list[PxDataSeriesVwapBand]
+
+
+def _nan_to_none(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+def _to_vwap_band(vwap: VwapValue, stdev_multiplier: float) -> PxDataSeriesVwapBand:
+    lower, upper = vwap.get_band(stdev_multiplier)
+
+    return {"stdevMultiplier": stdev_multiplier, "lower": lower, "upper": upper}
+
+
+def _get_px_data_series_key(contract: ServerContractConfig, contract_data: ServerContractDataConfig) -> PxDataSeriesKey:
+    is_resampled = contract.resample and contract_data is not contract.base_data
+
+    return PxDataSeriesKey(
+        symbol=contract.symbol,
+        exchange=contract.exchange,
+        type_=contract.type,
+        # Resampled series are the same regardless of these
+        duration="" if is_resampled else contract_data.duration,
+        bar_size="" if is_resampled else contract_data.bar_size,
+        period_sec=contract_data.period_secs,
+        is_resampled=is_resampled,
+    )
+
+
+def get_px_data_series_configs(contracts: list[ServerContractConfig]) -> dict[PxDataSeriesKey, PxDataSeriesConfig]:
+    series_configs: dict[PxDataSeriesKey, PxDataSeriesConfig] = {}
+
+    for contract in contracts:
+        if not contract.enable:
+            print_warning(f"Skipping contract creation of {contract.symbol} as it is not enabled")
+            continue
+
+        for contract_data in contract.data:
+            series_configs[_get_px_data_series_key(contract, contract_data)] = (contract, contract_data)
+
+    return series_configs
+
+
+def get_px_data_base_series(series_config: PxDataSeriesConfig) -> tuple[PxDataSeriesKey, PxDataSeriesConfig]:
+    """Get the series to resample the series of ``series_config`` from."""
+    contract, _ = series_config
+
+    return _get_px_data_series_key(contract, contract.base_data), (contract, contract.base_data)
+
+
+def request_px_data_series(
+        app: IBapiServer, contract: ServerContractConfig, contract_data: ServerContractDataConfig,
+) -> int:
+    contract_params = ContractParams(
+        symbol=contract.symbol,
+        exchange=contract.exchange,
+        type_=contract.type,
+    )
+
+    contract_maker = TYPE_TO_CONTRACT_FUNCTION.get(contract_params.type_)
+
+    if not contract_maker:
+        raise ValueError(f"Contract {contract_params} do not have corresponding maker function")
+
+    return app.get_px_data_keep_update(
+        contract=contract_maker(contract_params),
+        duration=contract_data.duration,
+        bar_size=contract_data.bar_size,
+        period_sec=contract_data.period_secs,
+        is_major=contract_data.is_major,
+        on_px_data_updated=on_px_updated,
+        on_market_data_received=on_market_data_received,
+    )
+
+
+class PxDataSeriesManager:
+    """
+    Px data series of the server, each kept until all of its references are released.
+
+    A series is referenced once by the config if listed in it, and once for each runtime request adding it.
+    A resampled series also references its base series, so the base series is kept until all of them are released.
+    The market data of a contract is shared by its series, and canceled with the last of them.
+
+    Except :meth:`request_nowait`, must be called from the event loop of the socket server.
+    """
+
+    def __init__(self, app: IBapiServer, *, ready_timeout_sec: float = 60):
+        self._app = app
+        self._ready_timeout_sec = ready_timeout_sec
+
+        # Request IDs of the series, read from the IB thread, so replaced instead of updated in place
+        self._px_data_req_ids: tuple[int, ...] = ()
+
+        self._req_ids: dict[PxDataSeriesKey, int] = {}
+        self._refs: dict[PxDataSeriesKey, Counter[str]] = {}
+        self._identifiers: dict[PxDataSeriesKey, str] = {}
+        # Resampled series to its base series
+        self._base_keys: dict[PxDataSeriesKey, PxDataSeriesKey] = {}
+
+        self._lock = asyncio.Lock()
+
+    def get_px_data_req_ids(self) -> tuple[int, ...]:
+        """Thread-safe. The series could be canceled after this returns, so the Px data could be gone."""
+        return self._px_data_req_ids
+
+    @property
+    def req_ids(self) -> dict[PxDataSeriesKey, int]:
+        return dict(self._req_ids)
+
+    def get_keys(self, owner: str) -> list[PxDataSeriesKey]:
+        return [key for key, refs in self._refs.items() if refs[owner]]
+
+    def get_identifier(self, key: PxDataSeriesKey) -> str | None:
+        if identifier := self._identifiers.get(key):
+            return identifier
+
+        if (req_id := self._req_ids.get(key)) is None or not self._app.is_px_data_ready(req_id):
+            return None
+
+        identifier = self._identifiers[key] = self._app.get_px_data_from_cache(req_id).unique_identifier
+
+        return identifier
+
+    def get_key(self, key: PxDataSeriesKey) -> PxDataSeriesKey | None:
+        """Get the key of the series requested, which could be requested differently from ``key``."""
+        return next((key_requested for key_requested in self._req_ids if key_requested == key), None)
+
+    def get_key_of_identifier(self, identifier: str) -> PxDataSeriesKey | None:
+        return next((key for key in self._req_ids if self.get_identifier(key) == identifier), None)
+
+    def get_series_data(self) -> list[PxDataSeriesData]:
+        return [
+            {
+                "identifier": self.get_identifier(key),
+                "symbol": key.symbol,
+                "exchange": key.exchange,
+                "type": key.type_,
+                "duration": key.duration,
+                "barSize": key.bar_size,
+                "periodSec": key.period_sec,
+                "isResampled": key.is_resampled,
+                "owners": dict(+self._refs[key]),
+            }
+            for key in self._req_ids
+        ]
+
+    def _add_ref(self, key: PxDataSeriesKey, series_config: PxDataSeriesConfig, owner: str):
+        if key not in self._req_ids:
+            if key.is_resampled:
+                base_key, base_series_config = get_px_data_base_series(series_config)
+                self._add_ref(base_key, base_series_config, PX_DATA_OWNER_RESAMPLE)
+                self._base_keys[key] = base_key
+
+                req_id = self._app.get_px_data_resampled(
+                    base_req_id=self._req_ids[base_key],
+                    period_sec=key.period_sec,
+                    is_major=series_config[1].is_major,
+                    on_px_data_updated=on_px_updated,
+                )
+            else:
+                req_id = request_px_data_series(self._app, *series_config)
+
+            self._req_ids[key] = req_id
+            self._refs[key] = Counter()
+            self._px_data_req_ids = (*self._px_data_req_ids, req_id)
+        elif (key_requested := self.get_key(key)).request != key.request:
+            print_warning(f"[Px] Sharing the Px data series {key_requested} of the same contract for {key}", force=True)
+
+        self._refs[key][owner] += 1
+
+    def _remove_ref(self, key: PxDataSeriesKey, owner: str) -> bool:
+        refs = self._refs[key]
+        refs[owner] -= 1
+
+        if +refs:
+            return False
+
+        identifier = self.get_identifier(key)
+
+        req_id = self._req_ids.pop(key)
+        del self._refs[key]
+        self._identifiers.pop(key, None)
+
+        if identifier:
+            socket_subscriptions.unregister_px_data(identifier)
+            release_socket_message_px_data(identifier)
+
+        # Removed first so the handlers reading the request IDs afterward skip it
+        self._px_data_req_ids = tuple(req_id_kept for req_id_kept in self._px_data_req_ids if req_id_kept != req_id)
+        self._app.cancel_px_data_keep_update(req_id)
+
+        if base_key := self._base_keys.pop(key, None):
+            self._remove_ref(base_key, PX_DATA_OWNER_RESAMPLE)
+
+        return True
+
+    def get_memory_data(self) -> list[PxDataSeriesMemoryData]:
+        return [
+            {
+                "identifier": self.get_identifier(key),
+                "symbol": key.symbol,
+                "periodSec": key.period_sec,
+                **self._app.get_px_data_memory_usage(req_id),
+            }
+            for key, req_id in self._req_ids.items()
+        ]
+
+    def get_history_data(self, identifier: str) -> PxDataSeriesHistoryData:
+        """:raises KeyError: if the Px data of ``identifier`` is not found"""
+        if not (key := self.get_key_of_identifier(identifier)):
+            raise KeyError(f"Px data of {identifier} not found")
+
+        return {"identifier": identifier, **self._app.get_px_data_history(self._req_ids[key])}
+
+    def get_quote_data(self, identifier: str) -> PxDataSeriesQuoteData | None:
+        """
+        Returns ``None`` if the Px data of ``identifier`` is not ready.
+
+        :raises KeyError: if the Px data of ``identifier`` is not found
+        """
+        if not (key := self.get_key_of_identifier(identifier)):
+            raise KeyError(f"Px data of {identifier} not found")
+
+        if not (px_quote := self._app.get_px_quote_from_cache(self._req_ids[key])):
+            return None
+
+        vwap = px_quote.current_vwap
+        has_vwap = vwap is not None and not math.isnan(vwap.vwap)
+
+        return {
+            "identifier": identifier,
+            "periodSec": px_quote.period_sec,
+            "close": px_quote.current_close,
+            "diffSma": _nan_to_none(px_quote.current_diff_sma),
+            "vwap": vwap.vwap if has_vwap else None,
+            "vwapStdev": vwap.stdev if has_vwap else None,
+            "vwapBands": [
+                _to_vwap_band(vwap, multiplier) for multiplier in VWAP_BAND_STDEV_MULTIPLIERS
+            ] if has_vwap else [],
+        }
+
+    def request_nowait(self, series_configs: dict[PxDataSeriesKey, PxDataSeriesConfig], owner: str):
+        """Request the series in ``series_configs`` without waiting them to be ready, such as on startup."""
+        for key, series_config in series_configs.items():
+            self._add_ref(key, series_config, owner)
+
+    async def acquire(
+            self, series_configs: dict[PxDataSeriesKey, PxDataSeriesConfig], owner: str,
+    ) -> dict[PxDataSeriesKey, int | None]:
+        """
+        Add a reference of ``owner`` to each series in ``series_configs``, requesting the ones not requested yet.
+
+        Returns the request ID of each series, ``None`` if the series is not ready in time,
+        in which case the reference is removed, canceling the series if it is the last one.
+
+        The lock is not held while waiting for the series to be ready, so other calls are not blocked meanwhile.
+        """
+        async with self._lock:
+            req_ids_before = set(self._req_ids)
+
+            for key, series_config in series_configs.items():
+                self._add_ref(key, series_config, owner)
+
+            # Including the base series added for the resampled series
+            added_keys = [key for key in self._req_ids if key not in req_ids_before]
+            # Also waits for the series added by the other calls but not ready yet
+            wait_req_ids = [self._req_ids[key] for key in {*added_keys, *series_configs}]
+
+        deadline = time.monotonic() + self._ready_timeout_sec
+
+        # Series canceled while waiting are not waited for
+        while (
+                any(
+                    req_id in self._px_data_req_ids and not self._app.is_px_data_ready(req_id)
+                    for req_id in wait_req_ids
+                )
+                and time.monotonic() < deadline
+        ):
+            await asyncio.sleep(0.25)
+
+        async with self._lock:
+            ret: dict[PxDataSeriesKey, int | None] = {}
+
+            # Resampled series go first, so the base series are canceled with the last reference
+            for key in sorted(series_configs, key=lambda key_sort: not key_sort.is_resampled):
+                if (req_id := self._req_ids.get(key)) is None or not self._refs[key][owner]:
+                    # Released while waiting
+                    ret[key] = None
+                    continue
+
+                if self._app.is_px_data_ready(req_id):
+                    ret[key] = req_id
+                    continue
+
+                print_warning(f"[Px] Canceled Px data of {key} as it is not ready in time", force=True)
+
+                self._remove_ref(key, owner)
+                ret[key] = None
+
+            ready_req_ids = [
+                req_id for key in added_keys
+                if (req_id := self._req_ids.get(key)) is not None and self._app.is_px_data_ready(req_id)
+            ]
+            socket_subscriptions.register_px_data(self._app, ready_req_ids)
+
+        # Sent again, as the subscribed clients are only added after the Px data is ready
+        await asyncio.to_thread(self._refresh_px_data, ready_req_ids)
+
+        if added_keys:
+            print_log(f"[Px] Added {len(added_keys)} Px data series of {owner}")
+
+        # In the order of `series_configs`
+        return {key: ret[key] for key in series_configs}
+
+    async def release(self, key: PxDataSeriesKey, owner: str) -> bool:
+        """
+        Remove a reference of ``owner`` to the series of ``key``, canceling it if no reference is left.
+
+        Returns if the series is canceled.
+
+        :raises KeyError: if ``owner`` has no reference to the series
+        """
+        async with self._lock:
+            if not (refs := self._refs.get(key)) or not refs[owner]:
+                raise KeyError(f"{key} is not referenced by {owner}")
+
+            if not self._remove_ref(key, owner):
+                return False
+
+            print_log(f"[Px] Removed Px data series {key} of {owner}")
+
+            return True
+
+    async def add_on_request(self, message: PxDataSeriesSocketMessagePack) -> str | None:
+        """
+        Add the series of ``message`` requested at runtime.
+
+        Returns the unique identifier of the Px data, ``None`` if it is not ready in time.
+
+        :raises ValueError: if the contract type is unknown
+        """
+        if message.type_ not in TYPE_TO_CONTRACT_FUNCTION:
+            raise ValueError(f"Unknown contract type `{message.type_}`")
+
+        contract_data = ServerContractDataConfig(
+            duration=message.duration,
+            bar_size=message.bar_size,
+            period_secs=message.period_sec,
+            is_major=message.is_major,
+        )
+        contract = ServerContractConfig(
+            symbol=message.symbol,
+            exchange=message.exchange,
+            type=message.type_,
+            data=[contract_data],
+        )
+        series_configs = get_px_data_series_configs([contract])
+
+        req_ids = await self.acquire(series_configs, PX_DATA_OWNER_API)
+
+        return next((self.get_identifier(key) for key, req_id in req_ids.items() if req_id is not None), None)
+
+    async def remove_on_request(self, identifier: str) -> bool:
+        """
+        Remove the series of ``identifier`` added at runtime.
+
+        Returns if the series is canceled, which is not if the config or other requests still use it.
+
+        :raises KeyError: if the series is not added at runtime
+        """
+        if not (key := self.get_key_of_identifier(identifier)):
+            raise KeyError(f"Px data of {identifier} not found")
+
+        return await self.release(key, PX_DATA_OWNER_API)
+
+    def _refresh_px_data(self, req_ids: list[int]):
+        for req_id in req_ids:
+            self._app.refresh_px_data(req_id)
@@ -1,30 +1,135 @@
-from trade_ibkr.const import fast_api_socket
 from trade_ibkr.enums import SocketEvent
 from trade_ibkr.obj import IBapiServer
+from trade_ibkr.perf import order_latency_tracer
 from trade_ibkr.utils import (
-    from_socket_message_order, print_log,
-    print_socket_event, to_socket_message_init_data, to_socket_message_px_data_list,
+    from_socket_message_order, from_socket_message_px_data_series, from_socket_message_subscription, print_log,
+    print_socket_event, print_warning, to_socket_message_error, to_socket_message_init_data,
+    to_socket_message_order_latency, to_socket_message_px_data_list, to_socket_message_px_data_series,
+    to_socket_message_subscription,
 )
-from .utils import get_px_data_by_contract_identifier
+from .const import fast_api_socket
+from .emitter import SocketThrottle, socket_emitter
+from .px_data import PxDataSeriesManager
+from .subscription import socket_subscriptions
+from .utils import get_px_quote_by_contract_identifier
 
 
-def register_socket_endpoints(app: IBapiServer, px_data_req_ids: list[int]):
+def register_socket_endpoints(app: IBapiServer, px_data_series: PxDataSeriesManager):
+    socket_subscriptions.register_px_data(app, px_data_series.get_px_data_req_ids())
+
+    @fast_api_socket.on("connect")
+    async def on_connect(sid: str, *_):
+        socket_emitter.add_client(sid)
+        # Subscribe everything until the client sends its subscription
+        socket_subscriptions.subscribe(sid)
+
+    @fast_api_socket.on("disconnect")
+    async def on_disconnect(sid: str, *_):
+        socket_subscriptions.remove(sid)
+        socket_emitter.remove_client(sid)
+
+    @fast_api_socket.on(SocketEvent.SUBSCRIBE)
+    async def on_request_subscribe(sid: str, subscription_content: str):
+        print_socket_event(SocketEvent.SUBSCRIBE)
+
+        message = from_socket_message_subscription(subscription_content)
+        subscription = socket_subscriptions.subscribe(
+            sid,
+            events=message.events,
+            identifiers=message.identifiers,
+            market_throttle=SocketThrottle(
+                interval_sec=message.market_interval_sec or 0,
+                urgent_only=message.market_hl_break_only,
+            ),
+        )
+
+        await fast_api_socket.emit(
+            SocketEvent.SUBSCRIBE,
+            to_socket_message_subscription(
+                subscription.events,
+                subscription.identifiers,
+                market_interval_sec=subscription.market_throttle.interval_sec or None,
+                market_hl_break_only=subscription.market_throttle.urgent_only,
+            ),
+            to=sid,
+        )
+
     @fast_api_socket.on(SocketEvent.INIT)
-    async def on_request_init_data(*_):
+    async def on_request_init_data(sid: str, *_):
         print_socket_event(SocketEvent.INIT)
 
         await fast_api_socket.emit(
             SocketEvent.INIT,
-            to_socket_message_init_data()
+            to_socket_message_init_data(),
+            to=sid,
         )
 
     @fast_api_socket.on(SocketEvent.PX_INIT)
-    async def on_request_px_data_init(*_):
+    async def on_request_px_data_init(sid: str, *_):
         print_socket_event(SocketEvent.PX_INIT)
 
         await fast_api_socket.emit(
             SocketEvent.PX_INIT,
-            to_socket_message_px_data_list(app.get_px_data_from_cache(req_id) for req_id in px_data_req_ids)
+            to_socket_message_px_data_list(
+                app.get_px_data_from_cache(req_id) for req_id in socket_subscriptions.get_px_req_ids(sid)
+            ),
+            to=sid,
+        )
+
+    @fast_api_socket.on(SocketEvent.PX_SUBSCRIBE)
+    async def on_request_px_subscribe(sid: str, series_content: str):
+        message = from_socket_message_px_data_series(series_content)
+
+        print_socket_event(SocketEvent.PX_SUBSCRIBE, f"({message.symbol} @ {message.period_sec})")
+
+        try:
+            identifier = await px_data_series.add_on_request(message)
+        except ValueError as ex:
+            await fast_api_socket.emit(
+                SocketEvent.PX_SUBSCRIBE,
+                to_socket_message_px_data_series(
+                    SocketEvent.PX_SUBSCRIBE, identifier=None, success=False, message=str(ex),
+                ),
+                to=sid,
+            )
+            return
+
+        if identifier:
+            # The requesting client receives the Px data even if only subscribed to some others
+            socket_subscriptions.add_px_data(sid, identifier)
+
+        await fast_api_socket.emit(
+            SocketEvent.PX_SUBSCRIBE,
+            to_socket_message_px_data_series(
+                SocketEvent.PX_SUBSCRIBE, identifier=identifier, success=identifier is not None,
+                message=None if identifier else "Px data not ready in time",
+            ),
+            to=sid,
+        )
+
+    @fast_api_socket.on(SocketEvent.PX_UNSUBSCRIBE)
+    async def on_request_px_unsubscribe(sid: str, identifier: str):
+        print_socket_event(SocketEvent.PX_UNSUBSCRIBE, f"({identifier})")
+
+        try:
+            is_canceled = await px_data_series.remove_on_request(identifier)
+        except KeyError as ex:
+            await fast_api_socket.emit(
+                SocketEvent.PX_UNSUBSCRIBE,
+                to_socket_message_px_data_series(
+                    SocketEvent.PX_UNSUBSCRIBE, identifier=identifier, success=False, message=ex.args[0],
+                ),
+                to=sid,
+            )
+            return
+
+        await fast_api_socket.emit(
+            SocketEvent.PX_UNSUBSCRIBE,
+            to_socket_message_px_data_series(
+                SocketEvent.PX_UNSUBSCRIBE, identifier=identifier, success=True,
+                message=None if is_canceled else "Px data kept as it is still in use",
+            ),
+            to=sid,
         )
 
     @fast_api_socket.on(SocketEvent.POSITION)
@@ -43,14 +148,29 @@ def register_socket_endpoints(app: IBapiServer, px_data_req_ids: list[int]):
         app.request_all_executions()
 
     @fast_api_socket.on(SocketEvent.PLACE_ORDER)
-    async def on_request_place_order(_, order_content: str):
+    async def on_request_place_order(sid: str, order_content: str):
         message = from_socket_message_order(order_content)
 
-        px_data = get_px_data_by_contract_identifier(
-            app, px_data_req_ids,
+        px_quote = get_px_quote_by_contract_identifier(
+            app, px_data_series.get_px_data_req_ids(),
             message.contract_identifier, message.period_sec
         )
-        contract = px_data.contract.contract
+
+        if not px_quote:
+            # Unknown, removed or not ready yet
+            error = (
+                f"Order not placed as the Px data of {message.contract_identifier}@{message.period_sec} "
+                f"is not available"
+            )
+            print_warning(f"[Order] {error}", force=True)
+            await fast_api_socket.emit(
+                SocketEvent.ERROR,
+                to_socket_message_error(error),
+                to=sid,
+            )
+            return
+
+        contract = px_quote.contract.contract
 
         print_socket_event(
             SocketEvent.PLACE_ORDER,
@@ -61,10 +181,10 @@ def register_socket_endpoints(app: IBapiServer, px_data_req_ids: list[int]):
             side=message.side,
             quantity=message.quantity,
             order_px=message.px,
-            current_px=px_data.current_close,
-            diff_sma=px_data.current_diff_sma,
+            current_px=px_quote.current_close,
+            diff_sma=px_quote.current_diff_sma,
             order_id=message.order_id,
-            min_tick=px_data.contract.minTick,
+            min_tick=px_quote.min_tick,
             force_bracket=message.force_bracket,
         )
 
@@ -72,3 +192,13 @@ def register_socket_endpoints(app: IBapiServer, px_data_req_ids: list[int]):
     async def on_request_cancel_order(_, order_id: str):
         print_socket_event(SocketEvent.CANCEL_ORDER)
         app.cancel_order(int(order_id))
+
+    @fast_api_socket.on(SocketEvent.LATENCY_ORDER)
+    async def on_request_order_latency(sid: str, *_):
+        print_socket_event(SocketEvent.LATENCY_ORDER)
+
+        await fast_api_socket.emit(
+            SocketEvent.LATENCY_ORDER,
+            to_socket_message_order_latency(order_latency_tracer.snapshot()),
+            to=sid,
+        )
@@ -0,0 +1,221 @@
+from dataclasses import dataclass, field, replace
+from typing import Callable, Iterable
+
+from trade_ibkr.enums import SocketEvent
+from trade_ibkr.obj import IBapiServer
+from trade_ibkr.perf import metric_socket_encode, metric_socket_payload
+from trade_ibkr.utils import print_log, print_warning
+from .emitter import SocketThrottle, socket_emitter
+
+# Events broadcast to the subscribed clients, other events are only sent to the requesting client
+SUBSCRIBABLE_EVENTS: list[str] = [
+    SocketEvent.PX_UPDATED,
+    SocketEvent.PX_UPDATED_MARKET,
+    SocketEvent.POSITION,
+    SocketEvent.OPEN_ORDER,
+    SocketEvent.ORDER_FILLED,
+    SocketEvent.EXECUTION,
+    SocketEvent.ERROR,
+]
+
+
+def get_socket_room(event: str, key: str | int | None = None) -> str:
+    """
+    Room of the clients subscribed to ``event``.
+
+    ``key`` is the unique identifier of the Px data for ``PX_UPDATED``,
+    and the contract identifier for ``PX_UPDATED_MARKET``.
+    """
+    if key is None:
+        return event
+
+    return f"{event}/{key}"
+
+
+@dataclass(kw_only=True)
+class SocketSubscription:
+    events: list[str]
+    # Unique identifiers of the Px data
+    identifiers: list[str]
+    market_throttle: SocketThrottle = field(default_factory=SocketThrottle)
+    # Px data registered later are added if subscribed to all Px data
+    is_all_identifiers: bool = False
+
+    @property
+    def contract_identifiers(self) -> set[int]:
+        return {int(identifier.split("@")[0]) for identifier in self.identifiers}
+
+    def get_rooms(self) -> set[str]:
+        rooms: set[str] = set()
+
+        for event in self.events:
+            if event == SocketEvent.PX_UPDATED:
+                rooms.update(get_socket_room(event, identifier) for identifier in self.identifiers)
+            elif event == SocketEvent.PX_UPDATED_MARKET:
+                rooms.update(get_socket_room(event, contract_id) for contract_id in self.contract_identifiers)
+            else:
+                rooms.add(get_socket_room(event))
+
+        return rooms
+
+
+class SocketSubscriptionManager:
+    """
+    Room of each subscribable event, Px data and contract, so the clients only receive what they need.
+
+    Clients subscribe to everything on connect, so the clients not sending ``SUBSCRIBE`` work as before.
+    Each payload is serialized once and queued to the clients in its room, and skipped if no client is in the room.
+    """
+
+    def __init__(self):
+        # Unique identifier of the Px data to its request ID, in the order of the registration
+        self._req_id_of_identifier: dict[str, int] = {}
+        self._subscriptions: dict[str, SocketSubscription] = {}
+        # Members are replaced instead of updated, as they are read from the thread publishing the messages
+        self._room_members: dict[str, frozenset[str]] = {}
+
+    def register_px_data(self, app: IBapiServer, px_data_req_ids: Iterable[int]):
+        """
+        Make the Px data of ``px_data_req_ids`` subscribable, and add them to the clients subscribed to all Px data.
+
+        Must be called from the event loop of the socket server if any client is connected.
+        """
+        for req_id in px_data_req_ids:
+            identifier = app.get_px_data_from_cache(req_id).unique_identifier
+
+            self._req_id_of_identifier[identifier] = req_id
+
+            for sid, subscription in list(self._subscriptions.items()):
+                if subscription.is_all_identifiers and identifier not in subscription.identifiers:
+                    self._replace_subscription(sid, replace(
+                        subscription,
+                        identifiers=[*subscription.identifiers, identifier],
+                    ))
+
+    def unregister_px_data(self, identifier: str):
+        """
+        Remove the Px data of ``identifier`` from the subscriptions.
+
+        Must be called from the event loop of the socket server if any client is connected.
+        """
+        self._req_id_of_identifier.pop(identifier, None)
+
+        for sid, subscription in list(self._subscriptions.items()):
+            if identifier in subscription.identifiers:
+                self._replace_subscription(sid, replace(
+                    subscription,
+                    identifiers=[identifier_kept for identifier_kept in subscription.identifiers
+                                 if identifier_kept != identifier],
+                ))
+
+    def add_px_data(self, sid: str, identifier: str):
+        """
+        Add the Px data of ``identifier`` to the subscription of the client ``sid``.
+
+        Must be called from the event loop of the socket server.
+        """
+        if not (subscription := self._subscriptions.get(sid)) or identifier in subscription.identifiers:
+            return
+
+        self._replace_subscription(sid, replace(subscription, identifiers=[*subscription.identifiers, identifier]))
+
+    @property
+    def identifiers(self) -> list[str]:
+        return list(self._req_id_of_identifier.keys())
+
+    def subscribe(
+            self, sid: str, *,
+            events: list[str] | None = None, identifiers: list[str] | None = None,
+            market_throttle: SocketThrottle | None = None,
+    ) -> SocketSubscription:
+        """
+        Replace the subscription of the client ``sid``. ``None`` subscribes all events or Px data.
+
+        Must be called from the event loop of the socket server, after the client is added to ``socket_emitter``.
+        """
+        if events is None:
+            events = SUBSCRIBABLE_EVENTS
+        elif unknown_events := set(events).difference(SUBSCRIBABLE_EVENTS):
+            print_warning(f"[Socket] Ignoring unsubscribable events of {sid}: {sorted(unknown_events)}", force=True)
+
+        is_all_identifiers = identifiers is None
+
+        if is_all_identifiers:
+            identifiers = self.identifiers
+        elif unknown_identifiers := set(identifiers).difference(self._req_id_of_identifier):
+            print_warning(f"[Socket] Ignoring unknown Px data of {sid}: {sorted(unknown_identifiers)}", force=True)
+
+        subscription = SocketSubscription(
+            events=[event for event in SUBSCRIBABLE_EVENTS if event in events],
+            identifiers=[identifier for identifier in self.identifiers if identifier in identifiers],
+            market_throttle=market_throttle or SocketThrottle(),
+            is_all_identifiers=is_all_identifiers,
+        )
+
+        self._replace_subscription(sid, subscription)
+        socket_emitter.set_throttle(sid, SocketEvent.PX_UPDATED_MARKET, subscription.market_throttle)
+
+        print_log(
+            f"[Socket] Client {sid} subscribed to {len(subscription.events)} events "
+            f"of {len(subscription.identifiers)} Px data"
+        )
+
+        return subscription
+
+    def _replace_subscription(self, sid: str, subscription: SocketSubscription):
+        rooms_old = self._subscriptions[sid].get_rooms() if sid in self._subscriptions else set()
+        rooms_new = subscription.get_rooms()
+
+        for room in rooms_old - rooms_new:
+            self._leave_room(sid, room)
+
+        for room in rooms_new - rooms_old:
+            self._room_members[room] = self._room_members.get(room, frozenset()) | {sid}
+
+        self._subscriptions[sid] = subscription
+
+    def _leave_room(self, sid: str, room: str):
+        if members := self._room_members.get(room, frozenset()) - {sid}:
+            self._room_members[room] = members
+        else:
+            # Dropped so the rooms of the canceled Px data don't pile up
+            self._room_members.pop(room, None)
+
+    def remove(self, sid: str):
+        if not (subscription := self._subscriptions.pop(sid, None)):
+            return
+
+        for room in subscription.get_rooms():
+            self._leave_room(sid, room)
+
+    def get_px_req_ids(self, sid: str) -> list[int]:
+        if not (subscription := self._subscriptions.get(sid)):
+            return []
+
+        return [self._req_id_of_identifier[identifier] for identifier in subscription.identifiers]
+
+    def has_subscriber(self, room: str) -> bool:
+        return bool(self._room_members.get(room))
+
+    def emit(
+            self, event: str, get_message: Callable[[], str], *,
+            key: str | int | None = None, is_urgent: bool = False,
+    ):
+        """
+        Queue the message from ``get_message()`` to the clients in the room of ``event`` and ``key``.
+
+        Returns right away without waiting for the message to be sent.
+        ``is_urgent`` bypasses the throttle of the clients.
+        """
+        if not (sids := self._room_members.get(get_socket_room(event, key))):
+            return
+
+        with metric_socket_encode.labels(event).time():
+            message = get_message()
+
+        metric_socket_payload.labels(event).observe(len(message))
+
+        socket_emitter.publish(event, message, sids, key=key, is_urgent=is_urgent)
+
+
+socket_subscriptions = SocketSubscriptionManager()
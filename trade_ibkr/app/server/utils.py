@@ -1,44 +1,45 @@
 from datetime import datetime
-from typing import Callable
+from typing import Callable, TypeAlias
 
-from trade_ibkr.const import LINE_ENABLE
-from trade_ibkr.model import OnExecutionFetchedGetParams, OnExecutionFetchedParams, PxData
+from trade_ibkr.config import get_config
+from trade_ibkr.model import OnExecutionFetchedGetParams, OnExecutionFetchedParams, PxQuote
 from trade_ibkr.obj import IBapiServer
-from trade_ibkr.utils import get_detailed_contract_identifier, print_warning
+from trade_ibkr.utils import print_warning
 
 
-def request_earliest_execution_time(app: IBapiServer, px_data_req_ids: list[int]) -> Callable[[], datetime]:
+# Returns the request IDs of the current Px data series, read once on each call as the series could change
+GetPxDataReqIds: TypeAlias = Callable[[], tuple[int, ...]]
+
+
+def request_earliest_execution_time(app: IBapiServer, get_px_data_req_ids: GetPxDataReqIds) -> Callable[[], datetime]:
     def wrapper():
-        return min(app.get_px_data_from_cache(req_id).earliest_time for req_id in px_data_req_ids)
+        return min(px_data.earliest_time for px_data in app.get_px_data_list_from_cache(get_px_data_req_ids()))
 
     return wrapper
 
 
-def get_execution_on_fetched_params(app: IBapiServer, px_data_req_ids: list[int]) -> OnExecutionFetchedGetParams:
+def get_execution_on_fetched_params(
+        app: IBapiServer, get_px_data_req_ids: GetPxDataReqIds,
+) -> OnExecutionFetchedGetParams:
     def wrapper():
-        return OnExecutionFetchedParams(
-            px_data_list=[app.get_px_data_from_cache(req_id) for req_id in px_data_req_ids]
-        )
+        return OnExecutionFetchedParams(px_data_list=app.get_px_data_list_from_cache(get_px_data_req_ids()))
 
     return wrapper
 
 
-def get_px_data_by_contract_identifier(
-        app: IBapiServer, px_data_req_ids: list[int], contract_identifier: int, period_sec: int,
-) -> PxData:
-    px_data = None
-    for req_id in px_data_req_ids:
-        data = app.get_px_data_from_cache(req_id)
+def get_px_quote_by_contract_identifier(
+        app: IBapiServer, px_data_req_ids: tuple[int, ...], contract_identifier: int, period_sec: int,
+) -> PxQuote | None:
+    req_id = app.get_px_req_id_of_series(contract_identifier, period_sec)
 
-        if get_detailed_contract_identifier(data.contract) == contract_identifier and data.period_sec == period_sec:
-            px_data = data
-            break
+    if req_id is None or req_id not in px_data_req_ids:
+        return None
 
-    return px_data
+    return app.get_px_quote_from_cache(req_id)
 
 
 def show_warnings_as_needed(*, is_demo: bool):
-    if not LINE_ENABLE:
+    if not get_config().bot.line.enable:
         print_warning("LINE Px reporting not enabled.", force=True)
 
     if is_demo:
@@ -1,2 +1,6 @@
+from .diff_sma import RollingDiffSma
 from .extrema import *  # noqa
 from .sr import calc_support_resistance_levels
+from .indicator import IncrementalIndicator
+from .resample import BarResampler, merge_bars
+from .vwap import SessionVwap, VwapValue, calc_session_vwap
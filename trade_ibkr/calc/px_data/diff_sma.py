@@ -0,0 +1,56 @@
+import math
+from collections import deque
+from datetime import date
+from typing import TYPE_CHECKING
+
+from trade_ibkr.enums import PxDataCol
+from .indicator import IncrementalIndicator
+
+if TYPE_CHECKING:
+    from trade_ibkr.model import BarDataDict
+
+
+class RollingDiffSma(IncrementalIndicator[float]):
+    """
+    SMA of the absolute difference between the close and the open Px, same as ``PxDataCol.DIFF_SMA``.
+
+    The value is ``NaN`` until ``window`` bars are received.
+    """
+
+    def __init__(self, window: int):
+        super().__init__()
+
+        self._window = window
+        # Differences of the bars before the latest bar, and their sum kept along to read in O(1)
+        self._diffs_committed: deque[float] = deque(maxlen=window - 1)
+        self._diffs_committed_sum: float = 0
+        self._diff_last: float | None = None
+        self._current: float | None = None
+
+    def _update_last(self, bar: "BarDataDict") -> float:
+        self._diff_last = abs(bar[PxDataCol.CLOSE] - bar[PxDataCol.OPEN])
+
+        if len(self._diffs_committed) < self._window - 1:
+            self._current = math.nan
+        else:
+            self._current = (self._diffs_committed_sum + self._diff_last) / self._window
+
+        return self._current
+
+    def _on_new_bar(self, bar: "BarDataDict", market_date: date) -> float:
+        if self._diff_last is not None and self._window > 1:
+            if len(self._diffs_committed) == self._diffs_committed.maxlen:
+                # The oldest difference is dropped on append
+                self._diffs_committed_sum -= self._diffs_committed[0]
+
+            self._diffs_committed.append(self._diff_last)
+            self._diffs_committed_sum += self._diff_last
+
+        return self._update_last(bar)
+
+    def _on_last_bar_updated(self, bar: "BarDataDict") -> float:
+        return self._update_last(bar)
+
+    @property
+    def current(self) -> float | None:
+        return self._current
@@ -1,14 +1,17 @@
 import math
+from typing import TYPE_CHECKING
 
 import numpy as np
-from pandas import DataFrame
 
 from trade_ibkr.enums import Direction, PxDataCol
 from trade_ibkr.utils import avg
 from .model import Extrema, ExtremaData, ExtremaDataPoint, ExtremaInfo
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
-def analyze_extrema(df: DataFrame) -> ExtremaData:
+
+def analyze_extrema(df: "DataFrame") -> ExtremaData:
     extrema: list[Extrema] = []
     extrema_info: list[ExtremaInfo] = []
     diff_sma_queue: list[float] = []
@@ -22,7 +25,7 @@ def analyze_extrema(df: DataFrame) -> ExtremaData:
     data_zip = zip(range(len(df.index)), series_epoch_sec, series_local_min, series_local_max, series_diff_sma)
 
     for idx, epoch_sec, local_min, local_max, diff_sma in data_zip:
-        if diff_sma:
+        if diff_sma and not math.isnan(diff_sma):
             diff_sma_queue.append(diff_sma)
 
         # Only count the extrema if it occurs before 3+ period
@@ -65,7 +68,7 @@ def analyze_extrema(df: DataFrame) -> ExtremaData:
             for extrema_diff, info in zip(diff, extrema_info)
         ],
         current_ampl_ratio=(
-            abs(df[PxDataCol.CLOSE][-1] - extrema[-1].extrema) / avg(diff_sma_queue)
+            abs(df[PxDataCol.CLOSE].iloc[-1] - extrema[-1].extrema) / avg(diff_sma_queue)
             if diff_sma_queue
             else 0
         ),
@@ -16,7 +16,7 @@ class ExtremaInfo(NamedTuple):
     direction: DirectionConst
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ExtremaDataPoint:
     epoch_sec: int
     length: int
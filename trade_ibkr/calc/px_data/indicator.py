@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Generic, TYPE_CHECKING, TypeVar
+
+from trade_ibkr.enums import PxDataCol
+from trade_ibkr.utils import get_market_date
+
+if TYPE_CHECKING:
+    from trade_ibkr.model import BarDataDict
+
+T = TypeVar("T")
+
+
+class IncrementalIndicator(ABC, Generic[T]):
+    """
+    Indicator updated bar by bar in O(1), instead of being recalculated over the whole window.
+
+    The latest bar could be updated repeatedly until a bar with a newer epoch arrives.
+    Bars older than the latest bar are ignored, as the past bars are not re-calculated.
+    """
+
+    def __init__(self):
+        self._last_epoch_sec: int | None = None
+
+    @abstractmethod
+    def _on_new_bar(self, bar: "BarDataDict", market_date: date) -> T:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _on_last_bar_updated(self, bar: "BarDataDict") -> T:
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def current(self) -> T | None:
+        raise NotImplementedError()
+
+    def update(self, bar: "BarDataDict", *, market_date: date | None = None) -> T | None:
+        """
+        Update the indicator with ``bar``, keyed by ``PxDataCol``. Returns the value as of ``bar``.
+
+        ``market_date`` is derived from the epoch of ``bar`` if not given, which is only needed for a new bar.
+        """
+        epoch_sec = bar[PxDataCol.EPOCH_SEC]
+
+        if self._last_epoch_sec is not None and epoch_sec < self._last_epoch_sec:
+            return None
+
+        if epoch_sec == self._last_epoch_sec:
+            return self._on_last_bar_updated(bar)
+
+        self._last_epoch_sec = epoch_sec
+
+        return self._on_new_bar(bar, market_date or get_market_date(epoch_sec))
@@ -0,0 +1,103 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from trade_ibkr.enums import PxDataCol
+from trade_ibkr.utils import get_market_bar_epoch_sec, to_market_bar_epoch_sec
+
+if TYPE_CHECKING:
+    from trade_ibkr.model import BarDataDict
+
+
+def merge_bars(epoch_sec: int, bars: list["BarDataDict"]) -> "BarDataDict":
+    """Merge the consecutive ``bars`` in chronological order into a bar of ``epoch_sec``."""
+    return {
+        PxDataCol.OPEN: bars[0][PxDataCol.OPEN],
+        PxDataCol.HIGH: max(bar[PxDataCol.HIGH] for bar in bars),
+        PxDataCol.LOW: min(bar[PxDataCol.LOW] for bar in bars),
+        PxDataCol.CLOSE: bars[-1][PxDataCol.CLOSE],
+        PxDataCol.EPOCH_SEC: epoch_sec,
+        PxDataCol.VOLUME: sum(bar[PxDataCol.VOLUME] for bar in bars),
+    }
+
+
+class BarResampler:
+    """
+    Resample the bars of a base period to the bars of ``period_sec``, aligned to the market session.
+
+    :meth:`resample` resamples all base bars at once,
+    then :meth:`update` only re-aggregates the bar containing the changed base bar.
+    """
+
+    def __init__(self, period_sec: int):
+        self.period_sec = period_sec
+
+        # Epoch sec of the resampled bar to the epoch sec of its base bars, ordered by the resampled bar
+        self._base_epochs: dict[int, list[int]] = {}
+
+    def resample(self, base_bars: dict[int, "BarDataDict"]) -> dict[int, "BarDataDict"]:
+        if not base_bars:
+            self._base_epochs = {}
+            return {}
+
+        epoch_sec = np.array(sorted(base_bars), dtype=np.int64)
+        bars = [base_bars[epoch] for epoch in epoch_sec.tolist()]
+
+        bar_epoch_sec = to_market_bar_epoch_sec(epoch_sec, self.period_sec)
+        # Base bars are sorted, so the base bars of a resampled bar are consecutive
+        starts = np.flatnonzero(np.concatenate(([True], bar_epoch_sec[1:] != bar_epoch_sec[:-1])))
+        ends = np.append(starts[1:], len(epoch_sec))
+
+        opens = np.array([bar[PxDataCol.OPEN] for bar in bars], dtype=np.float64)
+        highs = np.maximum.reduceat(np.array([bar[PxDataCol.HIGH] for bar in bars], dtype=np.float64), starts)
+        lows = np.minimum.reduceat(np.array([bar[PxDataCol.LOW] for bar in bars], dtype=np.float64), starts)
+        closes = np.array([bar[PxDataCol.CLOSE] for bar in bars], dtype=np.float64)
+        volumes = np.add.reduceat(np.array([bar[PxDataCol.VOLUME] for bar in bars], dtype=np.int64), starts)
+
+        resampled: dict[int, "BarDataDict"] = {}
+        self._base_epochs = {}
+
+        for idx, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            bar_epoch = int(bar_epoch_sec[start])
+
+            resampled[bar_epoch] = {
+                PxDataCol.OPEN: float(opens[start]),
+                PxDataCol.HIGH: float(highs[idx]),
+                PxDataCol.LOW: float(lows[idx]),
+                PxDataCol.CLOSE: float(closes[end - 1]),
+                PxDataCol.EPOCH_SEC: bar_epoch,
+                PxDataCol.VOLUME: int(volumes[idx]),
+            }
+            self._base_epochs[bar_epoch] = epoch_sec[start:end].tolist()
+
+        return resampled
+
+    def update(self, base_bars: dict[int, "BarDataDict"], base_epoch_sec: int) -> "BarDataDict | None":
+        """Returns the resampled bar containing the base bar of ``base_epoch_sec``."""
+        bar_epoch = get_market_bar_epoch_sec(base_epoch_sec, self.period_sec)
+
+        if (base_epochs := self._base_epochs.get(bar_epoch)) is None:
+            is_in_order = not self._base_epochs or bar_epoch > next(reversed(self._base_epochs))
+            base_epochs = self._base_epochs[bar_epoch] = []
+
+            if not is_in_order:
+                # Resampled bar older than the latest one, reordered to pop the oldest from the front
+                self._base_epochs = dict(sorted(self._base_epochs.items()))
+
+        if base_epoch_sec not in base_epochs:
+            base_epochs.append(base_epoch_sec)
+            base_epochs.sort()
+
+        if not (bars := [base_bars[epoch] for epoch in base_epochs if epoch in base_bars]):
+            return None
+
+        return merge_bars(bar_epoch, bars)
+
+    def forget_removed(self, bars: dict[int, "BarDataDict"]):
+        """
+        Forget the base bars of the resampled bars removed from ``bars``, such as by the retention.
+
+        Resampled bars are removed from the oldest, so only the oldest ones are checked.
+        """
+        while self._base_epochs and (bar_epoch := next(iter(self._base_epochs))) not in bars:
+            del self._base_epochs[bar_epoch]
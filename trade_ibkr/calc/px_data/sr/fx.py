@@ -3,19 +3,22 @@ Most of the source code originated from:
 https://medium.datadriveninvestor.com/how-to-detect-support-resistance-levels-and-breakout-using-python-f8b5dac42f21.
 """
 import math
+from typing import TYPE_CHECKING
 
 import numpy as np
-from pandas import DataFrame
 
 from trade_ibkr.enums import PxDataCol
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 
 def is_far_from_level(value: float, levels: list[float], avg: float) -> bool:
     return not np.any([abs(value - level) < avg for level in levels])
 
 
 # Not using
-def support_resistance_fractal(df: DataFrame, min_gap: float) -> list[float]:
+def support_resistance_fractal(df: "DataFrame", min_gap: float) -> list[float]:
     series_high = df[PxDataCol.HIGH].tolist()
     series_low = df[PxDataCol.LOW].tolist()
 
@@ -47,7 +50,7 @@ def support_resistance_fractal(df: DataFrame, min_gap: float) -> list[float]:
 
 
 # Not using
-def support_resistance_window(df: DataFrame, min_gap: float) -> list[float]:
+def support_resistance_window(df: "DataFrame", min_gap: float) -> list[float]:
     levels = []
     max_list = []
     min_list = []
@@ -82,5 +85,5 @@ def support_resistance_window(df: DataFrame, min_gap: float) -> list[float]:
     return sorted(levels)
 
 
-def support_resistance_extrema(df: DataFrame) -> list[float]:
+def support_resistance_extrema(df: "DataFrame") -> list[float]:
     return df[PxDataCol.LOCAL_MAX].dropna().to_list() + df[PxDataCol.LOCAL_MIN].dropna().to_list()
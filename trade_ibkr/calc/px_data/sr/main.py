@@ -1,13 +1,16 @@
-from pandas import DataFrame
+from typing import TYPE_CHECKING
 
-from trade_ibkr.const import SR_MULTIPLIER
+from trade_ibkr.config import get_config
 from trade_ibkr.enums import PxDataCol
 from .fx import support_resistance_extrema
 from .model import SRLevelsData
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
-def calc_support_resistance_levels(df: DataFrame) -> SRLevelsData:
+
+def calc_support_resistance_levels(df: "DataFrame") -> SRLevelsData:
     return SRLevelsData(
         levels=support_resistance_extrema(df),
-        min_gap=df[PxDataCol.DIFF_SMA].mean() * SR_MULTIPLIER
+        min_gap=df[PxDataCol.DIFF_SMA].mean() * get_config().sr_level.multiplier
     )
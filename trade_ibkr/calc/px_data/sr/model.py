@@ -32,7 +32,7 @@ class SRLevelGroup:
         return avg(self.levels)
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class SRLevel:
     level: float
     strength: float
@@ -0,0 +1,3 @@
+from .incremental import SessionVwap
+from .main import calc_session_vwap
+from .model import VwapValue
@@ -0,0 +1,47 @@
+from datetime import date
+from typing import TYPE_CHECKING
+
+from trade_ibkr.enums import PxDataCol
+from ..indicator import IncrementalIndicator
+from .model import VWAP_SUMS_EMPTY, VwapSums, VwapValue
+
+if TYPE_CHECKING:
+    from trade_ibkr.model import BarDataDict
+
+
+class SessionVwap(IncrementalIndicator[VwapValue]):
+    """
+    VWAP of the close Px, reset at each market date change.
+
+    The running sums exclude the latest bar, so the latest bar could be replaced in O(1).
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self._market_date: date | None = None
+        self._sums_committed: VwapSums = VWAP_SUMS_EMPTY
+        self._sums_last: VwapSums = VWAP_SUMS_EMPTY
+        self._current: VwapValue | None = None
+
+    def _update_last(self, bar: "BarDataDict") -> VwapValue:
+        self._sums_last = VwapSums.from_px(bar[PxDataCol.CLOSE], bar[PxDataCol.VOLUME])
+        self._current = (self._sums_committed + self._sums_last).to_value()
+
+        return self._current
+
+    def _on_new_bar(self, bar: "BarDataDict", market_date: date) -> VwapValue:
+        if market_date != self._market_date:
+            self._market_date = market_date
+            self._sums_committed = VWAP_SUMS_EMPTY
+        else:
+            self._sums_committed += self._sums_last
+
+        return self._update_last(bar)
+
+    def _on_last_bar_updated(self, bar: "BarDataDict") -> VwapValue:
+        return self._update_last(bar)
+
+    @property
+    def current(self) -> VwapValue | None:
+        return self._current
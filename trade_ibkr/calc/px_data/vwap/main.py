@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def _session_cumsum(values: np.ndarray, session_bounds: list[tuple[int, int]]) -> np.ndarray:
+    ret = np.empty_like(values)
+
+    for start, stop in session_bounds:
+        np.cumsum(values[start:stop], out=ret[start:stop])
+
+    return ret
+
+
+def calc_session_vwap(
+        px: np.ndarray, volume: np.ndarray, session_bounds: list[tuple[int, int]]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the VWAP and its standard deviation of each row, reset at each session.
+
+    ``session_bounds`` are the row ranges ``(start, stop)`` of the sessions covering all rows.
+    Same as feeding the rows to :class:`SessionVwap` one by one, which is used for the streaming updates.
+    """
+    px = px.astype(np.float64)
+    volume = volume.astype(np.float64)
+
+    sum_pv = _session_cumsum(px * volume, session_bounds)
+    sum_p2v = _session_cumsum(px * px * volume, session_bounds)
+    sum_v = _session_cumsum(volume, session_bounds)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = sum_pv / sum_v
+        variance = sum_p2v / sum_v - vwap * vwap
+
+    # Clamped, as the floating point error could make it slightly negative
+    return vwap, np.sqrt(np.clip(variance, 0, None))
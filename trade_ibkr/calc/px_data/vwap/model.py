@@ -0,0 +1,44 @@
+import math
+from typing import NamedTuple
+
+
+class VwapValue(NamedTuple):
+    vwap: float
+    # Volume-weighted standard deviation of the Px from the VWAP
+    stdev: float
+
+    def get_band(self, stdev_multiplier: float) -> tuple[float, float]:
+        """Returns (lower, upper) VWAP band of ``stdev_multiplier`` standard deviations."""
+        return self.vwap - self.stdev * stdev_multiplier, self.vwap + self.stdev * stdev_multiplier
+
+
+class VwapSums(NamedTuple):
+    px_times_volume: float
+    px_sq_times_volume: float
+    volume: float
+
+    def __add__(self, other: "VwapSums") -> "VwapSums":
+        return VwapSums(
+            px_times_volume=self.px_times_volume + other.px_times_volume,
+            px_sq_times_volume=self.px_sq_times_volume + other.px_sq_times_volume,
+            volume=self.volume + other.volume,
+        )
+
+    @staticmethod
+    def from_px(px: float, volume: float) -> "VwapSums":
+        return VwapSums(px_times_volume=px * volume, px_sq_times_volume=px * px * volume, volume=volume)
+
+    def to_value(self) -> VwapValue:
+        if not self.volume:
+            return VwapValue(vwap=math.nan, stdev=math.nan)
+
+        vwap = self.px_times_volume / self.volume
+
+        return VwapValue(
+            vwap=vwap,
+            # Clamped, as the floating point error could make it slightly negative
+            stdev=math.sqrt(max(0., self.px_sq_times_volume / self.volume - vwap * vwap)),
+        )
+
+
+VWAP_SUMS_EMPTY = VwapSums(px_times_volume=0, px_sq_times_volume=0, volume=0)
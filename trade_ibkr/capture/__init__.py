@@ -0,0 +1,3 @@
+from .format import CaptureReader, CaptureRecord
+from .recorder import CallbackRecorder, get_capture_file_path
+from .replay import CaptureReplay, CaptureReplayClient, make_capture_replay_app
@@ -0,0 +1,160 @@
+import pickle
+import struct
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import BinaryIO, Iterator
+
+from ibapi.common import BarData, TickAttrib
+
+from trade_ibkr.enums import CaptureCallback
+from trade_ibkr.utils import print_warning
+
+CAPTURE_MAGIC = b"TIBKRCAP"
+CAPTURE_VERSION = 1
+
+# Magic, version, epoch sec of the capture start
+_file_header = struct.Struct("<8sHd")
+# Callback, sec since the capture start, payload size
+_frame_header = struct.Struct("<BdI")
+
+# Request ID, tick type, Px, attributes as bits
+_tick_price = struct.Struct("<iidB")
+# Request ID, OHLC, bar count, then the sizes of the date, the volume and the WAP strings
+_bar = struct.Struct("<iddddiBBB")
+
+
+@dataclass(kw_only=True)
+class CaptureRecord:
+    callback: CaptureCallback
+    # Sec since the capture start
+    elapsed_sec: float
+    args: tuple
+
+
+def _encode_tick_price(args: tuple) -> bytes:
+    req_id, tick_type, price, attrib = args
+
+    return _tick_price.pack(
+        req_id, tick_type, price,
+        attrib.canAutoExecute | attrib.pastLimit << 1 | attrib.preOpen << 2,
+    )
+
+
+def _decode_tick_price(payload: bytes) -> tuple:
+    req_id, tick_type, price, attrib_bits = _tick_price.unpack(payload)
+
+    attrib = TickAttrib()
+    attrib.canAutoExecute = bool(attrib_bits & 1)
+    attrib.pastLimit = bool(attrib_bits & 2)
+    attrib.preOpen = bool(attrib_bits & 4)
+
+    return req_id, tick_type, price, attrib
+
+
+def _encode_bar(args: tuple) -> bytes:
+    req_id, bar = args
+
+    date = str(bar.date).encode()
+    volume = str(bar.volume).encode()
+    wap = str(bar.wap).encode()
+
+    return _bar.pack(
+        req_id, bar.open, bar.high, bar.low, bar.close, bar.barCount, len(date), len(volume), len(wap),
+    ) + date + volume + wap
+
+
+def _decode_bar(payload: bytes) -> tuple:
+    req_id, open_, high, low, close, bar_count, date_size, volume_size, wap_size = _bar.unpack_from(payload)
+
+    offset = _bar.size
+
+    bar = BarData()
+    bar.date = payload[offset:offset + date_size].decode()
+    offset += date_size
+    bar.volume = Decimal(payload[offset:offset + volume_size].decode())
+    offset += volume_size
+    bar.wap = Decimal(payload[offset:offset + wap_size].decode())
+    bar.open = open_
+    bar.high = high
+    bar.low = low
+    bar.close = close
+    bar.barCount = bar_count
+
+    return req_id, bar
+
+
+def encode_capture_payload(callback: CaptureCallback, args: tuple) -> bytes:
+    """
+    Encode the arguments of ``callback``, called on the thread of the callback.
+
+    The frequent callbacks are packed with ``struct``, the others are pickled.
+    """
+    if callback == CaptureCallback.TICK_PRICE:
+        return _encode_tick_price(args)
+
+    if callback in (CaptureCallback.HISTORICAL_DATA, CaptureCallback.HISTORICAL_DATA_UPDATE):
+        return _encode_bar(args)
+
+    return pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode_capture_payload(callback: CaptureCallback, payload: bytes) -> tuple:
+    if callback == CaptureCallback.TICK_PRICE:
+        return _decode_tick_price(payload)
+
+    if callback in (CaptureCallback.HISTORICAL_DATA, CaptureCallback.HISTORICAL_DATA_UPDATE):
+        return _decode_bar(payload)
+
+    return pickle.loads(payload)
+
+
+def write_capture_header(file: BinaryIO, start_epoch_sec: float):
+    file.write(_file_header.pack(CAPTURE_MAGIC, CAPTURE_VERSION, start_epoch_sec))
+
+
+def encode_capture_frame(callback: CaptureCallback, elapsed_sec: float, payload: bytes) -> bytes:
+    return _frame_header.pack(callback, elapsed_sec, len(payload)) + payload
+
+
+class CaptureReader:
+    """
+    Reads the records of a capture file in order.
+
+    The last record could be incomplete if the app is killed while capturing, which is skipped with a warning.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+        with open(file_path, "rb") as f:
+            magic, version, self.start_epoch_sec = _file_header.unpack(f.read(_file_header.size))
+
+        if magic != CAPTURE_MAGIC:
+            raise ValueError(f"{file_path} is not a capture file")
+
+        if version != CAPTURE_VERSION:
+            raise ValueError(f"Capture version of {file_path} is {version}, only {CAPTURE_VERSION} is supported")
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        with open(self.file_path, "rb") as f:
+            f.seek(_file_header.size)
+
+            while header := f.read(_frame_header.size):
+                if len(header) < _frame_header.size:
+                    print_warning(f"[Capture] Incomplete record at the end of {self.file_path}", force=True)
+                    return
+
+                callback, elapsed_sec, payload_size = _frame_header.unpack(header)
+                payload = f.read(payload_size)
+
+                if len(payload) < payload_size:
+                    print_warning(f"[Capture] Incomplete record at the end of {self.file_path}", force=True)
+                    return
+
+                callback = CaptureCallback(callback)
+
+                yield CaptureRecord(
+                    callback=callback,
+                    elapsed_sec=elapsed_sec,
+                    args=decode_capture_payload(callback, payload),
+                )
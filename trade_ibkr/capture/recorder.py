@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable
+
+from trade_ibkr.enums import CaptureCallback
+from trade_ibkr.utils import print_error, print_log
+from .format import encode_capture_frame, encode_capture_payload, write_capture_header
+
+
+def get_capture_file_path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"capture-{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.tibcap")
+
+
+class CallbackRecorder:
+    """
+    Appends the callbacks of :class:`CaptureCallback` received by an app to a new capture file.
+
+    The arguments are encoded on the thread of the callback, as some of them (``BarData``) could be reused
+    by the sender. Encoded records are written in batches from a background thread.
+    """
+
+    def __init__(self, file_path: str, *, flush_interval_sec: float = 0.25):
+        self.file_path = file_path
+        self._flush_interval_sec = flush_interval_sec
+
+        self._pending: deque[bytes] = deque()
+        self._start = time.perf_counter()
+        self._stopped = threading.Event()
+        self._overridden: dict[str, Callable[..., Any] | None] = {}
+
+        self.records_written: int = 0
+        self.bytes_written: int = 0
+
+        if directory := os.path.dirname(file_path):
+            os.makedirs(directory, exist_ok=True)
+
+        # `x` so an existing capture is never overwritten
+        self._file = open(file_path, "xb")
+        write_capture_header(self._file, time.time())
+
+        self._writer = threading.Thread(target=self._run_writer, name="CaptureWriter", daemon=True)
+        self._writer.start()
+
+        print_log(f"[Capture] Capturing the callbacks to {file_path}")
+
+    def record(self, callback: CaptureCallback, args: tuple):
+        self._pending.append(encode_capture_frame(
+            callback,
+            time.perf_counter() - self._start,
+            encode_capture_payload(callback, args),
+        ))
+
+    def _wrap(self, callback: CaptureCallback, method: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapped(*args):
+            try:
+                self.record(callback, args)
+            except Exception as ex:
+                # Capturing should never break the app
+                print_error(f"[Capture] Failed to capture `{callback.method_name}`: {ex}")
+
+            return method(*args)
+
+        return wrapped
+
+    def attach(self, app: Any):
+        """Capture the callbacks of ``app``, by the instance attributes overriding the callback methods."""
+        for callback in CaptureCallback:
+            name = callback.method_name
+
+            # Instance attributes already overriding the methods are restored on detach
+            self._overridden[name] = vars(app).get(name)
+            setattr(app, name, self._wrap(callback, getattr(app, name)))
+
+    def detach(self, app: Any):
+        for name, overridden in self._overridden.items():
+            if overridden:
+                setattr(app, name, overridden)
+            else:
+                vars(app).pop(name, None)
+
+        self._overridden = {}
+
+    def _flush(self):
+        batch = bytearray()
+        count = 0
+
+        # Only take the records pending at the start, so a busy app can't keep the writer here
+        for _ in range(len(self._pending)):
+            batch += self._pending.popleft()
+            count += 1
+
+        if not batch:
+            return
+
+        self._file.write(batch)
+        self._file.flush()
+
+        self.records_written += count
+        self.bytes_written += len(batch)
+
+    def _run_writer(self):
+        while not self._stopped.wait(self._flush_interval_sec):
+            self._flush()
+
+    def close(self):
+        """Stop the writer after writing all pending records."""
+        self._stopped.set()
+        self._writer.join()
+
+        self._flush()
+        self._file.close()
+
+        print_log(
+            f"[Capture] Captured {self.records_written} callbacks ({self.bytes_written / 1024:.1f} KB) "
+            f"to {self.file_path}"
+        )
@@ -0,0 +1,225 @@
+import threading
+import time
+from typing import Any, Type, TypeVar
+
+from ibapi.client import EClient
+from ibapi.common import OrderId, TagValueList, TickerId
+from ibapi.contract import Contract
+from ibapi.execution import ExecutionFilter
+from ibapi.order import Order
+
+from trade_ibkr.utils import print_log, print_warning
+from .format import CaptureReader, CaptureRecord
+
+
+class CaptureReplay:
+    """
+    Feeds the records of a capture file to an app, at the captured pace scaled by ``speed``.
+
+    ``speed`` of ``None`` feeds the records as fast as possible.
+
+    Records of a request are held until the app makes the request of the same ID, for at most ``request_wait_sec``.
+    Request IDs are assigned in order, so the app should make the same requests in the same order as when captured.
+    """
+
+    def __init__(self, file_path: str, *, speed: float | None = 1., request_wait_sec: float = 10):
+        self.reader = CaptureReader(file_path)
+        self.speed = speed
+        self.request_wait_sec = request_wait_sec
+
+        self._cond = threading.Condition()
+        self._requested: set[int] = set()
+        # Requests not made by the app in time, whose records are skipped
+        self._skipped: set[int] = set()
+        self._stopped = False
+        self._done = threading.Event()
+
+        self.records_fed: int = 0
+        self.records_skipped: int = 0
+        self.duration_sec: float = 0
+
+    def on_requested(self, req_id: int):
+        with self._cond:
+            self._requested.add(req_id)
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def wait_done(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _wait_requested(self, req_id: int) -> bool:
+        if req_id in self._skipped:
+            return False
+
+        with self._cond:
+            is_requested = self._cond.wait_for(
+                lambda: self._stopped or req_id in self._requested,
+                timeout=self.request_wait_sec,
+            )
+
+        if not is_requested:
+            print_warning(f"[Capture] Request #{req_id} is not made by the app, skipping its records", force=True)
+            self._skipped.add(req_id)
+
+        return is_requested and not self._stopped
+
+    def _feed(self, wrapper: Any, record: CaptureRecord):
+        getattr(wrapper, record.callback.method_name)(*record.args)
+        self.records_fed += 1
+
+    def run(self, wrapper: Any):
+        """Feed all records to ``wrapper`` on the calling thread, until all records are fed or stopped."""
+        start = time.perf_counter()
+        # `time.perf_counter()` when the capture started, shifted by the time waiting for the requests
+        clock_origin: float | None = None
+
+        print_log(f"[Capture] Replaying {self.reader.file_path} at {f'{self.speed}x' if self.speed else 'max speed'}")
+
+        try:
+            for record in self.reader:
+                if self._stopped:
+                    return
+
+                if record.callback.has_req_id:
+                    wait_start = time.perf_counter()
+
+                    if not self._wait_requested(record.args[0]):
+                        self.records_skipped += 1
+                        continue
+
+                    if clock_origin is not None:
+                        clock_origin += time.perf_counter() - wait_start
+
+                if self.speed:
+                    if clock_origin is None:
+                        clock_origin = time.perf_counter() - record.elapsed_sec / self.speed
+
+                    if (delay := clock_origin + record.elapsed_sec / self.speed - time.perf_counter()) > 0:
+                        time.sleep(delay)
+
+                self._feed(wrapper, record)
+        finally:
+            self.duration_sec = time.perf_counter() - start
+            self._done.set()
+
+            print_log(
+                f"[Capture] Replayed {self.records_fed} records in {self.duration_sec:.3f} s "
+                f"({self.records_skipped} skipped)"
+            )
+
+
+class CaptureReplayClient(EClient):
+    """
+    ``EClient`` receiving the callbacks from :class:`CaptureReplay` instead of TWS.
+
+    Requests are not sent anywhere, so the orders are never placed.
+    Use :func:`make_capture_replay_app` to make an app class using this client.
+    """
+
+    capture_replay: CaptureReplay
+
+    # region Connection
+
+    def connect(self, host, port, clientId):
+        self.host = host
+        self.port = port
+        self.clientId = clientId
+
+        self.setConnState(EClient.CONNECTED)
+
+    def isConnected(self):
+        return self.connState == EClient.CONNECTED
+
+    def disconnect(self):
+        if not self.isConnected():
+            return
+
+        self.setConnState(EClient.DISCONNECTED)
+        self.capture_replay.stop()
+        self.wrapper.connectionClosed()
+
+    def run(self):
+        self.capture_replay.run(self.wrapper)
+
+    def reqIds(self, numIds: int):
+        pass
+
+    # endregion
+
+    # region Market data
+
+    def reqContractDetails(self, reqId: int, contract: Contract):
+        self.capture_replay.on_requested(reqId)
+
+    def reqHistoricalData(
+            self, reqId: TickerId, contract: Contract, endDateTime: str,
+            durationStr: str, barSizeSetting: str, whatToShow: str,
+            useRTH: int, formatDate: int, keepUpToDate: bool, chartOptions: TagValueList
+    ):
+        self.capture_replay.on_requested(reqId)
+
+    def cancelHistoricalData(self, reqId: TickerId):
+        pass
+
+    def reqMktData(
+            self, reqId: TickerId, contract: Contract, genericTickList: str,
+            snapshot: bool, regulatorySnapshot: bool, mktDataOptions: TagValueList
+    ):
+        self.capture_replay.on_requested(reqId)
+
+    def cancelMktData(self, reqId: TickerId):
+        pass
+
+    # endregion
+
+    # region Orders
+
+    def placeOrder(self, orderId: OrderId, contract: Contract, order: Order):
+        pass
+
+    def cancelOrder(self, orderId: OrderId):
+        pass
+
+    def reqOpenOrders(self):
+        pass
+
+    def reqAllOpenOrders(self):
+        pass
+
+    def reqCompletedOrders(self, apiOnly: bool):
+        pass
+
+    # endregion
+
+    # region Portfolio
+
+    def reqPositions(self):
+        pass
+
+    def reqExecutions(self, reqId: int, execFilter: ExecutionFilter):
+        pass
+
+    def reqPnLSingle(self, reqId: int, account: str, modelCode: str, conid: int):
+        pass
+
+    # endregion
+
+
+T = TypeVar("T", bound=EClient)
+
+
+def make_capture_replay_app(app_cls: Type[T], capture_replay: CaptureReplay) -> Type[T]:
+    """
+    Make a subclass of ``app_cls`` receiving the callbacks from ``capture_replay``.
+
+    :class:`CaptureReplayClient` is placed before ``EClient`` in the MRO, so the overrides in ``app_cls`` still run.
+    """
+    return type(
+        f"CaptureReplay{app_cls.__name__}",
+        (app_cls, CaptureReplayClient),
+        {"capture_replay": capture_replay},
+    )
@@ -0,0 +1,11 @@
+from .main import (
+    CONFIG_FILE_PATH, CONFIG_SCHEMA_FILE_PATH, ConfigListener,
+    add_config_listener, get_config, load_config, parse_config, print_config, set_config,
+)
+from .model import (
+    AccountConfig, BotConfig, ClientIdConfig, Config, ConfigReloadConfig, CustomSrLevelConfig, DataConfig,
+    ForceStopLossConfig, LineConfig, LinePxAutoReportConfig, LogConfig, LogRateLimitConfig, PnLWarningConfig,
+    ProfilerConfig, PxRetentionConfig, PxUpdateConfig, RiskManagementConfig, ServerConfig, ServerContractConfig,
+    ServerContractDataConfig, SrLevelConfig, SystemConfig,
+)
+from .schema import ConfigError, validate_config
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+from dataclasses import asdict, fields, is_dataclass
+from functools import cache
+from typing import Any, Callable, Type, TypeVar, get_args, get_origin, get_type_hints
+
+import yaml
+
+from trade_ibkr.const import console
+from .model import Config
+from .schema import ConfigError, validate_config
+
+CONFIG_FILE_PATH = "config.yaml"
+
+CONFIG_SCHEMA_FILE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "config.schema.json"
+)
+
+ConfigListener = Callable[[Config], None]
+
+T = TypeVar("T")
+
+_config: Config | None = None
+_config_lock = threading.Lock()
+_config_listeners: list[ConfigListener] = []
+
+
+@cache
+def _load_config_schema(schema_path: str) -> dict[str, Any]:
+    with open(schema_path, "r") as schema_file:
+        return json.load(schema_file)
+
+
+def _convert(value: Any, type_: Any) -> Any:
+    if is_dataclass(type_):
+        return _to_dataclass(type_, value)
+
+    origin = get_origin(type_)
+
+    if origin is list:
+        (item_type,) = get_args(type_)
+        return [_convert(item, item_type) for item in value]
+
+    if origin is dict:
+        key_type, value_type = get_args(type_)
+        return {
+            int(key) if key_type is int else key: _convert(item, value_type)
+            for key, item in value.items()
+        }
+
+    return value
+
+
+def _to_dataclass(cls: Type[T], data: dict[str, Any]) -> T:
+    type_hints = get_type_hints(cls)
+
+    # Keys in the config are the field names in kebab-case
+    return cls(**{
+        config_field.name: _convert(data[key], type_hints[config_field.name])
+        for config_field in fields(cls)
+        if (key := config_field.name.replace("_", "-")) in data
+    })
+
+
+def parse_config(data: dict[str, Any], *, schema_path: str = CONFIG_SCHEMA_FILE_PATH) -> Config:
+    """
+    Validate the raw config ``data`` against the schema, then convert it to :class:`Config`.
+
+    :raises ConfigError: if ``data`` is invalid
+    """
+    validate_config(data, _load_config_schema(schema_path))
+
+    try:
+        return _to_dataclass(Config, data)
+    except (KeyError, TypeError, ValueError) as ex:
+        raise ConfigError(f"Invalid config: {ex}") from ex
+
+
+def load_config(path: str = CONFIG_FILE_PATH) -> Config:
+    with open(path, "r") as config_file:
+        return parse_config(yaml.safe_load(config_file))
+
+
+def get_config() -> Config:
+    """Config in use, which is loaded from ``config.yaml`` on the first call unless set by :func:`set_config`."""
+    if _config is not None:
+        return _config
+
+    with _config_lock:
+        if _config is None:
+            set_config(load_config())
+
+    return _config
+
+
+def set_config(config: Config):
+    global _config
+
+    _config = config
+
+    for listener in _config_listeners:
+        listener(config)
+
+
+def add_config_listener(listener: ConfigListener):
+    """Call ``listener`` on each config set, and right away if the config is already loaded."""
+    _config_listeners.append(listener)
+
+    if _config is not None:
+        listener(_config)
+
+
+def print_config():
+    console.print("[cyan]--- Config content ---[/cyan]")
+    console.print(yaml.dump(asdict(get_config()), default_flow_style=False))
@@ -0,0 +1,213 @@
+from dataclasses import dataclass, field
+from typing import Literal
+
+
+@dataclass(kw_only=True)
+class AccountConfig:
+    demo: str
+    actual: str
+
+
+@dataclass(kw_only=True)
+class LogRateLimitConfig:
+    window_sec: float = 1
+    max_per_window: int = 5
+
+
+@dataclass(kw_only=True)
+class LogConfig:
+    level: Literal["debug", "info", "warning", "error"] = "info"
+    format: Literal["text", "json"] = "text"
+    queue_size: int = 10000
+    rate_limit: LogRateLimitConfig = field(default_factory=LogRateLimitConfig)
+
+
+@dataclass(kw_only=True)
+class ProfilerConfig:
+    enable: bool = False
+    report_interval_sec: float = 60
+    top_n: int = 10
+
+
+@dataclass(kw_only=True)
+class ConfigReloadConfig:
+    watch: bool = False
+    interval_sec: float = 2
+
+
+@dataclass(kw_only=True)
+class SystemConfig:
+    demo: bool
+    account: AccountConfig
+    suppress_warning: bool = True
+    log: LogConfig = field(default_factory=LogConfig)
+    profiler: ProfilerConfig = field(default_factory=ProfilerConfig)
+    config_reload: ConfigReloadConfig = field(default_factory=ConfigReloadConfig)
+    capture_directory: str | None = None
+
+    @property
+    def account_number_in_use(self) -> str:
+        return self.account.demo if self.demo else self.account.actual
+
+
+@dataclass(kw_only=True)
+class LinePxAutoReportConfig:
+    interval_sec: float
+    # `<SYMBOL>@<PERIOD_SEC>`
+    symbols: list[str]
+
+
+@dataclass(kw_only=True)
+class LineConfig:
+    enable: bool
+    token: str
+    px_auto_report: LinePxAutoReportConfig
+
+
+@dataclass(kw_only=True)
+class BotConfig:
+    strategy_check_interval_sec: float
+    position_fetch_interval_sec: float
+    line: LineConfig
+
+
+@dataclass(kw_only=True)
+class PxUpdateConfig:
+    freq_market_sec: float
+    freq_historical_sec: float
+
+
+@dataclass(kw_only=True)
+class PxRetentionConfig:
+    # Key is the period sec or `default`, count of the bars of the initial history is kept if neither is set
+    max_bars: dict[int | str, int] = field(default_factory=dict)
+    downsample_factor: int = 5
+    # No bars are downsampled if 0
+    downsampled_bars: int = 0
+
+    def get_max_bars(self, period_sec: int) -> int | None:
+        return self.max_bars.get(period_sec, self.max_bars.get("default"))
+
+    def get_downsampled_period_sec(self, period_sec: int) -> int:
+        # Daily bars are the longest bars resampled
+        return min(period_sec * self.downsample_factor, max(period_sec, 86400))
+
+
+@dataclass(kw_only=True)
+class DataConfig:
+    # Key is the period sec
+    trend_window: dict[int, int]
+    # Key is the period sec or `default`
+    diff_sma_window: dict[int | str, int]
+    sma: list[int]
+    # Key is the contract symbol or `default`
+    execution_period_sec: dict[str, int]
+    px_update: PxUpdateConfig
+    retention: PxRetentionConfig = field(default_factory=PxRetentionConfig)
+
+    @property
+    def diff_sma_window_default(self) -> int:
+        return self.diff_sma_window["default"]
+
+    def get_diff_sma_window(self, period_sec: int) -> int:
+        return self.diff_sma_window.get(period_sec, self.diff_sma_window_default)
+
+    def get_execution_period_sec(self, contract_symbol: str) -> int:
+        return self.execution_period_sec.get(contract_symbol, self.execution_period_sec["default"])
+
+
+@dataclass(kw_only=True)
+class CustomSrLevelConfig:
+    level: float
+    strong: bool = False
+
+
+@dataclass(kw_only=True)
+class SrLevelConfig:
+    multiplier: float
+    strong_threshold: float
+    # Key is the contract ID
+    custom: dict[int, list[CustomSrLevelConfig]]
+
+
+@dataclass(kw_only=True)
+class PnLWarningConfig:
+    px_diff_val: float
+    px_diff_sma_ratio: float
+    total_pnl: float
+    unrealized_pnl: float
+
+
+@dataclass(kw_only=True)
+class ForceStopLossConfig:
+    period_sec: int
+    px_diff_sma_ratio: float
+
+
+@dataclass(kw_only=True)
+class RiskManagementConfig:
+    take_profit_x: float
+    stop_loss_x: float
+    pnl_warning: PnLWarningConfig
+    force_stop_loss: ForceStopLossConfig
+
+
+@dataclass(kw_only=True)
+class ClientIdConfig:
+    demo: int
+    live: int
+
+
+@dataclass(kw_only=True)
+class ServerContractDataConfig:
+    duration: str
+    bar_size: str
+    period_secs: int
+    is_major: bool = False
+
+
+@dataclass(kw_only=True)
+class ServerContractConfig:
+    symbol: str
+    exchange: str
+    type: str
+    data: list[ServerContractDataConfig]
+    enable: bool = True
+    # Only request the data of the smallest period, and resample the others from it
+    resample: bool = False
+
+    def __post_init__(self):
+        if not self.resample:
+            return
+
+        base_period_sec = self.base_data.period_secs
+
+        for contract_data in self.data:
+            if contract_data.period_secs % base_period_sec or contract_data.period_secs > 86400:
+                raise ValueError(
+                    f"Period sec {contract_data.period_secs} of {self.symbol} can't be resampled "
+                    f"from period sec {base_period_sec}"
+                )
+
+    @property
+    def base_data(self) -> ServerContractDataConfig:
+        """Data to resample the other data from, if ``resample`` is enabled."""
+        return min(self.data, key=lambda contract_data: contract_data.period_secs)
+
+
+@dataclass(kw_only=True)
+class ServerConfig:
+    client_id: ClientIdConfig
+    # Key is the contract ID
+    position_on_first_realized: dict[int, int]
+    contract: list[ServerContractConfig]
+
+
+@dataclass(kw_only=True)
+class Config:
+    system: SystemConfig
+    bot: BotConfig
+    data: DataConfig
+    sr_level: SrLevelConfig
+    risk_management: RiskManagementConfig
+    server: ServerConfig
@@ -0,0 +1,112 @@
+import re
+from typing import Any
+
+
+class ConfigError(ValueError):
+    pass
+
+
+_TYPE_CHECKS = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+
+def _validate_object(value: dict, schema: dict[str, Any], path: str, errors: list[str]):
+    for key in schema.get("required", []):
+        if key not in value:
+            errors.append(f"{path}: `{key}` is required")
+
+    properties = schema.get("properties", {})
+    pattern_properties = schema.get("patternProperties", {})
+    additional_properties = schema.get("additionalProperties", True)
+
+    for key, item in value.items():
+        # YAML keys could be numbers
+        key = str(key)
+        item_path = f"{path}.{key}"
+        is_matched = False
+
+        if key in properties:
+            _validate(item, properties[key], item_path, errors)
+            is_matched = True
+
+        for pattern, item_schema in pattern_properties.items():
+            if re.search(pattern, key):
+                _validate(item, item_schema, item_path, errors)
+                is_matched = True
+
+        if is_matched:
+            continue
+
+        if additional_properties is False:
+            errors.append(f"{path}: `{key}` is not allowed")
+        elif isinstance(additional_properties, dict):
+            _validate(item, additional_properties, item_path, errors)
+
+
+def _validate_array(value: list, schema: dict[str, Any], path: str, errors: list[str]):
+    if len(value) < schema.get("minItems", 0):
+        errors.append(f"{path}: should have at least {schema['minItems']} items")
+
+    if schema.get("uniqueItems") and len({repr(item) for item in value}) < len(value):
+        errors.append(f"{path}: should not have duplicated items")
+
+    if isinstance(items := schema.get("items"), dict):
+        for idx, item in enumerate(value):
+            _validate(item, items, f"{path}[{idx}]", errors)
+
+
+def _validate_scalar(value: Any, schema: dict[str, Any], path: str, errors: list[str]):
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: `{value}` is not one of {schema['enum']}")
+
+    if isinstance(value, str) and "pattern" in schema and not re.search(schema["pattern"], value):
+        errors.append(f"{path}: `{value}` does not match `{schema['pattern']}`")
+
+    if not _TYPE_CHECKS["number"](value):
+        return
+
+    if "minimum" in schema and value < schema["minimum"]:
+        errors.append(f"{path}: {value} should be >= {schema['minimum']}")
+
+    if "maximum" in schema and value > schema["maximum"]:
+        errors.append(f"{path}: {value} should be <= {schema['maximum']}")
+
+    if "exclusiveMinimum" in schema and value <= schema["exclusiveMinimum"]:
+        errors.append(f"{path}: {value} should be > {schema['exclusiveMinimum']}")
+
+    if "exclusiveMaximum" in schema and value >= schema["exclusiveMaximum"]:
+        errors.append(f"{path}: {value} should be < {schema['exclusiveMaximum']}")
+
+
+def _validate(value: Any, schema: dict[str, Any], path: str, errors: list[str]):
+    if (type_ := schema.get("type")) and not _TYPE_CHECKS[type_](value):
+        errors.append(f"{path}: `{value}` should be {type_}")
+        return
+
+    if isinstance(value, dict):
+        _validate_object(value, schema, path, errors)
+    elif isinstance(value, list):
+        _validate_array(value, schema, path, errors)
+    else:
+        _validate_scalar(value, schema, path, errors)
+
+
+def validate_config(data: Any, schema: dict[str, Any]):
+    """
+    Validate ``data`` against the subset of JSON schema used by ``config.schema.json``.
+
+    :raises ConfigError: if ``data`` is invalid, with all errors found
+    """
+    errors: list[str] = []
+
+    _validate(data, schema, "config", errors)
+
+    if errors:
+        raise ConfigError("Invalid config:\n" + "\n".join(f"- {error}" for error in errors))
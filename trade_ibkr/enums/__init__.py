@@ -1,7 +1,10 @@
 from .candle_pos import CandlePos
+from .capture import CaptureCallback
 from .direction import Direction, DirectionConst
 from .execution import ExecutionDataCol
 from .ibkr_const import OrderSideConst, ExecutionSideConst, reverse_order_side
+from .log import LogLevel
+from .latency import OrderLatencySpan, OrderLatencyStage
 from .px_data import PxDataCol
 from .px_data_pair import PxDataPairCol, PxDataPairSuffix
 from .side import Side
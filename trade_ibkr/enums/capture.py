@@ -0,0 +1,34 @@
+from enum import IntEnum
+
+
+class CaptureCallback(IntEnum):
+    # Value is saved in the capture files, so it must not be changed
+    NEXT_VALID_ID = 1
+    CONTRACT_DETAILS = 2
+    CONTRACT_DETAILS_END = 3
+    HISTORICAL_DATA = 4
+    HISTORICAL_DATA_END = 5
+    HISTORICAL_DATA_UPDATE = 6
+    TICK_PRICE = 7
+    ORDER_STATUS = 8
+
+    @property
+    def method_name(self) -> str:
+        return _method_names[self]
+
+    @property
+    def has_req_id(self) -> bool:
+        """If the first argument is the request ID."""
+        return self not in (CaptureCallback.NEXT_VALID_ID, CaptureCallback.ORDER_STATUS)
+
+
+_method_names: dict[CaptureCallback, str] = {
+    CaptureCallback.NEXT_VALID_ID: "nextValidId",
+    CaptureCallback.CONTRACT_DETAILS: "contractDetails",
+    CaptureCallback.CONTRACT_DETAILS_END: "contractDetailsEnd",
+    CaptureCallback.HISTORICAL_DATA: "historicalData",
+    CaptureCallback.HISTORICAL_DATA_END: "historicalDataEnd",
+    CaptureCallback.HISTORICAL_DATA_UPDATE: "historicalDataUpdate",
+    CaptureCallback.TICK_PRICE: "tickPrice",
+    CaptureCallback.ORDER_STATUS: "orderStatus",
+}
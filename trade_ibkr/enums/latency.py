@@ -0,0 +1,30 @@
+from enum import Enum
+
+
+class OrderLatencyStage(Enum):
+    SIGNAL = "signal"
+    SEND = "send"
+    ACK = "ack"
+    FILL = "fill"
+    COMPLETED = "completed"
+    POSITION = "position"
+
+
+class OrderLatencySpan(Enum):
+    SIGNAL_TO_SEND = (OrderLatencyStage.SIGNAL, OrderLatencyStage.SEND)
+    SEND_TO_ACK = (OrderLatencyStage.SEND, OrderLatencyStage.ACK)
+    ACK_TO_FILL = (OrderLatencyStage.ACK, OrderLatencyStage.FILL)
+    FILL_TO_COMPLETED = (OrderLatencyStage.FILL, OrderLatencyStage.COMPLETED)
+    FILL_TO_POSITION = (OrderLatencyStage.FILL, OrderLatencyStage.POSITION)
+
+    @property
+    def start(self) -> OrderLatencyStage:
+        return self.value[0]
+
+    @property
+    def end(self) -> OrderLatencyStage:
+        return self.value[1]
+
+    @property
+    def key(self) -> str:
+        return f"{self.start.value}_to_{self.end.value}"
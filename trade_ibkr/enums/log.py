@@ -0,0 +1,12 @@
+from enum import IntEnum
+
+
+class LogLevel(IntEnum):
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+    @staticmethod
+    def from_name(name: str) -> "LogLevel":
+        return LogLevel[name.upper()]
@@ -7,6 +7,7 @@ class PxDataCol:
     VOLUME = "volume"
 
     VWAP = "vwap"
+    VWAP_STDEV = "vwap_stdev"
 
     AMPLITUDE_HL = "amplitude_hl"
 
@@ -27,8 +28,6 @@ class PxDataCol:
     LOCAL_MIN = "local_min"
     LOCAL_MAX = "local_max"
 
-    PRICE_TIMES_VOLUME = "price_times_volume"
-
     @staticmethod
     def get_sma_col_name(period: int) -> str:
         return f"sma_{period}"
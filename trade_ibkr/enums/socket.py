@@ -1,9 +1,12 @@
 class SocketEvent:
     INIT = "init"
+    SUBSCRIBE = "subscribe"
 
     PX_INIT = "pxInit"
     PX_UPDATED = "pxUpdated"
     PX_UPDATED_MARKET = "pxUpdatedMarket"
+    PX_SUBSCRIBE = "pxSubscribe"
+    PX_UNSUBSCRIBE = "pxUnsubscribe"
 
     POSITION = "position"
 
@@ -15,4 +18,6 @@ class SocketEvent:
     EXECUTION = "execution"
     PNL_UPDATED = "pnlUpdated"
 
+    LATENCY_ORDER = "latencyOrder"
+
     ERROR = "error"
@@ -0,0 +1,4 @@
+from .client import FakeTwsClient, make_fake_tws_app
+from .config import FakeTwsConfig, FakeTwsContract
+from .main import FakeTws
+from .server import FakeTwsServer
@@ -0,0 +1,132 @@
+from typing import Type, TypeVar
+
+from ibapi.client import EClient
+from ibapi.common import OrderId, TagValueList, TickerId
+from ibapi.contract import Contract
+from ibapi.execution import ExecutionFilter
+from ibapi.order import Order
+
+from .main import FakeTws
+
+
+class FakeTwsClient(EClient):
+    """
+    ``EClient`` which sends the requests to :class:`FakeTws` instead of TWS.
+
+    Use :func:`make_fake_tws_app` to make an app class using this client.
+    """
+
+    _fake_tws: FakeTws | None = None
+
+    @property
+    def fake_tws(self) -> FakeTws:
+        # Lazily created because `EClient.__init__()` calls `reset()` before anything else
+        if self._fake_tws is None:
+            self._fake_tws = FakeTws()
+
+        return self._fake_tws
+
+    def use_fake_tws(self, fake_tws: FakeTws):
+        """Use ``fake_tws`` for this client. Must be called before :meth:`connect`."""
+        self._fake_tws = fake_tws
+
+    # region Connection
+
+    def connect(self, host, port, clientId):
+        self.host = host
+        self.port = port
+        self.clientId = clientId
+
+        self.setConnState(EClient.CONNECTED)
+        self.fake_tws.attach(self.wrapper)
+        self.fake_tws.on_connected()
+
+    def isConnected(self):
+        return self.connState == EClient.CONNECTED
+
+    def disconnect(self):
+        if not self.isConnected():
+            return
+
+        self.setConnState(EClient.DISCONNECTED)
+        self.fake_tws.scheduler.stop()
+        self.wrapper.connectionClosed()
+
+    def run(self):
+        self.fake_tws.scheduler.run()
+
+    def reqIds(self, numIds: int):
+        self.fake_tws.req_ids()
+
+    # endregion
+
+    # region Market data
+
+    def reqContractDetails(self, reqId: int, contract: Contract):
+        self.fake_tws.req_contract_details(reqId, contract)
+
+    def reqHistoricalData(
+            self, reqId: TickerId, contract: Contract, endDateTime: str,
+            durationStr: str, barSizeSetting: str, whatToShow: str,
+            useRTH: int, formatDate: int, keepUpToDate: bool, chartOptions: TagValueList
+    ):
+        self.fake_tws.req_historical_data(reqId, contract, durationStr, barSizeSetting, keepUpToDate)
+
+    def cancelHistoricalData(self, reqId: TickerId):
+        self.fake_tws.cancel_historical_data(reqId)
+
+    def reqMktData(
+            self, reqId: TickerId, contract: Contract, genericTickList: str,
+            snapshot: bool, regulatorySnapshot: bool, mktDataOptions: TagValueList
+    ):
+        self.fake_tws.req_mkt_data(reqId, contract)
+
+    def cancelMktData(self, reqId: TickerId):
+        self.fake_tws.cancel_mkt_data(reqId)
+
+    # endregion
+
+    # region Orders
+
+    def placeOrder(self, orderId: OrderId, contract: Contract, order: Order):
+        self.fake_tws.place_order(orderId, contract, order)
+
+    def cancelOrder(self, orderId: OrderId):
+        self.fake_tws.cancel_order(orderId)
+
+    def reqOpenOrders(self):
+        self.fake_tws.req_open_orders()
+
+    def reqAllOpenOrders(self):
+        self.fake_tws.req_open_orders()
+
+    def reqCompletedOrders(self, apiOnly: bool):
+        self.fake_tws.req_completed_orders()
+
+    # endregion
+
+    # region Portfolio
+
+    def reqPositions(self):
+        self.fake_tws.req_positions()
+
+    def reqExecutions(self, reqId: int, execFilter: ExecutionFilter):
+        self.fake_tws.req_executions(reqId)
+
+    def reqPnLSingle(self, reqId: int, account: str, modelCode: str, conid: int):
+        # PnL is not simulated
+        pass
+
+    # endregion
+
+
+T = TypeVar("T", bound=EClient)
+
+
+def make_fake_tws_app(app_cls: Type[T]) -> Type[T]:
+    """
+    Make a subclass of ``app_cls`` sending its requests to :class:`FakeTws`.
+
+    :class:`FakeTwsClient` is placed before ``EClient`` in the MRO, so the overrides in ``app_cls`` still run.
+    """
+    return type(f"FakeTws{app_cls.__name__}", (app_cls, FakeTwsClient), {})
@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+
+from ibapi.contract import Contract, ContractDetails
+
+from trade_ibkr.utils import get_basic_contract_symbol
+
+
+@dataclass(kw_only=True)
+class FakeTwsContract:
+    con_id: int
+    symbol: str
+    local_symbol: str
+    sec_type: str = "FUT"
+    exchange: str
+    currency: str = "USD"
+    multiplier: str = ""
+    min_tick: float
+
+    # Directory containing the archived bars to replay, the finest bars in it are used
+    archive_dir: str
+
+    def matches(self, contract: Contract) -> bool:
+        if contract.conId:
+            return contract.conId == self.con_id
+
+        return get_basic_contract_symbol(contract) in (self.local_symbol, self.symbol)
+
+    def to_contract(self) -> Contract:
+        contract = Contract()
+        contract.conId = self.con_id
+        contract.symbol = self.symbol
+        contract.localSymbol = self.local_symbol
+        contract.secType = self.sec_type
+        contract.exchange = self.exchange
+        contract.currency = self.currency
+        contract.multiplier = self.multiplier
+
+        return contract
+
+    def to_contract_details(self) -> ContractDetails:
+        contract_details = ContractDetails()
+        contract_details.contract = self.to_contract()
+        contract_details.marketName = self.symbol
+        contract_details.minTick = self.min_tick
+        contract_details.timeZoneId = "US/Central"
+
+        return contract_details
+
+
+def _default_contracts() -> list[FakeTwsContract]:
+    # Covers the contracts in `config-base.yaml`
+    return [
+        FakeTwsContract(
+            con_id=461318792, symbol="MNQ", local_symbol="MNQH2", exchange="GLOBEX",
+            multiplier="2", min_tick=0.25, archive_dir="archive/futures/NQ",
+        ),
+        FakeTwsContract(
+            con_id=477837024, symbol="MNQ", local_symbol="MNQM2", exchange="GLOBEX",
+            multiplier="2", min_tick=0.25, archive_dir="archive/futures/NQ",
+        ),
+        FakeTwsContract(
+            con_id=477836934, symbol="MYM", local_symbol="MYM  JUN 22", exchange="ECBOT",
+            multiplier="0.5", min_tick=1, archive_dir="archive/futures/YM",
+        ),
+        FakeTwsContract(
+            con_id=416904, symbol="SPX", local_symbol="SPX", sec_type="IND", exchange="CBOE",
+            min_tick=0.01, archive_dir="archive/futures/ES",
+        ),
+        FakeTwsContract(
+            con_id=1935181, symbol="INDU", local_symbol="INDU", sec_type="IND", exchange="CME",
+            min_tick=0.01, archive_dir="archive/futures/YM",
+        ),
+    ]
+
+
+@dataclass(kw_only=True)
+class FakeTwsConfig:
+    account: str = "DU0000000"
+    next_valid_order_id: int = 1
+
+    # Delays of the simulated TWS responses
+    ack_delay_sec: float = 0.002
+    fill_delay_sec: float = 0.005
+    response_delay_sec: float = 0.001
+
+    # Fill Px of market orders if no market Px is available for the contract
+    default_px: float = 100.
+    # Fill limit orders immediately like market orders, otherwise they stay working
+    fill_limit_orders: bool = True
+
+    contracts: list[FakeTwsContract] = field(default_factory=_default_contracts)
+
+    # Ratio of the archived bars returned as history, the rest are replayed as ticks
+    history_ratio: float = 0.8
+    # Ticks replayed per second for each contract
+    tick_rate_per_sec: float = 4
+    # Ticks generated from each archived bar (open > low / high > high / low > close)
+    ticks_per_bar: int = 4
+    # Send `historicalDataUpdate` once every N ticks
+    bar_update_every_n_ticks: int = 1
+    # Restart from the beginning of the replay bars after all of them are replayed
+    loop_replay: bool = True
@@ -0,0 +1,502 @@
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, DefaultDict
+
+from ibapi.commission_report import CommissionReport
+from ibapi.common import BarData, TickAttrib
+from ibapi.contract import Contract
+from ibapi.execution import Execution
+from ibapi.order import Order
+from ibapi.order_state import OrderState
+from ibapi.ticktype import TickTypeEnum
+
+from .config import FakeTwsConfig, FakeTwsContract
+from .scheduler import FakeTwsScheduler
+from .series import FakeTwsBar, FakeTwsSeries, FakeTwsTick, parse_bar_size_sec, parse_duration_sec
+
+
+@dataclass(kw_only=True)
+class FakeTwsOrder:
+    order_id: int
+    perm_id: int
+    contract: Contract
+    order: Order
+
+    status: str = "PendingSubmit"
+    filled: Decimal = field(default=Decimal(0))
+    avg_fill_px: float = 0
+
+    @property
+    def remaining(self) -> Decimal:
+        return Decimal(self.order.totalQuantity) - self.filled
+
+    @property
+    def is_done(self) -> bool:
+        return self.status in ("Filled", "Cancelled")
+
+
+@dataclass(kw_only=True)
+class FakeTwsPosition:
+    contract: Contract
+    position: Decimal = field(default=Decimal(0))
+    avg_cost: float = 0
+
+
+def _get_bar_date(period_sec: int, offset: int = 0) -> str:
+    """Get the date string of the bar ``offset`` bars before the current bar, formatted as ``formatDate=2``."""
+    if period_sec >= 86400:
+        return (date.today() - timedelta(days=offset)).strftime("%Y%m%d")
+
+    return str(int(time.time()) // period_sec * period_sec - offset * period_sec)
+
+
+def _to_bar_data(bar_date: str, bar: FakeTwsBar) -> BarData:
+    bar_data = BarData()
+    bar_data.date = bar_date
+    bar_data.open = bar.open
+    bar_data.high = bar.high
+    bar_data.low = bar.low
+    bar_data.close = bar.close
+    bar_data.volume = Decimal(int(bar.volume))
+    bar_data.wap = Decimal(bar.close)
+    bar_data.barCount = 1
+
+    return bar_data
+
+
+@dataclass(kw_only=True)
+class FakeTwsHistoricalSubscription:
+    con_id: int
+    period_sec: int
+    bar: BarData
+
+    def update(self, tick: FakeTwsTick):
+        bar_date = _get_bar_date(self.period_sec)
+
+        if bar_date != self.bar.date:
+            self.bar = _to_bar_data(bar_date, FakeTwsBar(
+                open=tick.px, high=tick.px, low=tick.px, close=tick.px, volume=tick.volume
+            ))
+            return
+
+        self.bar.high = max(self.bar.high, tick.px)
+        self.bar.low = min(self.bar.low, tick.px)
+        self.bar.close = tick.px
+        self.bar.volume += Decimal(int(tick.volume))
+        self.bar.barCount += 1
+
+
+class FakeTws:
+    """
+    Simulated TWS for running the app without connecting to the actual TWS.
+
+    Requests are made by calling the methods of this class, and the responses are delivered by calling
+    the ``EWrapper`` methods of the attached sink on the scheduler thread.
+
+    Market data is replayed from the archived bars. The earlier part of the bars is returned as the history
+    (re-timestamped to end at the current bar), and the rest is replayed as ticks at the configured rate,
+    which update the market data and the bars of the keep-updated historical data requests.
+    """
+
+    def __init__(self, config: FakeTwsConfig | None = None):
+        self.config = config or FakeTwsConfig()
+        self.scheduler = FakeTwsScheduler()
+
+        self._lock = threading.RLock()
+        self._sink: Any = None
+
+        self._next_order_id = self.config.next_valid_order_id
+        self._next_perm_id = 1000000
+        self._next_exec_id = 1
+
+        self._orders: dict[int, FakeTwsOrder] = {}
+        self._positions: dict[int, FakeTwsPosition] = {}
+        self._executions: list[tuple[Contract, Execution, CommissionReport]] = []
+
+        self._series: dict[int, FakeTwsSeries] = {}
+        self._mkt_subs: dict[int, int] = {}  # Request ID to contract ID
+        self._historical_subs: dict[int, FakeTwsHistoricalSubscription] = {}
+        self._replaying: set[int] = set()
+        self._tick_count: DefaultDict[int, int] = defaultdict(int)
+
+    # region Dispatching
+
+    def attach(self, sink: Any):
+        """``sink`` receives the responses by having its ``EWrapper`` methods called."""
+        self._sink = sink
+
+    def _emit(self, callback_name: str, *args, delay_sec: float | None = None):
+        if not self._sink:
+            return
+
+        self.scheduler.call_later(
+            self.config.response_delay_sec if delay_sec is None else delay_sec,
+            getattr(self._sink, callback_name),
+            *args,
+        )
+
+    # endregion
+
+    # region Connection
+
+    def on_connected(self):
+        self._emit("managedAccounts", self.config.account)
+        self._emit("nextValidId", self._next_order_id)
+
+    def req_ids(self):
+        with self._lock:
+            self._emit("nextValidId", self._next_order_id)
+
+    # endregion
+
+    # region Orders
+
+    def _get_fill_px(self, contract: Contract, order: Order) -> float:
+        if order.orderType == "LMT":
+            return order.lmtPrice
+
+        if order.orderType in ("STP", "STP LMT"):
+            return order.auxPrice
+
+        if series := self._series.get(contract.conId):
+            return series.last_px
+
+        return self.config.default_px
+
+    def _should_fill(self, order: Order) -> bool:
+        if order.parentId:
+            # Take profit / stop loss of a bracket order, leave them working
+            return False
+
+        if order.orderType == "MKT":
+            return True
+
+        return self.config.fill_limit_orders and order.orderType == "LMT"
+
+    def _order_status(self, fake_order: FakeTwsOrder):
+        self._sink.orderStatus(
+            fake_order.order_id, fake_order.status, fake_order.filled, fake_order.remaining,
+            fake_order.avg_fill_px, fake_order.perm_id, fake_order.order.parentId,
+            fake_order.avg_fill_px, 0, "", 0.
+        )
+
+    def _ack_order(self, order_id: int):
+        with self._lock:
+            fake_order = self._orders[order_id]
+
+            if fake_order.is_done:
+                return
+
+            fake_order.status = "Submitted" if fake_order.order.transmit or fake_order.order.parentId else "PreSubmitted"
+
+        order_state = OrderState()
+        order_state.status = fake_order.status
+
+        self._sink.openOrder(order_id, fake_order.contract, fake_order.order, order_state)
+        self._order_status(fake_order)
+
+    def _fill_order(self, order_id: int):
+        with self._lock:
+            fake_order = self._orders[order_id]
+
+            if fake_order.is_done:
+                return
+
+            fill_px = self._get_fill_px(fake_order.contract, fake_order.order)
+            quantity = fake_order.remaining
+
+            fake_order.status = "Filled"
+            fake_order.filled += quantity
+            fake_order.avg_fill_px = fill_px
+
+            realized_pnl = self._update_position(fake_order, quantity, fill_px)
+            execution, commission_report = self._record_execution(fake_order, quantity, fill_px, realized_pnl)
+
+        self._order_status(fake_order)
+        self._sink.execDetails(-1, fake_order.contract, execution)
+        self._sink.commissionReport(commission_report)
+
+    def _update_position(self, fake_order: FakeTwsOrder, quantity: Decimal, fill_px: float) -> float | None:
+        con_id = fake_order.contract.conId
+        multiplier = float(fake_order.contract.multiplier or 1)
+        signed_qty = quantity if fake_order.order.action == "BUY" else -quantity
+
+        position = self._positions.setdefault(con_id, FakeTwsPosition(contract=fake_order.contract))
+
+        realized_pnl = None
+        if position.position and (position.position > 0) != (signed_qty > 0):
+            # Reducing / reversing the position
+            closing_qty = min(abs(position.position), abs(signed_qty))
+            avg_px = position.avg_cost / multiplier
+            realized_pnl = float(closing_qty) * (fill_px - avg_px) * multiplier * (1 if position.position > 0 else -1)
+
+        new_position = position.position + signed_qty
+
+        if not new_position:
+            position.avg_cost = 0
+        elif not position.position or (new_position > 0) != (position.position > 0):
+            # Opened / reversed
+            position.avg_cost = fill_px * multiplier
+        elif abs(new_position) > abs(position.position):
+            # Added to the position
+            position.avg_cost = float(
+                (Decimal(position.avg_cost) * abs(position.position) + Decimal(fill_px * multiplier) * quantity)
+                / abs(new_position)
+            )
+
+        position.position = new_position
+
+        return realized_pnl
+
+    def _record_execution(
+            self, fake_order: FakeTwsOrder, quantity: Decimal, fill_px: float, realized_pnl: float | None
+    ) -> tuple[Execution, CommissionReport]:
+        execution = Execution()
+        execution.execId = f"fake.{self._next_exec_id:08d}"
+        execution.time = datetime.now().strftime("%Y%m%d  %H:%M:%S")
+        execution.acctNumber = self.config.account
+        execution.side = "BOT" if fake_order.order.action == "BUY" else "SLD"
+        execution.shares = quantity
+        execution.price = fill_px
+        execution.permId = fake_order.perm_id
+        execution.orderId = fake_order.order_id
+        execution.cumQty = fake_order.filled
+        execution.avgPrice = fill_px
+        self._next_exec_id += 1
+
+        commission_report = CommissionReport()
+        commission_report.execId = execution.execId
+        commission_report.commission = 0.
+        commission_report.currency = "USD"
+        # IB uses max float for unavailable realized PnL
+        commission_report.realizedPNL = 1.7976931348623157e308 if realized_pnl is None else realized_pnl
+
+        self._executions.append((fake_order.contract, execution, commission_report))
+
+        return execution, commission_report
+
+    def place_order(self, order_id: int, contract: Contract, order: Order):
+        with self._lock:
+            if existing := self._orders.get(order_id):
+                # Order modification
+                existing.order = order
+                return
+
+            self._orders[order_id] = FakeTwsOrder(
+                order_id=order_id,
+                perm_id=self._next_perm_id,
+                contract=contract,
+                order=order,
+            )
+            self._next_perm_id += 1
+            self._next_order_id = max(self._next_order_id, order_id + 1)
+
+        self.scheduler.call_later(self.config.ack_delay_sec, self._ack_order, order_id)
+
+        if self._should_fill(order):
+            self.scheduler.call_later(self.config.ack_delay_sec + self.config.fill_delay_sec, self._fill_order, order_id)
+
+    def cancel_order(self, order_id: int):
+        with self._lock:
+            if not (fake_order := self._orders.get(order_id)) or fake_order.is_done:
+                self._emit("error", order_id, 202, "Order Canceled - reason:")
+                return
+
+            fake_order.status = "Cancelled"
+
+        self.scheduler.call_later(self.config.response_delay_sec, self._order_status, fake_order)
+
+    def req_open_orders(self):
+        with self._lock:
+            working = [fake_order for fake_order in self._orders.values() if not fake_order.is_done]
+
+        for fake_order in working:
+            order_state = OrderState()
+            order_state.status = fake_order.status
+            self._emit("openOrder", fake_order.order_id, fake_order.contract, fake_order.order, order_state)
+
+        self._emit("openOrderEnd")
+
+    def req_completed_orders(self):
+        with self._lock:
+            done = [fake_order for fake_order in self._orders.values() if fake_order.is_done]
+
+        for fake_order in done:
+            order = fake_order.order
+            order.permId = fake_order.perm_id
+            order.filledQuantity = fake_order.filled
+
+            order_state = OrderState()
+            order_state.status = fake_order.status
+            order_state.completedStatus = fake_order.status
+            order_state.completedTime = time.strftime("%Y%m%d %H:%M:%S")
+
+            self._emit("completedOrder", fake_order.contract, order, order_state)
+
+        self._emit("completedOrdersEnd")
+
+    # endregion
+
+    # region Market data
+
+    def _get_contract(self, contract: Contract) -> FakeTwsContract | None:
+        return next((fake_contract for fake_contract in self.config.contracts if fake_contract.matches(contract)), None)
+
+    def _get_series(self, fake_contract: FakeTwsContract) -> FakeTwsSeries:
+        with self._lock:
+            if not (series := self._series.get(fake_contract.con_id)):
+                series = FakeTwsSeries.from_archive(
+                    fake_contract.archive_dir,
+                    history_ratio=self.config.history_ratio,
+                    ticks_per_bar=self.config.ticks_per_bar,
+                    loop_replay=self.config.loop_replay,
+                )
+                self._series[fake_contract.con_id] = series
+
+            return series
+
+    def _emit_no_security(self, req_id: int):
+        self._emit("error", req_id, 200, "No security definition has been found for the request")
+
+    def req_contract_details(self, req_id: int, contract: Contract):
+        if not (fake_contract := self._get_contract(contract)):
+            self._emit_no_security(req_id)
+            return
+
+        self._emit("contractDetails", req_id, fake_contract.to_contract_details())
+        self._emit("contractDetailsEnd", req_id)
+
+    def req_historical_data(self, req_id: int, contract: Contract, duration: str, bar_size: str, keep_update: bool):
+        if not (fake_contract := self._get_contract(contract)):
+            self._emit_no_security(req_id)
+            return
+
+        period_sec = parse_bar_size_sec(bar_size)
+        bars = self._get_series(fake_contract).get_history(
+            period_sec=period_sec,
+            count=max(1, parse_duration_sec(duration) // period_sec),
+        )
+        bar_data_list = [
+            _to_bar_data(_get_bar_date(period_sec, len(bars) - idx - 1), bar)
+            for idx, bar in enumerate(bars)
+        ]
+
+        # The last bar is the current bar, which keeps being updated by the replay
+        historical_sub = FakeTwsHistoricalSubscription(
+            con_id=fake_contract.con_id,
+            period_sec=period_sec,
+            bar=_to_bar_data(bar_data_list[-1].date, bars[-1]),
+        ) if keep_update else None
+
+        self.scheduler.call_later(
+            self.config.response_delay_sec, self._send_historical_data, req_id, bar_data_list, historical_sub
+        )
+
+    def _send_historical_data(
+            self, req_id: int, bar_data_list: list[BarData], historical_sub: FakeTwsHistoricalSubscription | None
+    ):
+        # TWS sends all bars in a single message, so no other message gets in between
+        for bar_data in bar_data_list:
+            self._sink.historicalData(req_id, bar_data)
+
+        self._sink.historicalDataEnd(req_id, bar_data_list[0].date, bar_data_list[-1].date)
+
+        if not historical_sub:
+            return
+
+        # Updates only start after the history is sent
+        with self._lock:
+            self._historical_subs[req_id] = historical_sub
+
+        self._start_replay(historical_sub.con_id)
+
+    def cancel_historical_data(self, req_id: int):
+        with self._lock:
+            self._historical_subs.pop(req_id, None)
+
+    def req_mkt_data(self, req_id: int, contract: Contract):
+        if not (fake_contract := self._get_contract(contract)):
+            self._emit_no_security(req_id)
+            return
+
+        self._get_series(fake_contract)
+
+        with self._lock:
+            self._mkt_subs[req_id] = fake_contract.con_id
+
+        self._start_replay(fake_contract.con_id)
+
+    def cancel_mkt_data(self, req_id: int):
+        with self._lock:
+            self._mkt_subs.pop(req_id, None)
+
+    def _start_replay(self, con_id: int):
+        with self._lock:
+            if con_id in self._replaying:
+                return
+
+            self._replaying.add(con_id)
+
+        self.scheduler.call_later(1 / self.config.tick_rate_per_sec, self._replay_tick, con_id)
+
+    def _schedule_next_tick(self, con_id: int):
+        # Scheduled from the due time of the current tick instead of now, so the tick rate does not drift
+        # with the time spent by the sink. Ticks are sent back-to-back if the sink falls behind.
+        due = (self.scheduler.current_due or time.perf_counter()) + 1 / self.config.tick_rate_per_sec
+
+        self.scheduler.call_at(due, self._replay_tick, con_id)
+
+    def _replay_tick(self, con_id: int):
+        with self._lock:
+            mkt_req_ids = [req_id for req_id, sub_con_id in self._mkt_subs.items() if sub_con_id == con_id]
+            historical_subs = [(req_id, sub) for req_id, sub in self._historical_subs.items() if sub.con_id == con_id]
+
+            if not self._sink or (not mkt_req_ids and not historical_subs) or not (
+                    tick := self._series[con_id].next_tick()
+            ):
+                # No subscriber or nothing left to replay
+                self._replaying.discard(con_id)
+                return
+
+            self._tick_count[con_id] += 1
+            send_bar_update = self._tick_count[con_id] % self.config.bar_update_every_n_ticks == 0
+
+        for req_id in mkt_req_ids:
+            self._sink.tickPrice(req_id, TickTypeEnum.LAST, tick.px, TickAttrib())
+
+        for req_id, historical_sub in historical_subs:
+            historical_sub.update(tick)
+
+            if send_bar_update:
+                self._sink.historicalDataUpdate(req_id, historical_sub.bar)
+
+        self._schedule_next_tick(con_id)
+
+    # endregion
+
+    # region Portfolio
+
+    def req_positions(self):
+        with self._lock:
+            positions = list(self._positions.values())
+
+        for position in positions:
+            self._emit("position", self.config.account, position.contract, position.position, position.avg_cost)
+
+        self._emit("positionEnd")
+
+    def req_executions(self, req_id: int):
+        with self._lock:
+            executions = list(self._executions)
+
+        for contract, execution, commission_report in executions:
+            self._emit("execDetails", req_id, contract, execution)
+            self._emit("commissionReport", commission_report)
+
+        self._emit("execDetailsEnd", req_id)
+
+    # endregion
@@ -0,0 +1,61 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable
+
+
+class FakeTwsScheduler:
+    """
+    Runs the scheduled callbacks in order of their due time on the thread calling :meth:`run`.
+
+    This mimics the reader thread of ``EClient``, so the callbacks reach the wrapper on a single thread.
+    """
+
+    def __init__(self):
+        self._queue: list[tuple[float, int, Callable[..., Any], tuple]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        # Due time of the callback being run, in `time.perf_counter()`
+        self.current_due: float | None = None
+
+    def call_at(self, due: float, fn: Callable[..., Any], *args):
+        """Run ``fn`` at ``due``, which is in ``time.perf_counter()``."""
+        with self._cond:
+            heapq.heappush(self._queue, (due, next(self._seq), fn, args))
+            self._cond.notify()
+
+    def call_later(self, delay_sec: float, fn: Callable[..., Any], *args):
+        self.call_at(time.perf_counter() + delay_sec, fn, *args)
+
+    def call_soon(self, fn: Callable[..., Any], *args):
+        self.call_later(0, fn, *args)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._queue)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def run(self):
+        self._stopped = False
+
+        while True:
+            with self._cond:
+                while not self._stopped and (
+                        not self._queue or self._queue[0][0] > time.perf_counter()
+                ):
+                    self._cond.wait(self._queue[0][0] - time.perf_counter() if self._queue else None)
+
+                if self._stopped:
+                    return
+
+                due, _, fn, args = heapq.heappop(self._queue)
+
+            self.current_due = due
+            fn(*args)
@@ -0,0 +1,188 @@
+import csv
+import os
+import re
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from trade_ibkr.utils import print_log
+
+# Archived file name is `<start>-<end>-<period in minutes>.csv`
+_ARCHIVE_FILE_NAME = re.compile(r"^\d{8}-\d{8}-(\d+)\.csv$")
+
+_DURATION_UNIT_SEC: dict[str, int] = {"S": 1, "D": 86400, "W": 604800, "M": 2592000, "Y": 31536000}
+
+_BAR_SIZE_UNIT_SEC: dict[str, int] = {
+    "sec": 1, "secs": 1, "min": 60, "mins": 60, "hour": 3600, "hours": 3600,
+    "day": 86400, "days": 86400, "week": 604800, "weeks": 604800,
+}
+
+
+class FakeTwsBar(NamedTuple):
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class FakeTwsTick(NamedTuple):
+    px: float
+    volume: float
+
+
+def parse_duration_sec(duration: str) -> int:
+    """Parse the duration string of ``reqHistoricalData()`` such as ``86400 S`` or ``10 D``."""
+    count, unit = duration.split()
+
+    return int(count) * _DURATION_UNIT_SEC[unit]
+
+
+def parse_bar_size_sec(bar_size: str) -> int:
+    """Parse the bar size string of ``reqHistoricalData()`` such as ``5 mins`` or ``1 day``."""
+    count, unit = bar_size.split()
+
+    return int(count) * _BAR_SIZE_UNIT_SEC[unit]
+
+
+def _find_finest_archive_file(archive_dir: str) -> tuple[str, int]:
+    candidates: list[tuple[int, str]] = []
+
+    for file_name in os.listdir(archive_dir):
+        if not (match := _ARCHIVE_FILE_NAME.match(file_name)):
+            continue
+
+        candidates.append((int(match.group(1)) * 60, file_name))
+
+    if not candidates:
+        raise ValueError(f"No archived bars available in {archive_dir}")
+
+    # Finest period, then the latest file
+    period_sec = min(period_sec for period_sec, _ in candidates)
+    file_name = max(file_name for candidate_period_sec, file_name in candidates if candidate_period_sec == period_sec)
+
+    return os.path.join(archive_dir, file_name), period_sec
+
+
+def _load_archive_bars(file_path: str) -> list[FakeTwsBar]:
+    with open(file_path, "r", newline="") as f:
+        return [
+            FakeTwsBar(
+                open=float(row["open"]),
+                high=float(row["high"]),
+                low=float(row["low"]),
+                close=float(row["close"]),
+                volume=float(row.get("volume") or row.get("Volume") or 0),
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+def _merge_bars(bars: list[FakeTwsBar]) -> FakeTwsBar:
+    return FakeTwsBar(
+        open=bars[0].open,
+        high=max(bar.high for bar in bars),
+        low=min(bar.low for bar in bars),
+        close=bars[-1].close,
+        volume=sum(bar.volume for bar in bars),
+    )
+
+
+@dataclass(kw_only=True)
+class FakeTwsSeries:
+    """
+    Archived bars of a contract, split into the history part and the replay part.
+
+    Bars of any period are derived from the finest archived bars, so the Px of all periods are consistent.
+    """
+
+    base_period_sec: int
+    history: list[FakeTwsBar]
+    replay: list[FakeTwsBar]
+
+    ticks_per_bar: int
+    loop_replay: bool
+
+    last_px: float = field(init=False)
+
+    _replay_idx: int = field(init=False, default=0)
+    _tick_idx: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        self.last_px = self.history[-1].close
+
+    @staticmethod
+    def from_archive(
+            archive_dir: str, *, history_ratio: float, ticks_per_bar: int, loop_replay: bool
+    ) -> "FakeTwsSeries":
+        file_path, base_period_sec = _find_finest_archive_file(archive_dir)
+        bars = _load_archive_bars(file_path)
+        split_idx = max(1, min(len(bars) - 1, int(len(bars) * history_ratio)))
+
+        print_log(f"[Fake TWS] Loaded {len(bars)} bars from {file_path} for replay")
+
+        return FakeTwsSeries(
+            base_period_sec=base_period_sec,
+            history=bars[:split_idx],
+            replay=bars[split_idx:],
+            ticks_per_bar=ticks_per_bar,
+            loop_replay=loop_replay,
+        )
+
+    def get_history(self, *, period_sec: int, count: int) -> list[FakeTwsBar]:
+        """
+        Get the latest ``count`` history bars of ``period_sec``, aggregated from the base bars.
+
+        If the archive is too short for ``count`` bars, the aggregated bars are repeated backward, shifted to
+        connect to the bars after them, so requests like 360 days of daily bars are still fulfilled.
+        """
+        group_size = max(1, period_sec // self.base_period_sec)
+        history = self.history
+
+        # Align the groups to the last bar
+        bars = [
+            _merge_bars(history[max(0, end - group_size):end])
+            for end in range(len(history), max(0, len(history) - count * group_size), -group_size)
+        ]
+        aggregated = bars.copy()
+
+        while len(bars) < count:
+            # `bars` is in reversed order, so `bars[-1]` is the earliest bar
+            offset = bars[-1].open - aggregated[0].close
+            bars.extend(
+                FakeTwsBar(
+                    open=bar.open + offset, high=bar.high + offset, low=bar.low + offset, close=bar.close + offset,
+                    volume=bar.volume,
+                )
+                for bar in aggregated[:count - len(bars)]
+            )
+
+        return bars[::-1]
+
+    def next_tick(self) -> FakeTwsTick | None:
+        """Get the next replayed tick. Returns ``None`` if all bars are replayed and no looping."""
+        if self._replay_idx >= len(self.replay):
+            if not self.loop_replay:
+                return None
+
+            self._replay_idx = 0
+
+        bar = self.replay[self._replay_idx]
+
+        # Bullish bar goes to the low first, otherwise the high first
+        path = (bar.open, bar.low, bar.high, bar.close) if bar.close >= bar.open else \
+            (bar.open, bar.high, bar.low, bar.close)
+        px = path[min(len(path) - 1, self._tick_idx * len(path) // self.ticks_per_bar)]
+
+        if self._tick_idx == self.ticks_per_bar - 1:
+            # Ensure the close is always replayed
+            px = bar.close
+
+        tick = FakeTwsTick(px=px, volume=bar.volume / self.ticks_per_bar)
+        self.last_px = px
+
+        self._tick_idx += 1
+        if self._tick_idx >= self.ticks_per_bar:
+            self._tick_idx = 0
+            self._replay_idx += 1
+
+        return tick
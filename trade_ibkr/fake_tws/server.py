@@ -0,0 +1,120 @@
+import socketserver
+import struct
+import threading
+import time
+
+from trade_ibkr.utils import print_log, print_warning
+from .config import FakeTwsConfig
+from .main import FakeTws
+from .wire import FakeTwsWireRequestHandler, FakeTwsWireSink, SERVER_VERSION, make_message
+
+_API_PREFIX = b"API\0"
+
+
+class _ConnectionClosed(Exception):
+    pass
+
+
+class _FakeTwsConnectionHandler(socketserver.BaseRequestHandler):
+    server: "_FakeTwsTcpServer"
+
+    def _recv_exact(self, size: int) -> bytes:
+        buffer = b""
+
+        while len(buffer) < size:
+            if not (chunk := self.request.recv(size - len(buffer))):
+                raise _ConnectionClosed()
+
+            buffer += chunk
+
+        return buffer
+
+    def _recv_message(self) -> bytes:
+        size = struct.unpack("!I", self._recv_exact(4))[0]
+
+        return self._recv_exact(size)
+
+    def _handshake(self):
+        if self._recv_exact(len(_API_PREFIX)) != _API_PREFIX:
+            raise _ConnectionClosed()
+
+        # Supported client versions, the server version is always `SERVER_VERSION`
+        self._recv_message()
+
+        self.request.sendall(make_message(SERVER_VERSION, time.strftime("%Y%m%d %H:%M:%S")))
+
+    def handle(self):
+        fake_tws = FakeTws(self.server.config)
+        send_lock = threading.Lock()
+
+        def send(message: bytes):
+            try:
+                with send_lock:
+                    self.request.sendall(message)
+            except OSError:
+                fake_tws.scheduler.stop()
+
+        fake_tws.attach(FakeTwsWireSink(send))
+        request_handler = FakeTwsWireRequestHandler(fake_tws)
+
+        try:
+            self._handshake()
+        except (_ConnectionClosed, OSError):
+            return
+
+        print_log(f"[Fake TWS] Client connected from {self.client_address}")
+        threading.Thread(target=fake_tws.scheduler.run, daemon=True).start()
+
+        try:
+            while True:
+                fields = self._recv_message().split(b"\0")[:-1]
+
+                if fields and not request_handler.handle(fields):
+                    print_warning(f"[Fake TWS] Unsupported request ignored (#{fields[0].decode()})")
+        except (_ConnectionClosed, OSError):
+            pass
+        finally:
+            fake_tws.scheduler.stop()
+            print_log(f"[Fake TWS] Client disconnected from {self.client_address}")
+
+
+class _FakeTwsTcpServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: FakeTwsConfig):
+        super().__init__(address, _FakeTwsConnectionHandler)
+
+        self.config = config
+
+
+class FakeTwsServer:
+    """
+    Serves :class:`FakeTws` over the TWS API wire protocol, so the apps can connect to it like the actual TWS.
+
+    Each connection gets its own :class:`FakeTws`, therefore the orders and positions are not shared
+    across the connections.
+    """
+
+    def __init__(self, *, port: int, host: str = "localhost", config: FakeTwsConfig | None = None):
+        self._server = _FakeTwsTcpServer((host, port), config or FakeTwsConfig())
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def serve_forever(self):
+        print_log(f"[Fake TWS] Listening on port {self.port}")
+        self._server.serve_forever()
+
+    def start(self) -> threading.Thread:
+        """Serve on a background thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+
+        return thread
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
@@ -0,0 +1,312 @@
+"""
+Subset of the TWS API wire protocol for serving :class:`FakeTws` over a socket.
+
+Messages are encoded / decoded for the server version ``SERVER_VERSION``, matching the field order of
+``ibapi.decoder.Decoder`` and ``ibapi.client.EClient`` of the same version.
+"""
+from decimal import Decimal
+from typing import Callable, Iterator
+
+from ibapi import comm
+from ibapi.commission_report import CommissionReport
+from ibapi.common import BarData, TickAttrib, UNSET_DOUBLE
+from ibapi.contract import Contract, ContractDetails
+from ibapi.execution import Execution
+from ibapi.message import IN, OUT
+from ibapi.order import Order
+from ibapi.order_state import OrderState
+from ibapi.server_versions import MAX_CLIENT_VER
+
+from .main import FakeTws
+
+SERVER_VERSION = MAX_CLIENT_VER
+
+
+def make_message(*fields) -> bytes:
+    return comm.make_msg("".join(comm.make_field(field) for field in fields))
+
+
+def _contract_fields(contract: Contract) -> tuple:
+    return (
+        contract.conId, contract.symbol, contract.secType, contract.lastTradeDateOrContractMonth,
+        contract.strike, contract.right, contract.multiplier, contract.exchange, contract.currency,
+        contract.localSymbol, contract.tradingClass,
+    )
+
+
+class FakeTwsWireSink:
+    """
+    Receives the ``EWrapper`` calls from :class:`FakeTws` and sends them as wire messages via ``send``.
+
+    ``openOrder`` and ``completedOrder`` are not sent because of their size, so the open orders are always empty
+    and the completed orders are not available on the client side. Order status, executions and positions are sent.
+    """
+
+    def __init__(self, send: Callable[[bytes], None]):
+        self._send = send
+        self._historical_bars: dict[int, list[BarData]] = {}
+
+    # region Connection
+
+    def managedAccounts(self, accountsList: str):
+        self._send(make_message(IN.MANAGED_ACCTS, 1, accountsList))
+
+    def nextValidId(self, orderId: int):
+        self._send(make_message(IN.NEXT_VALID_ID, 1, orderId))
+
+    def error(self, reqId: int, errorCode: int, errorString: str):
+        self._send(make_message(IN.ERR_MSG, 2, reqId, errorCode, errorString))
+
+    # endregion
+
+    # region Market data
+
+    def contractDetails(self, reqId: int, contractDetails: ContractDetails):
+        contract = contractDetails.contract
+
+        self._send(make_message(
+            IN.CONTRACT_DATA, reqId,
+            contract.symbol, contract.secType, contract.lastTradeDateOrContractMonth, contract.strike, contract.right,
+            contract.exchange, contract.currency, contract.localSymbol, contractDetails.marketName,
+            contract.tradingClass, contract.conId, contractDetails.minTick, contract.multiplier,
+            contractDetails.orderTypes, contractDetails.validExchanges, contractDetails.priceMagnifier,
+            contractDetails.underConId, contractDetails.longName, contract.primaryExchange,
+            contractDetails.contractMonth, contractDetails.industry, contractDetails.category,
+            contractDetails.subcategory, contractDetails.timeZoneId, contractDetails.tradingHours,
+            contractDetails.liquidHours, contractDetails.evRule, contractDetails.evMultiplier,
+            0,  # Sec ID list count
+            contractDetails.aggGroup, contractDetails.underSymbol, contractDetails.underSecType,
+            contractDetails.marketRuleIds, contractDetails.realExpirationDate, contractDetails.stockType,
+            "", "", "",  # Min size / size increment / suggested size increment
+        ))
+
+    def contractDetailsEnd(self, reqId: int):
+        self._send(make_message(IN.CONTRACT_DATA_END, 1, reqId))
+
+    def historicalData(self, reqId: int, bar: BarData):
+        # Bars are sent in a single message along with the end marker
+        self._historical_bars.setdefault(reqId, []).append(bar)
+
+    def historicalDataEnd(self, reqId: int, start: str, end: str):
+        bars = self._historical_bars.pop(reqId, [])
+
+        fields = [IN.HISTORICAL_DATA, reqId, start, end, len(bars)]
+        for bar in bars:
+            fields.extend((bar.date, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.wap, bar.barCount))
+
+        self._send(make_message(*fields))
+
+    def historicalDataUpdate(self, reqId: int, bar: BarData):
+        self._send(make_message(
+            IN.HISTORICAL_DATA_UPDATE, reqId,
+            bar.barCount, bar.date, bar.open, bar.close, bar.high, bar.low, bar.wap, bar.volume,
+        ))
+
+    def tickPrice(self, reqId: int, tickType: int, price: float, attrib: TickAttrib):
+        attr_mask = attrib.canAutoExecute | attrib.pastLimit << 1 | attrib.preOpen << 2
+
+        self._send(make_message(IN.TICK_PRICE, 6, reqId, tickType, price, "", attr_mask))
+
+    # endregion
+
+    # region Orders
+
+    def openOrder(self, orderId: int, contract: Contract, order: Order, orderState: OrderState):
+        # Not supported, check the class docstring
+        pass
+
+    def openOrderEnd(self):
+        self._send(make_message(IN.OPEN_ORDER_END, 1))
+
+    def orderStatus(
+            self, orderId: int, status: str, filled: Decimal,
+            remaining: Decimal, avgFillPrice: float, permId: int,
+            parentId: int, lastFillPrice: float, clientId: int,
+            whyHeld: str, mktCapPrice: float
+    ):
+        self._send(make_message(
+            IN.ORDER_STATUS, orderId, status, filled, remaining, avgFillPrice, permId, parentId,
+            lastFillPrice, clientId, whyHeld, mktCapPrice,
+        ))
+
+    def completedOrder(self, contract: Contract, order: Order, orderState: OrderState):
+        # Not supported, check the class docstring
+        pass
+
+    def completedOrdersEnd(self):
+        self._send(make_message(IN.COMPLETED_ORDERS_END))
+
+    # endregion
+
+    # region Portfolio
+
+    def position(self, account: str, contract: Contract, position: Decimal, avgCost: float):
+        self._send(make_message(IN.POSITION_DATA, 3, account, *_contract_fields(contract), position, avgCost))
+
+    def positionEnd(self):
+        self._send(make_message(IN.POSITION_END, 1))
+
+    def execDetails(self, reqId: int, contract: Contract, execution: Execution):
+        self._send(make_message(
+            IN.EXECUTION_DATA, reqId, execution.orderId, *_contract_fields(contract),
+            execution.execId, execution.time, execution.acctNumber, execution.exchange, execution.side,
+            execution.shares, execution.price, execution.permId, execution.clientId, execution.liquidation,
+            execution.cumQty, execution.avgPrice, execution.orderRef, execution.evRule, execution.evMultiplier,
+            execution.modelCode, execution.lastLiquidity,
+        ))
+
+    def execDetailsEnd(self, reqId: int):
+        self._send(make_message(IN.EXECUTION_DATA_END, 1, reqId))
+
+    def commissionReport(self, commissionReport: CommissionReport):
+        self._send(make_message(
+            IN.COMMISSION_REPORT, 1, commissionReport.execId, commissionReport.commission,
+            commissionReport.currency, commissionReport.realizedPNL, commissionReport.yield_,
+            commissionReport.yieldRedemptionDate,
+        ))
+
+    # endregion
+
+
+def _read_contract(fields: Iterator[str]) -> Contract:
+    contract = Contract()
+    contract.conId = int(next(fields) or 0)
+    contract.symbol = next(fields)
+    contract.secType = next(fields)
+    contract.lastTradeDateOrContractMonth = next(fields)
+    contract.strike = float(next(fields) or 0)
+    contract.right = next(fields)
+    contract.multiplier = next(fields)
+    contract.exchange = next(fields)
+    contract.primaryExchange = next(fields)
+    contract.currency = next(fields)
+    contract.localSymbol = next(fields)
+    contract.tradingClass = next(fields)
+
+    return contract
+
+
+def _read_float(fields: Iterator[str]) -> float:
+    value = next(fields)
+
+    return float(value) if value else UNSET_DOUBLE
+
+
+class FakeTwsWireRequestHandler:
+    """Decodes the request messages sent by ``EClient`` and calls the corresponding method of :class:`FakeTws`."""
+
+    def __init__(self, fake_tws: FakeTws):
+        self._fake_tws = fake_tws
+
+        self._handlers: dict[int, Callable[[Iterator[str]], None]] = {
+            OUT.START_API: self._start_api,
+            OUT.REQ_IDS: self._req_ids,
+            OUT.REQ_CONTRACT_DATA: self._req_contract_data,
+            OUT.REQ_HISTORICAL_DATA: self._req_historical_data,
+            OUT.CANCEL_HISTORICAL_DATA: self._cancel_historical_data,
+            OUT.REQ_MKT_DATA: self._req_mkt_data,
+            OUT.CANCEL_MKT_DATA: self._cancel_mkt_data,
+            OUT.PLACE_ORDER: self._place_order,
+            OUT.CANCEL_ORDER: self._cancel_order,
+            OUT.REQ_OPEN_ORDERS: self._req_open_orders,
+            OUT.REQ_ALL_OPEN_ORDERS: self._req_open_orders,
+            OUT.REQ_COMPLETED_ORDERS: self._req_completed_orders,
+            OUT.REQ_POSITIONS: self._req_positions,
+            OUT.REQ_EXECUTIONS: self._req_executions,
+        }
+
+    def handle(self, fields: tuple[bytes, ...]) -> bool:
+        """Returns ``False`` if the message is not supported and ignored."""
+        fields_iter = (field.decode() for field in fields)
+
+        if not (handler := self._handlers.get(int(next(fields_iter)))):
+            return False
+
+        handler(fields_iter)
+        return True
+
+    def _start_api(self, _: Iterator[str]):
+        self._fake_tws.on_connected()
+
+    def _req_ids(self, _: Iterator[str]):
+        self._fake_tws.req_ids()
+
+    def _req_contract_data(self, fields: Iterator[str]):
+        next(fields)  # Version
+        req_id = int(next(fields))
+
+        self._fake_tws.req_contract_details(req_id, _read_contract(fields))
+
+    def _req_historical_data(self, fields: Iterator[str]):
+        req_id = int(next(fields))
+        contract = _read_contract(fields)
+        next(fields)  # Include expired
+        next(fields)  # End date time
+        bar_size = next(fields)
+        duration = next(fields)
+        next(fields)  # Use RTH
+        next(fields)  # What to show
+        next(fields)  # Format date
+        keep_update = next(fields) == "1"
+
+        self._fake_tws.req_historical_data(req_id, contract, duration, bar_size, keep_update)
+
+    def _cancel_historical_data(self, fields: Iterator[str]):
+        next(fields)  # Version
+
+        self._fake_tws.cancel_historical_data(int(next(fields)))
+
+    def _req_mkt_data(self, fields: Iterator[str]):
+        next(fields)  # Version
+        req_id = int(next(fields))
+
+        self._fake_tws.req_mkt_data(req_id, _read_contract(fields))
+
+    def _cancel_mkt_data(self, fields: Iterator[str]):
+        next(fields)  # Version
+
+        self._fake_tws.cancel_mkt_data(int(next(fields)))
+
+    def _place_order(self, fields: Iterator[str]):
+        order_id = int(next(fields))
+        contract = _read_contract(fields)
+        next(fields)  # Sec ID type
+        next(fields)  # Sec ID
+
+        order = Order()
+        order.orderId = order_id
+        order.action = next(fields)
+        order.totalQuantity = Decimal(next(fields))
+        order.orderType = next(fields)
+        order.lmtPrice = _read_float(fields)
+        order.auxPrice = _read_float(fields)
+        order.tif = next(fields)
+        order.ocaGroup = next(fields)
+        order.account = next(fields)
+        order.openClose = next(fields)
+        order.origin = int(next(fields) or 0)
+        order.orderRef = next(fields)
+        order.transmit = next(fields) == "1"
+        order.parentId = int(next(fields) or 0)
+        # The rest of the fields are not used
+
+        self._fake_tws.place_order(order_id, contract, order)
+
+    def _cancel_order(self, fields: Iterator[str]):
+        next(fields)  # Version
+
+        self._fake_tws.cancel_order(int(next(fields)))
+
+    def _req_open_orders(self, _: Iterator[str]):
+        self._fake_tws.req_open_orders()
+
+    def _req_completed_orders(self, _: Iterator[str]):
+        self._fake_tws.req_completed_orders()
+
+    def _req_positions(self, _: Iterator[str]):
+        self._fake_tws.req_positions()
+
+    def _req_executions(self, fields: Iterator[str]):
+        next(fields)  # Version
+
+        self._fake_tws.req_executions(int(next(fields)))
@@ -3,27 +3,35 @@ from typing import Iterable
 
 from linenotipy import Line
 
-from trade_ibkr.const import LINE_ENABLE, LINE_REPORT_INTERVAL_SEC, LINE_REPORT_SYMBOLS
+from trade_ibkr.config import get_config
 from trade_ibkr.model import OnOrderFilledEvent, PxData
 from trade_ibkr.utils import print_line_log, print_warning
 
 
 class LineNotifyClient(Line):
-    def __init__(self, *, token: str):
-        super().__init__(token=token)
+    def __init__(self):
+        # Token is taken from the config on each post
+        super().__init__(token="")
 
         self._last_px_report_epoch: datetime | None = None
 
+    def post(self, **kwargs):
+        self.headers = {"Authorization": f"Bearer {get_config().bot.line.token}"}
+
+        return super().post(**kwargs)
+
     def send_px_data_message(self, px_data_list: Iterable[PxData]):
         if not self.enabled:
             print_warning("Px data not reported because the reporting service is disabled.")
             return
 
+        report_config = get_config().bot.line.px_auto_report
+
         now = datetime.now()
         # Px reported in a given interval
         if (
                 self._last_px_report_epoch is not None
-                and (now.timestamp() - self._last_px_report_epoch.timestamp()) < LINE_REPORT_INTERVAL_SEC
+                and (now.timestamp() - self._last_px_report_epoch.timestamp()) < report_config.interval_sec
         ):
             return
 
@@ -34,7 +42,7 @@ class LineNotifyClient(Line):
         for px_data in px_data_list:
             identifier = f"{px_data.contract_symbol}@{px_data.period_sec}"
 
-            if identifier not in LINE_REPORT_SYMBOLS or identifier in px_data_selected:
+            if identifier not in report_config.symbols or identifier in px_data_selected:
                 continue
 
             px_data_selected[identifier] = px_data
@@ -54,4 +62,4 @@ class LineNotifyClient(Line):
 
     @property
     def enabled(self) -> bool:
-        return LINE_ENABLE
+        return get_config().bot.line.enable
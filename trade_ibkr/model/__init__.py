@@ -3,12 +3,14 @@ from .bar_data import BarDataDict, to_bar_data_dict
 from .bot import *  # noqa
 from .client import *  # noqa
 from .execution import *  # noqa
+from .market_session import MarketSession, MarketSessionIndex
 from .open_order import OpenOrder, OpenOrderBook
 from .position import Position, PositionData
 from .pnl import PnL
 from .px_data import PxData
-from .px_data_cache import PxDataCache, PxDataCacheEntry
+from .px_data_cache import PxDataCache, PxDataCacheEntry, PxDataHistory, PxDataMemoryUsage
 from .px_data_cache_pair import PxDataPairCache, PxDataPairCacheEntry
 from .px_data_pair import PxDataPair
+from .px_quote import PxQuote
 from .server import *  # noqa
 from .unrlzd_pnl import UnrealizedPnL
@@ -57,18 +57,11 @@ def _summary(df: DataFrame, multiplier: float, px_data: Optional["PxData"]):
         return
 
     # Px Side Amplitude Ratio
-    df_temp = df.copy()
-    df_temp[ExecutionDataCol.TIME_COMPLETED] = df_temp[ExecutionDataCol.TIME_COMPLETED] \
+    diff_sma = df[ExecutionDataCol.TIME_COMPLETED] \
         .dt \
-        .floor(f"{px_data.period_sec}S")
-    df_temp = df_temp.merge(
-        px_data.dataframe,
-        how="left", left_on=ExecutionDataCol.TIME_COMPLETED, right_index=True
-    )
-    df_temp[PxDataCol.DIFF_SMA].replace([None], np.nan, inplace=True)
-    df[ExecutionDataCol.PX_SIDE_DIFF_SMA_RATIO] = abs(
-        df_temp[ExecutionDataCol.PX_SIDE].divide(df_temp[PxDataCol.DIFF_SMA])
-    )
+        .floor(f"{px_data.period_sec}S") \
+        .map(px_data.dataframe[PxDataCol.DIFF_SMA])
+    df[ExecutionDataCol.PX_SIDE_DIFF_SMA_RATIO] = abs(df[ExecutionDataCol.PX_SIDE].divide(diff_sma))
 
 
 def _analysis_pnl(df: DataFrame):
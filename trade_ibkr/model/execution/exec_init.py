@@ -2,8 +2,7 @@ from collections import defaultdict
 from decimal import Decimal
 from typing import DefaultDict, Iterable
 
-from trade_ibkr.const import POSITION_ON_FIRST_REALIZED
-from trade_ibkr.utils import get_contract_identifier
+from trade_ibkr.config import get_config
 from .model import GroupedOrderExecution, OrderExecution
 from .type import OrderExecutionGroupKey
 
@@ -16,7 +15,7 @@ def init_grouped_executions(order_execs: Iterable[OrderExecution]) -> DefaultDic
         key = (
             execution.order_id,
             execution.side,
-            get_contract_identifier(execution.contract),
+            execution.contract_id,
         )
         grouped_executions[key].append(execution)
 
@@ -34,7 +33,7 @@ def init_grouped_executions(order_execs: Iterable[OrderExecution]) -> DefaultDic
             if contract_identifier not in position_tracker:
                 # Activate tracker
                 position_tracker[contract_identifier] = Decimal(
-                    POSITION_ON_FIRST_REALIZED.get(contract_identifier, 0)
+                    get_config().server.position_on_first_realized.get(contract_identifier, 0)
                 )
             else:
                 position = position_tracker[contract_identifier]
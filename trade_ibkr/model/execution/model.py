@@ -6,13 +6,15 @@ import pandas as pd
 from ibapi.contract import Contract
 
 from trade_ibkr.enums import ExecutionSideConst
+from trade_ibkr.utils import contract_registry
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class OrderExecution:
     exec_id: str
     order_id: int
-    contract: Contract
+    # Registered in `contract_registry`
+    contract_id: int
     local_time_original: str
     side: ExecutionSideConst
     cumulative_quantity: Decimal
@@ -20,14 +22,19 @@ class OrderExecution:
 
     realized_pnl: float | None = None
 
+    @property
+    def contract(self) -> Contract:
+        return contract_registry.get(self.contract_id)
+
     @property
     def time(self) -> datetime:
         return datetime.strptime(self.local_time_original, "%Y%m%d  %H:%M:%S")
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class GroupedOrderExecution:
-    contract: Contract
+    # Registered in `contract_registry`
+    contract_id: int
     time_completed: datetime
     side: ExecutionSideConst
     quantity: Decimal
@@ -43,13 +50,17 @@ class GroupedOrderExecution:
             pd.Timestamp(self.time_completed, tz="America/Chicago").tz_convert("UTC").tz_localize(None).timestamp()
         )
 
+    @property
+    def contract(self) -> Contract:
+        return contract_registry.get(self.contract_id)
+
     @property
     def signed_quantity(self) -> Decimal:
         return self.quantity * (1 if self.side == "BOT" else -1)
 
     @staticmethod
     def from_executions(executions: list[OrderExecution]) -> "GroupedOrderExecution":
-        contract = executions[0].contract
+        contract_id = executions[0].contract_id
         time_completed = max(executions, key=lambda execution: execution.time).time
         side = executions[0].side
         quantity = max(execution.cumulative_quantity for execution in executions)
@@ -60,7 +71,7 @@ class GroupedOrderExecution:
         )
 
         return GroupedOrderExecution(
-            contract=contract,
+            contract_id=contract_id,
             time_completed=time_completed,
             side=side,
             quantity=quantity,
@@ -72,7 +83,7 @@ class GroupedOrderExecution:
             self, closing_qty: Decimal
     ) -> tuple["GroupedOrderExecution", "GroupedOrderExecution"]:
         closing = GroupedOrderExecution(
-            contract=self.contract,
+            contract_id=self.contract_id,
             # -1 ms for the UI to sort it correctly
             time_completed=self.time_completed - timedelta(milliseconds=1),
             side=self.side,
@@ -81,7 +92,7 @@ class GroupedOrderExecution:
             realized_pnl=self.realized_pnl,
         )
         opening = GroupedOrderExecution(
-            contract=self.contract,
+            contract_id=self.contract_id,
             time_completed=self.time_completed,
             side=self.side,
             quantity=self.quantity - closing_qty,
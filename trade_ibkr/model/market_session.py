@@ -0,0 +1,134 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from trade_ibkr.utils import to_market_date_days, to_market_local_epoch_sec
+
+
+def to_market_dates(epoch_sec: np.ndarray) -> np.ndarray:
+    """Market date of each of ``epoch_sec``, the same as ``PxDataCol.DATE_MARKET``."""
+    return to_market_date_days(to_market_local_epoch_sec(epoch_sec)).astype("datetime64[D]").astype("datetime64[ns]")
+
+
+class MarketSession(NamedTuple):
+    market_date: np.datetime64
+    # Row range of the session, `stop` is exclusive
+    start: int
+    stop: int
+
+    @property
+    def row_slice(self) -> slice:
+        return slice(self.start, self.stop)
+
+
+class MarketSessionIndex:
+    """
+    Row range of each market date, for the rows sorted by time.
+
+    Rows of the same market date are contiguous once sorted, so each market date maps to a single row range.
+    Lookups are O(1), and the index is updated in O(1) for each appended row.
+    Removing the first rows, such as the evicted bars, is O(sessions).
+    """
+
+    def __init__(self):
+        self._sessions: list[MarketSession] = []
+        self._session_idx_of_date: dict[np.datetime64, int] = {}
+
+    @staticmethod
+    def from_market_dates(market_dates: np.ndarray) -> "MarketSessionIndex":
+        """``market_dates`` is the market date of each row, which should be sorted."""
+        index = MarketSessionIndex()
+
+        if not len(market_dates):
+            return index
+
+        starts = np.concatenate(([0], np.flatnonzero(market_dates[1:] != market_dates[:-1]) + 1))
+        stops = np.append(starts[1:], len(market_dates))
+
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            index._add_session(MarketSession(market_dates[start], start, stop))
+
+        return index
+
+    def _add_session(self, session: MarketSession):
+        self._session_idx_of_date[session.market_date] = len(self._sessions)
+        self._sessions.append(session)
+
+    def append(self, market_date: np.datetime64):
+        """Add the row appended after the last row, which has ``market_date``."""
+        if not self._sessions:
+            self._add_session(MarketSession(market_date, 0, 1))
+            return
+
+        last = self._sessions[-1]
+
+        if last.market_date == market_date:
+            self._sessions[-1] = last._replace(stop=last.stop + 1)
+            return
+
+        if market_date < last.market_date:
+            raise ValueError(f"Market date {market_date} is earlier than the last market date {last.market_date}")
+
+        self._add_session(MarketSession(market_date, last.stop, last.stop + 1))
+
+    def remove_first(self, count: int):
+        """Remove the first ``count`` rows, such as the oldest bars evicted."""
+        if count <= 0:
+            return
+
+        sessions = [
+            MarketSession(session.market_date, max(session.start - count, 0), session.stop - count)
+            for session in self._sessions
+            if session.stop > count
+        ]
+
+        self._sessions = []
+        self._session_idx_of_date = {}
+
+        for session in sessions:
+            self._add_session(session)
+
+    def copy(self) -> "MarketSessionIndex":
+        index = MarketSessionIndex()
+
+        # Sessions are read once, so the copy is consistent even if this index changes meanwhile
+        for session in list(self._sessions):
+            index._add_session(session)
+
+        return index
+
+    @property
+    def row_count(self) -> int:
+        return self._sessions[-1].stop if self._sessions else 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, market_date: np.datetime64) -> MarketSession | None:
+        if (session_idx := self._session_idx_of_date.get(market_date)) is None:
+            return None
+
+        return self._sessions[session_idx]
+
+    def get_nth_last(self, n: int) -> MarketSession | None:
+        """Get the ``n``-th last session, where ``1`` is the current session."""
+        if n < 1 or n > len(self._sessions):
+            return None
+
+        return self._sessions[-n]
+
+    @property
+    def current(self) -> MarketSession | None:
+        return self.get_nth_last(1)
+
+    @property
+    def previous(self) -> MarketSession | None:
+        return self.get_nth_last(2)
+
+    @property
+    def sessions(self) -> list[MarketSession]:
+        return self._sessions
+
+    @property
+    def market_dates(self) -> list[np.datetime64]:
+        return [session.market_date for session in self._sessions]
@@ -4,13 +4,14 @@ from decimal import Decimal
 from ibapi.contract import Contract
 
 from trade_ibkr.enums import OrderSideConst
-from trade_ibkr.utils import get_basic_contract_symbol, get_contract_identifier
+from trade_ibkr.utils import contract_registry, get_basic_contract_symbol
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class OpenOrder:
     order_id: int
-    contract: Contract
+    # Registered in `contract_registry`
+    contract_id: int
     price: float
     quantity: Decimal
     side: OrderSideConst
@@ -18,6 +19,10 @@ class OpenOrder:
 
     parent_id: int
 
+    @property
+    def contract(self) -> Contract:
+        return contract_registry.get(self.contract_id)
+
     @property
     def has_parent(self) -> bool:
         return self.parent_id != 0
@@ -35,7 +40,7 @@ class OpenOrderBook:
     def __init__(self, open_order: list[OpenOrder]):
         self._orders = {}
         for order in open_order:
-            identifier = get_contract_identifier(order.contract)
+            identifier = order.contract_id
             if identifier not in self._orders:
                 self._orders[identifier] = []
 
@@ -2,7 +2,7 @@ import sys
 from dataclasses import dataclass, field
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class PnL:
     unrealized: float = field(default=0)
     realized: float = field(default=0)
@@ -5,12 +5,13 @@ from decimal import Decimal
 from ibapi.contract import Contract
 
 from trade_ibkr.enums import Side
-from trade_ibkr.utils import get_contract_identifier, get_basic_contract_symbol
+from trade_ibkr.utils import contract_registry, get_basic_contract_symbol
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class PositionData:
-    contract: Contract
+    # Registered in `contract_registry`
+    contract_id: int
     position: Decimal
     avg_cost: float
 
@@ -22,6 +23,10 @@ class PositionData:
         else:
             self.avg_px = Decimal(0)
 
+    @property
+    def contract(self) -> Contract:
+        return contract_registry.get(self.contract_id)
+
     def px_diff(self, px: float) -> float:
         if not self.position:
             return 0
@@ -46,7 +51,7 @@ class PositionData:
 class Position:
     def __init__(self, data: list[PositionData]):
         self._data: dict[int, PositionData] = {
-            get_contract_identifier(position.contract): position
+            position.contract_id: position
             for position in data
         }
 
@@ -64,7 +69,7 @@ class Position:
 
         For broker account, re-fetch all positions instead.
         """
-        self._data[get_contract_identifier(position_data.contract)] = position_data
+        self._data[position_data.contract_id] = position_data
 
     def has_position(self, contract_identifier: int) -> bool:
         return contract_identifier in self._data and self._data[contract_identifier].position != Decimal(0)
@@ -1,17 +1,22 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Generator, TYPE_CHECKING
 
 import numpy as np
-import pandas as pd
 import talib
 from ibapi.contract import ContractDetails
-from pandas import DataFrame, DatetimeIndex, Series, to_datetime
+from pandas import DataFrame, DatetimeIndex, Series
 from scipy.signal import argrelextrema
 
-from trade_ibkr.calc import analyze_extrema, calc_support_resistance_levels
-from trade_ibkr.const import DIFF_TREND_WINDOW, DIFF_TREND_WINDOW_DEFAULT, MARKET_TREND_WINDOW, SMA_PERIODS
+from trade_ibkr.calc import analyze_extrema, calc_session_vwap, calc_support_resistance_levels
+from trade_ibkr.config import get_config
 from trade_ibkr.enums import CandlePos, PxDataCol
-from trade_ibkr.utils import get_contract_symbol, get_detailed_contract_identifier, print_log, print_warning
+from trade_ibkr.perf import metric_px_data_stage
+from trade_ibkr.utils import (
+    get_contract_symbol, get_detailed_contract_identifier, print_log, print_warning, to_market_date_days,
+    to_market_local_epoch_sec,
+)
+
+from .market_session import MarketSessionIndex
 
 if TYPE_CHECKING:
     from trade_ibkr.model import BarDataDict
@@ -19,20 +24,29 @@ if TYPE_CHECKING:
 
 class PxData:
     def _proc_df_date(self):
-        self.dataframe[PxDataCol.DATE] = to_datetime(
-            self.dataframe[PxDataCol.EPOCH_SEC], utc=True, unit="s"
-        ).dt.tz_convert("America/Chicago").dt.tz_localize(None)
+        local_epoch_sec = to_market_local_epoch_sec(self.dataframe[PxDataCol.EPOCH_SEC].to_numpy())
+
+        self.dataframe[PxDataCol.DATE] = local_epoch_sec.astype("datetime64[s]").astype("datetime64[ns]")
         self.dataframe.set_index(DatetimeIndex(self.dataframe[PxDataCol.DATE]), inplace=True)
 
-        self.dataframe[PxDataCol.DATE_MARKET] = to_datetime(np.where(
-            self.dataframe[PxDataCol.DATE].dt.hour < 17,
-            self.dataframe[PxDataCol.DATE].dt.date,
-            self.dataframe[PxDataCol.DATE].dt.date + timedelta(days=1)
-        ))
+        self.dataframe[PxDataCol.DATE_MARKET] = to_market_date_days(local_epoch_sec) \
+            .astype("datetime64[D]") \
+            .astype("datetime64[ns]")
+
+        market_dates = self.dataframe[PxDataCol.DATE_MARKET].to_numpy()
+
+        # Index maintained along with the bars is only used if it matches the bars
+        if not (
+                self.market_sessions.row_count == len(market_dates)
+                and len(market_dates)
+                and self.market_sessions.sessions[0].market_date == market_dates[0]
+                and self.market_sessions.current.market_date == market_dates[-1]
+        ):
+            self.market_sessions = MarketSessionIndex.from_market_dates(market_dates)
 
     def _proc_df_ema120(self):
         self.dataframe[PxDataCol.EMA_120] = talib.EMA(self.dataframe[PxDataCol.CLOSE], timeperiod=120)
-        if ema_diff_window := MARKET_TREND_WINDOW.get(self.period_sec):
+        if ema_diff_window := get_config().data.trend_window.get(self.period_sec):
             self.dataframe[PxDataCol.EMA_120_TREND] = (
                     self.dataframe[PxDataCol.CLOSE] - self.dataframe[PxDataCol.EMA_120]
             ) \
@@ -48,7 +62,7 @@ class PxData:
         self.dataframe[PxDataCol.EMA_120_TREND_CHANGE] = self.dataframe[PxDataCol.EMA_120_TREND].diff()
 
     def _proc_df_smas(self):
-        for sma_period in SMA_PERIODS:
+        for sma_period in get_config().data.sma:
             self.dataframe[PxDataCol.get_sma_col_name(sma_period)] = talib.SMA(
                 self.dataframe[PxDataCol.CLOSE],
                 timeperiod=sma_period
@@ -66,17 +80,19 @@ class PxData:
 
     def _proc_df_diff(self):
         self.dataframe[PxDataCol.DIFF] = self.dataframe[PxDataCol.CLOSE] - self.dataframe[PxDataCol.OPEN]
-        if diff_trend_window := DIFF_TREND_WINDOW.get(self.period_sec):
+        data_config = get_config().data
+
+        if diff_trend_window := data_config.diff_sma_window.get(self.period_sec):
             self.dataframe[PxDataCol.DIFF_SMA] = abs(self.dataframe[PxDataCol.DIFF]) \
                 .rolling(diff_trend_window) \
                 .mean()
         else:
             self.dataframe[PxDataCol.DIFF_SMA] = abs(self.dataframe[PxDataCol.DIFF]) \
-                .rolling(DIFF_TREND_WINDOW_DEFAULT) \
+                .rolling(data_config.diff_sma_window_default) \
                 .mean()
             print_warning(
                 f"PxData of {self.contract_symbol} @ {self.period_sec} is "
-                f"using default diff SMA window ({DIFF_TREND_WINDOW_DEFAULT})"
+                f"using default diff SMA window ({data_config.diff_sma_window_default})"
             )
 
         self.dataframe[PxDataCol.DIFF_SMA_TREND] = self.dataframe[PxDataCol.DIFF_SMA].diff()
@@ -93,28 +109,34 @@ class PxData:
         # Don't calculate VWAP if period is 3600s+ (meaningless)
         if self.period_sec >= 3600:
             self.dataframe[PxDataCol.VWAP] = np.full(len(self.dataframe.index), np.nan)
+            self.dataframe[PxDataCol.VWAP_STDEV] = np.full(len(self.dataframe.index), np.nan)
         else:
-            self.dataframe[PxDataCol.PRICE_TIMES_VOLUME] = np.multiply(
-                self.dataframe[PxDataCol.CLOSE],
-                self.dataframe[PxDataCol.VOLUME]
-            )
-            mkt_data_group = self.dataframe.groupby(PxDataCol.DATE_MARKET)
-            self.dataframe[PxDataCol.VWAP] = np.divide(
-                mkt_data_group[PxDataCol.PRICE_TIMES_VOLUME].transform(pd.Series.cumsum),
-                mkt_data_group[PxDataCol.VOLUME].transform(pd.Series.cumsum),
+            vwap, vwap_stdev = calc_session_vwap(
+                self.dataframe[PxDataCol.CLOSE].to_numpy(),
+                self.dataframe[PxDataCol.VOLUME].to_numpy(),
+                [(session.start, session.stop) for session in self.market_sessions.sessions],
             )
+            self.dataframe[PxDataCol.VWAP] = vwap
+            self.dataframe[PxDataCol.VWAP_STDEV] = vwap_stdev
 
     def _proc_df(self):
-        self._proc_df_date()
-        self._proc_df_ema120()
-        self._proc_df_smas()
-        self._proc_df_amplitude()
-        self._proc_df_diff()
-        self._proc_df_extrema()
-        self._proc_df_vwap()
-
-        # Remove NaNs
-        self.dataframe = self.dataframe.fillna(np.nan).replace([np.nan], [None])
+        # Same stage names as `benchmark.px_data_stages`
+        with metric_px_data_stage.labels("date").time():
+            self._proc_df_date()
+        with metric_px_data_stage.labels("ema120").time():
+            self._proc_df_ema120()
+        with metric_px_data_stage.labels("smas").time():
+            self._proc_df_smas()
+        with metric_px_data_stage.labels("amplitude").time():
+            self._proc_df_amplitude()
+        with metric_px_data_stage.labels("diff").time():
+            self._proc_df_diff()
+        with metric_px_data_stage.labels("extrema").time():
+            self._proc_df_extrema()
+        with metric_px_data_stage.labels("vwap").time():
+            self._proc_df_vwap()
+
+        # NaNs are kept for the numeric dtypes, which are converted to `None` on serialization
 
     def __init__(
             self, *,
@@ -123,20 +145,29 @@ class PxData:
             is_major: bool,
             bars: list["BarDataDict"] | None = None,
             dataframe: DataFrame | None = None,
+            version: int | None = None,
+            market_sessions: MarketSessionIndex | None = None,
     ):
         self.contract: ContractDetails = contract
         self.period_sec: int = period_sec
         self.is_major: bool = is_major
-        self.dataframe: DataFrame = DataFrame(bars) if bars else dataframe
+        # Version of the bars if this is a snapshot of the cached bars, which is unique across all series
+        self.version: int | None = version
+        with metric_px_data_stage.labels("dfInit").time():
+            self.dataframe: DataFrame = DataFrame(bars) if bars else dataframe
 
         if self.dataframe is None:
             raise ValueError("Must specify either `bars` or `dataframe` for PxData")
 
+        # Built from the bars if not given, or if the given index does not match the bars
+        self.market_sessions: MarketSessionIndex = market_sessions or MarketSessionIndex()
+
         self._proc_df()
 
-        self.market_dates: Series = self.dataframe[PxDataCol.DATE_MARKET].unique()
-        self.sr_levels_data = calc_support_resistance_levels(self.dataframe)
-        self.extrema = analyze_extrema(self.dataframe)
+        with metric_px_data_stage.labels("srLevels").time():
+            self.sr_levels_data = calc_support_resistance_levels(self.dataframe)
+        with metric_px_data_stage.labels("extremaAnalysis").time():
+            self.extrema = analyze_extrema(self.dataframe)
 
     def get_current(self) -> Series:
         return self.dataframe.iloc[-1]
@@ -145,32 +176,25 @@ class PxData:
         return self.dataframe.iloc[-n]
 
     def get_last_day_close(self) -> float | None:
-        if len(self.market_dates) < 2:
+        if not (session_prev := self.market_sessions.previous):
             raise ValueError(
                 f"Px data of {self.contract_symbol} ({self.contract_identifier} @ {self.period_sec}) "
                 f"only has a single market date: {self.market_dates}"
             )
 
-        market_date_prev = self.market_dates[-2]
-
-        last_day_df = self.dataframe[self.dataframe[PxDataCol.DATE_MARKET] == market_date_prev]
-
-        if not len(last_day_df.index):
-            return None
-
-        last_day_last_entry = last_day_df.iloc[-1]
-        return last_day_last_entry[PxDataCol.CLOSE]
+        return self.dataframe[PxDataCol.CLOSE].iat[session_prev.stop - 1]
 
     def get_today_open(self) -> float | None:
-        market_date_prev = self.market_dates[-1]
+        if not (session_current := self.market_sessions.current):
+            return None
 
-        today_df = self.dataframe[self.dataframe[PxDataCol.DATE_MARKET] == market_date_prev]
+        return self.dataframe[PxDataCol.OPEN].iat[session_current.start]
 
-        if not len(today_df.index):
+    def get_session_df(self, market_date: np.datetime64) -> DataFrame | None:
+        if not (session := self.market_sessions.get(market_date)):
             return None
 
-        last_day_last_entry = today_df.iloc[0]
-        return last_day_last_entry[PxDataCol.OPEN]
+        return self.dataframe.iloc[session.row_slice]
 
     @staticmethod
     def _get_series_at(original: Series, candle_pos: CandlePos) -> Series:
@@ -209,6 +233,10 @@ class PxData:
 
         return file_path
 
+    @property
+    def market_dates(self) -> list[np.datetime64]:
+        return self.market_sessions.market_dates
+
     @property
     def earliest_time(self) -> datetime:
         return self.dataframe[PxDataCol.DATE].min()
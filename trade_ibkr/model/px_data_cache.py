@@ -1,18 +1,59 @@
+import heapq
+import itertools
+import sys
 import time
 from abc import ABC
 from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Generic, TypeVar
+from typing import Generic, TypedDict, TypeVar
 
+import numpy as np
 from ibapi.common import BarData
 from ibapi.contract import Contract, ContractDetails
 
-from trade_ibkr.const import UPDATE_FREQ_HST_PX, UPDATE_FREQ_MKT_PX
+from trade_ibkr.calc import BarResampler, RollingDiffSma, SessionVwap, merge_bars
+from trade_ibkr.config import get_config
 from trade_ibkr.enums import PxDataCol
+from trade_ibkr.utils import get_detailed_contract_identifier
 from .bar_data import BarDataDict, to_bar_data_dict
+from .market_session import MarketSessionIndex, to_market_dates
 from .px_data import PxData
+from .px_quote import PxQuote
 from .server import OnPxDataUpdatedNoAccount
 
+# Versions are unique across all entries, so a version also identifies the series
+_versions = itertools.count()
+
+
+class PxDataMemoryUsage(TypedDict):
+    bars: int
+    # `None` if the history is not loaded yet
+    maxBars: int | None
+    downsampledBars: int
+    maxDownsampledBars: int
+    downsampledPeriodSec: int
+    # Estimated size of the bars, excluding the Px data built from them
+    bytes: int
+
+
+class PxDataHistory(TypedDict):
+    periodSec: int
+    downsampledPeriodSec: int
+    # Bars older than `bars` merged to `downsampledPeriodSec`, sorted by time
+    # - Keyed by `str` instead of `PxDataCol` so the bars are valid in the API response model
+    downsampled: list[dict[str, float | int]]
+    # Bars in full resolution, sorted by time
+    bars: list[dict[str, float | int]]
+
+
+def _get_bars_size(bars: dict[int, BarDataDict]) -> int:
+    size = sys.getsizeof(bars)
+
+    for epoch_sec, bar in bars.items():
+        size += sys.getsizeof(epoch_sec) + sys.getsizeof(bar) + sum(sys.getsizeof(value) for value in bar.values())
+
+    return size
+
 
 @dataclass(kw_only=True)
 class PxDataCacheEntry(ABC):
@@ -26,12 +67,61 @@ class PxDataCacheEntry(ABC):
 
     last_historical_sent: float = field(init=False)
     last_market_update: float | None = field(init=False)  # None means no data received yet
+    last_market_sent: float | None = field(init=False)  # None means no market data sent yet
+
+    # New bar, or the high / low of the current bar broken since the last market data sent
+    is_market_hl_broken: bool = field(init=False, default=False)
+    # Epoch sec of the bar last updated by the market Px, `None` if no market Px received yet
+    _market_epoch_sec: int | None = field(init=False, default=None)
+
+    # All historical bars received, before the realtime updates
+    is_history_loaded: bool = field(init=False, default=False)
+    # Count of the bars of the initial history, kept if the max bars is not configured
+    history_bars: int | None = field(init=False, default=None)
+    # Bars kept at least regardless of the retention, such as to cover a full bar of the Px data resampled from this
+    min_bars: int = field(init=False, default=0)
+
+    # Bars older than `data`, merged to a longer period to save memory
+    data_downsampled: dict[int, BarDataDict] = field(init=False)
+
+    # Streaming indicators of the latest bar, `None` if not calculated for the period
+    vwap: SessionVwap | None = field(init=False)
+    diff_sma: RollingDiffSma = field(init=False)
 
-    allow_force_send_once: bool = field(init=False, default=False)
+    # Close Px of the latest bar, `None` if no data received yet
+    current_close: float | None = field(init=False)
+
+    # Row range of each market date of the sorted bars, updated as the bars are added or evicted
+    market_sessions: MarketSessionIndex = field(init=False)
+    # Epoch sec of the last row of `market_sessions`, `None` if no bars
+    _market_sessions_last_epoch_sec: int | None = field(init=False)
+
+    # Changed on every change of `data`, so `PxData` is only rebuilt when the bars change
+    version: int = field(init=False)
+    _px_data_snapshot: tuple[int, PxData] | None = field(init=False)
 
     def __post_init__(self):
         self.last_historical_sent = 0
         self.last_market_update = None
+        self.last_market_sent = None
+
+        self.version = next(_versions)
+        self._px_data_snapshot = None
+
+        self.data_downsampled = {}
+
+        self._rebuild_market_sessions()
+
+        self.vwap, self.diff_sma = self._make_indicators()
+
+        self.current_close = None
+
+    def _make_indicators(self) -> tuple[SessionVwap | None, RollingDiffSma]:
+        # Same as `PxData`, VWAP is meaningless for 3600s+
+        vwap = SessionVwap() if self.period_sec < 3600 else None
+        diff_sma = RollingDiffSma(get_config().data.get_diff_sma_window(self.period_sec))
+
+        return vwap, diff_sma
 
     @property
     def current_epoch_sec(self) -> int:
@@ -55,24 +145,20 @@ class PxDataCacheEntry(ABC):
         # Debounce the data because `priceTick` and historical data update frequently
         return (
                 self.is_minute_changed_for_historical
-                or time.time() - self.last_historical_sent > UPDATE_FREQ_HST_PX
+                or time.time() - self.last_historical_sent > get_config().data.px_update.freq_historical_sec
         )
 
     @property
     def is_send_market_px_data_ok(self) -> bool:
-        # Limit market data output rate
+        # Limit market data output rate, the clients could throttle it further
         if not self.contract:
             return False
 
-        if self.allow_force_send_once:
-            self.allow_force_send_once = False
+        if self.is_market_hl_broken or self.last_market_sent is None:
+            # HL broken / First market data transmission
             return True
 
-        if self.last_market_update is None:
-            # First market data transmission / HL broken
-            return True
-
-        return time.time() - self.last_market_update > UPDATE_FREQ_MKT_PX
+        return time.time() - self.last_market_sent > get_config().data.px_update.freq_market_sec
 
     @property
     def is_minute_changed_for_historical(self) -> bool:
@@ -87,10 +173,157 @@ class PxDataCacheEntry(ABC):
                 and self.is_ready
         )
 
-    def remove_oldest(self):
-        self.data.pop(min(self.data.keys()))
+    def _update_indicators(self, bar: BarDataDict):
+        if self.diff_sma.update(bar) is None:
+            # Bar older than the latest bar
+            return
 
-    def update_latest_market(self, current: float):
+        self.current_close = bar[PxDataCol.CLOSE]
+
+        if self.vwap:
+            self.vwap.update(bar)
+
+    def _rebuild_market_sessions(self):
+        epoch_sec = np.array(sorted(self.data), dtype=np.int64)
+
+        self.market_sessions = MarketSessionIndex.from_market_dates(to_market_dates(epoch_sec))
+        self._market_sessions_last_epoch_sec = int(epoch_sec[-1]) if len(epoch_sec) else None
+
+    def _add_market_session_row(self, epoch_sec: int):
+        # Called after the bar of `epoch_sec` is added to `data`
+        if self._market_sessions_last_epoch_sec is not None and epoch_sec < self._market_sessions_last_epoch_sec:
+            # Bar inserted before the last bar, which shifts the rows after it
+            self._rebuild_market_sessions()
+            return
+
+        self.market_sessions.append(to_market_dates(np.array([epoch_sec], dtype=np.int64))[0])
+        self._market_sessions_last_epoch_sec = epoch_sec
+
+    def bump_version(self):
+        self.version = next(_versions)
+
+    def rebuild_indicators(self):
+        """Recalculate the streaming indicators from the cached bars, such as after the config changed."""
+        vwap, diff_sma = self._make_indicators()
+
+        for _, bar in sorted(self.data.items()):
+            diff_sma.update(bar)
+
+            if vwap:
+                vwap.update(bar)
+
+        # Replaced at once, so the readers never get a partially rebuilt indicator
+        self.vwap, self.diff_sma = vwap, diff_sma
+
+    def replace_bars(self, bars: dict[int, BarDataDict]):
+        """Replace all bars with ``bars``, such as the bars resampled from the base bars."""
+        self.data = bars
+        self.data_downsampled = {}
+        self._rebuild_market_sessions()
+        self.bump_version()
+        self.rebuild_indicators()
+
+        if bars:
+            self.current_close = bars[max(bars)][PxDataCol.CLOSE]
+
+    def update_bar(self, bar: BarDataDict) -> bool:
+        """
+        Set ``bar`` as the bar of its epoch, removing the oldest bar if ``bar`` is new to keep the size.
+
+        Returns ``True`` if the bars are changed.
+        """
+        epoch_sec = bar[PxDataCol.EPOCH_SEC]
+
+        if self.data.get(epoch_sec) == bar:
+            return False
+
+        is_new_bar = epoch_sec not in self.data
+
+        self.data[epoch_sec] = bar
+        if is_new_bar:
+            self._add_market_session_row(epoch_sec)
+        self.bump_version()
+        self._update_indicators(bar)
+
+        if is_new_bar:
+            self.enforce_retention()
+
+        return True
+
+    def mark_history_loaded(self):
+        self.is_history_loaded = True
+        self.history_bars = len(self.data)
+
+    @property
+    def max_bars(self) -> int | None:
+        if (max_bars := get_config().data.retention.get_max_bars(self.period_sec) or self.history_bars) is None:
+            return None
+
+        return max(max_bars, self.min_bars)
+
+    def enforce_retention(self):
+        """Move the bars beyond the memory budget to the downsampled bars, dropping the oldest downsampled bars."""
+        if (max_bars := self.max_bars) is None or len(self.data) <= max_bars:
+            return
+
+        retention = get_config().data.retention
+
+        epochs_evicted = heapq.nsmallest(len(self.data) - max_bars, self.data.keys())
+        bars_evicted = {epoch_sec: self.data.pop(epoch_sec) for epoch_sec in epochs_evicted}
+        # Evicted bars are the oldest, which are the first rows
+        self.market_sessions.remove_first(len(bars_evicted))
+        self.bump_version()
+
+        if not retention.downsampled_bars:
+            self.data_downsampled = {}
+            return
+
+        resampler = BarResampler(retention.get_downsampled_period_sec(self.period_sec))
+
+        for epoch_sec, bar in resampler.resample(bars_evicted).items():
+            if bar_downsampled := self.data_downsampled.get(epoch_sec):
+                # The downsampled bar is partially filled by the bars evicted before
+                bar = merge_bars(epoch_sec, [bar_downsampled, bar])
+
+            self.data_downsampled[epoch_sec] = bar
+
+        if (excess := len(self.data_downsampled) - retention.downsampled_bars) > 0:
+            for epoch_sec in heapq.nsmallest(excess, self.data_downsampled.keys()):
+                del self.data_downsampled[epoch_sec]
+
+    def get_memory_usage(self) -> PxDataMemoryUsage:
+        retention = get_config().data.retention
+
+        return {
+            "bars": len(self.data),
+            "maxBars": self.max_bars,
+            "downsampledBars": len(self.data_downsampled),
+            "maxDownsampledBars": retention.downsampled_bars,
+            "downsampledPeriodSec": retention.get_downsampled_period_sec(self.period_sec),
+            "bytes": _get_bars_size(self.data) + _get_bars_size(self.data_downsampled),
+        }
+
+    def get_history(self) -> PxDataHistory:
+        """Get all bars kept, where the downsampled bars precede the bars in full resolution."""
+        # Copied at once, as the bars are updated from the IB thread
+        data, data_downsampled = self.data.copy(), self.data_downsampled.copy()
+
+        return {
+            "periodSec": self.period_sec,
+            "downsampledPeriodSec": get_config().data.retention.get_downsampled_period_sec(self.period_sec),
+            "downsampled": [data_downsampled[epoch_sec] for epoch_sec in sorted(data_downsampled)],
+            "bars": [data[epoch_sec] for epoch_sec in sorted(data)],
+        }
+
+    def mark_historical_sent(self):
+        self.last_historical_sent = time.time()
+
+    def mark_market_sent(self):
+        self.last_market_sent = time.time()
+        self.is_market_hl_broken = False
+
+    def update_latest_market(self, current: float) -> bool:
+        """Returns ``True`` if the latest bar is changed."""
         self.last_market_update = time.time()
 
         epoch_latest = max(self.data.keys()) if self.data else 0
@@ -107,19 +340,39 @@ class PxDataCacheEntry(ABC):
                 PxDataCol.VOLUME: 0,
             }
             self.data[epoch_current] = new_bar
-            self.remove_oldest()
-            self.allow_force_send_once = True
-            return
+            self._add_market_session_row(epoch_current)
+            self.bump_version()
+            self._update_indicators(new_bar)
+            self.enforce_retention()
+            self.is_market_hl_broken = True
+            self._market_epoch_sec = epoch_current
+            return True
 
         bar_current = self.data[epoch_current]
+
+        if epoch_current != self._market_epoch_sec:
+            # New bar started by the historical data update, which is a change even at the same price
+            self._market_epoch_sec = epoch_current
+            self.is_market_hl_broken = True
+        elif (
+                current == bar_current[PxDataCol.CLOSE]
+                and bar_current[PxDataCol.LOW] <= current <= bar_current[PxDataCol.HIGH]
+        ):
+            # Same price as the current close, the bar is unchanged
+            return False
+
         self.data[epoch_current] = bar_current | {
             PxDataCol.HIGH: max(bar_current[PxDataCol.HIGH], current),
             PxDataCol.LOW: min(bar_current[PxDataCol.LOW], current),
             PxDataCol.CLOSE: current,
         }
+        self.bump_version()
+        self._update_indicators(self.data[epoch_current])
 
         if current > bar_current[PxDataCol.HIGH] or current < bar_current[PxDataCol.LOW]:
-            self.allow_force_send_once = True
+            self.is_market_hl_broken = True
+
+        return True
 
     def update_latest_history(self, bar: BarData, /, is_realtime_update: bool):
         # If `bar.barCount` is -1, the data is incorrect
@@ -135,22 +388,57 @@ class PxDataCacheEntry(ABC):
             # Epoch is newer, do nothing (let market update add the new bar)
             return
 
-        self.data[epoch_to_rec] = bar_data_dict
+        if self.data.get(epoch_to_rec) == bar_data_dict:
+            # Historical data update repeats the same bar until it changes
+            return
 
+        # Checked before the insert, otherwise it is always an existing bar
         is_new_bar = epoch_to_rec not in self.data
 
+        self.data[epoch_to_rec] = bar_data_dict
+        if is_new_bar:
+            self._add_market_session_row(epoch_to_rec)
+        self.bump_version()
+        self._update_indicators(bar_data_dict)
+
         if is_new_bar and is_realtime_update:
-            # Keep price data in a fixed size
-            self.remove_oldest()
+            self.enforce_retention()
 
     def to_px_data(self) -> PxData:
-        self.last_historical_sent = time.time()
+        """
+        Get the ``PxData`` of the current bars.
+
+        The ``PxData`` is shared by all callers until the bars change, so it should not be modified.
+        """
+        # Version is read before the bars, so the snapshot is rebuilt if the bars change during the build
+        version = self.version
 
-        return PxData(
+        if self._px_data_snapshot and self._px_data_snapshot[0] == version:
+            return self._px_data_snapshot[1]
+
+        px_data = PxData(
             contract=self.contract,
             period_sec=self.period_sec,
             is_major=self.is_major,
-            bars=[self.data[key] for key in sorted(self.data.keys())]
+            bars=[self.data[key] for key in sorted(self.data.keys())],
+            version=version,
+            # Copied as the index keeps changing with the bars, `PxData` rebuilds it if it no longer matches
+            market_sessions=self.market_sessions.copy(),
+        )
+        self._px_data_snapshot = (version, px_data)
+
+        return px_data
+
+    def to_px_quote(self) -> PxQuote | None:
+        if not self.is_ready or self.current_close is None:
+            return None
+
+        return PxQuote(
+            contract=self.contract,
+            period_sec=self.period_sec,
+            current_close=self.current_close,
+            current_diff_sma=self.diff_sma.current,
+            current_vwap=self.vwap.current if self.vwap else None,
         )
 
 
@@ -161,8 +449,32 @@ E = TypeVar("E", bound=PxDataCacheEntry)
 class PxDataCache(Generic[E]):
     data: dict[int, E] = field(init=False)
 
+    # (Contract identifier, Period sec) to the request ID of the Px data
+    _req_id_of_series: dict[tuple[int, int], int] = field(init=False)
+
     def __post_init__(self):
         self.data = {}
+        self._req_id_of_series = {}
+
+    def set_contract(self, req_id: int, contract: ContractDetails):
+        entry = self.data[req_id]
+
+        if entry.contract is contract:
+            return
+
+        entry.contract = contract
+        entry.bump_version()
+        self._req_id_of_series[(get_detailed_contract_identifier(contract), entry.period_sec)] = req_id
+
+    def remove(self, req_id: int):
+        self.data.pop(req_id, None)
+        self._req_id_of_series = {
+            series: req_id_series for series, req_id_series in self._req_id_of_series.items()
+            if req_id_series != req_id
+        }
+
+    def get_req_id_of_series(self, contract_identifier: int, period_sec: int) -> int | None:
+        return self._req_id_of_series.get((contract_identifier, period_sec))
 
     def is_all_px_data_ready(self) -> bool:
         return all(px_data_entry.is_ready for px_data_entry in self.data.values())
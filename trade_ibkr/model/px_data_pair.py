@@ -2,10 +2,11 @@ from typing import TYPE_CHECKING
 
 import pandas as pd
 import talib
-from pandas import DataFrame, Series, to_datetime
+from pandas import DataFrame, Series
 from talib import MA_Type
 
 from trade_ibkr.enums import PxDataCol, PxDataPairCol, PxDataPairSuffix
+from trade_ibkr.utils import to_market_local_epoch_sec
 
 if TYPE_CHECKING:
     from trade_ibkr.model import BarDataDict, GetSpread
@@ -14,9 +15,9 @@ if TYPE_CHECKING:
 class PxDataPair:
     @staticmethod
     def _proc_df(df: DataFrame):
-        df[PxDataCol.DATE] = to_datetime(
-            df[PxDataCol.EPOCH_SEC], utc=True, unit="s"
-        ).dt.tz_convert("America/Chicago").dt.tz_localize(None)
+        df[PxDataCol.DATE] = to_market_local_epoch_sec(df[PxDataCol.EPOCH_SEC].to_numpy()) \
+            .astype("datetime64[s]") \
+            .astype("datetime64[ns]")
 
     def _get_merged_df(self, get_spread: "GetSpread") -> DataFrame:
         df = pd.merge(
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+from ibapi.contract import ContractDetails
+
+from trade_ibkr.calc import VwapValue
+
+
+@dataclass(kw_only=True)
+class PxQuote:
+    """Latest Px of a cached Px data, for the paths that do not need the whole ``PxData``, such as placing orders."""
+    contract: ContractDetails
+    period_sec: int
+    current_close: float
+    current_diff_sma: float
+    # Session VWAP as of the latest bar, `None` if VWAP is not calculated for the period
+    current_vwap: VwapValue | None
+
+    @property
+    def min_tick(self) -> float:
+        return self.contract.minTick
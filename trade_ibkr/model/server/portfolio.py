@@ -3,7 +3,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Any, Callable, Coroutine, Optional, TYPE_CHECKING
 
-from trade_ibkr.const import EXECUTION_SMA_PERIOD
+from trade_ibkr.config import get_config
 from trade_ibkr.enums import OrderSideConst
 
 if TYPE_CHECKING:
@@ -64,8 +64,10 @@ class OnExecutionFetchedParams:
             self.earliest_time = min(px_data.earliest_time for px_data in self.px_data_list)
             self.contract_ids = {px_data.contract_identifier for px_data in self.px_data_list}
 
+            data_config = get_config().data
+
             for px_data in self.px_data_list:
-                period_sec = EXECUTION_SMA_PERIOD.get(px_data.contract_symbol, EXECUTION_SMA_PERIOD["default"])
+                period_sec = data_config.get_execution_period_sec(px_data.contract_symbol)
 
                 if px_data.period_sec == period_sec:
                     self.px_data_dict_execution_period_sec[px_data.contract_identifier] = px_data
@@ -41,6 +41,8 @@ OnPxDataUpdatedNoAccount: TypeAlias = Callable[[OnPxDataUpdatedEventNoAccount],
 class OnMarketDataReceivedEvent:
     contract: ContractDetails
     px: float
+    # New bar, or the high / low of the current bar broken since the last event
+    is_hl_broken: bool = False
 
     def __str__(self):
         return (
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class UnrealizedPnL:
     min: float = field(default=0)
     current: float = field(default=0)
@@ -9,14 +9,12 @@ from ibapi.contract import Contract, ContractDetails
 from ibapi.order import Order
 from ibapi.ticktype import TickType, TickTypeEnum
 
-from trade_ibkr.const import (
-    ACCOUNT_NUMBER_IN_USE, BOT_POSITION_FETCH_INTERVAL,
-    BOT_STRATEGY_CHECK_INTERVAL,
-)
+from trade_ibkr.config import get_config
 from trade_ibkr.model import (
     BrokerAccount, CommodityPair, OnBotSpreadPxUpdated, OnBotSpreadPxUpdatedEvent, PxDataPairCache,
     PxDataPairCacheEntry, UnrealizedPnL,
 )
+from trade_ibkr.perf import order_latency_tracer
 from trade_ibkr.utils import (
     asyncio_run, get_basic_contract_symbol, get_contract_symbol, get_order_trigger_price, print_error, print_log,
 )
@@ -30,7 +28,7 @@ class IBautoBotSpread(IBapiServer):
     def _init_px_data_subscription(self, contract: Contract) -> int:
         req_contract = self.request_contract_data(contract)
         req_market = self._request_px_data_market(contract)
-        req_px = self._request_px_data(contract=contract, duration="86400 S", bar_size="1 min", keep_update=True)
+        req_px = self.next_valid_request_id
 
         self._px_req_id_to_contract_req_id[req_px] = req_contract
         self._contract_req_id_to_px_req_id[req_contract].add(req_px)
@@ -44,6 +42,7 @@ class IBautoBotSpread(IBapiServer):
             on_update=None,
             unrlzd_pnl=UnrealizedPnL()
         )
+        self._request_px_data(req_px, contract=contract, duration="86400 S", bar_size="1 min", keep_update=True)
 
         print_log(f"[BOT - Spread] Subscribe Px update for {get_basic_contract_symbol(contract)} ({req_px})")
 
@@ -110,6 +109,8 @@ class IBautoBotSpread(IBapiServer):
             parentId: int, lastFillPrice: float, clientId: int,
             whyHeld: str, mktCapPrice: float
     ):
+        order_latency_tracer.on_order_status(orderId, permId, status, remaining)
+
         if status == "Filled":
             print_log(f"[TWS] Order #{orderId} filled")
             self._beep_on_order_filled()
@@ -144,7 +145,7 @@ class IBautoBotSpread(IBapiServer):
         req_id_pnl = self.next_valid_request_id
         self.reqPnLSingle(
             req_id_pnl,
-            ACCOUNT_NUMBER_IN_USE,
+            get_config().system.account_number_in_use,
             "",
             contract_details.contract.conId
         )
@@ -170,16 +171,17 @@ class IBautoBotSpread(IBapiServer):
 
     def _px_data_updated(self, start_epoch: float):
         now = time.time()
+        bot_config = get_config().bot
         # Have to store the results to make sure `_last_px_update` is updated for each px update
         # > Early termination could block updating
-        is_not_allowed_execute_further = now - self._last_px_update < BOT_STRATEGY_CHECK_INTERVAL
+        is_not_allowed_execute_further = now - self._last_px_update < bot_config.strategy_check_interval_sec
 
         self._last_px_update = now
 
         if is_not_allowed_execute_further:
             return
 
-        if not self._position_data or now - self._last_position_fetch > BOT_POSITION_FETCH_INTERVAL:
+        if not self._position_data or now - self._last_position_fetch > bot_config.position_fetch_interval_sec:
             self.request_positions()
 
             if not self._position_data:
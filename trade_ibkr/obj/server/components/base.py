@@ -6,7 +6,10 @@ from ibapi.client import EClient
 from ibapi.common import TickerId
 from ibapi.wrapper import EWrapper
 
+from trade_ibkr.capture import CallbackRecorder
+from trade_ibkr.config import get_config
 from trade_ibkr.model import OnError, OnErrorEvent
+from trade_ibkr.perf import callback_profiler, metric_ib_message_queue_size
 from trade_ibkr.utils import asyncio_run, print_error, print_log
 
 _error_code_ignore: set[int] = {
@@ -29,7 +32,20 @@ class IBapiBase(EWrapper, EClient, ABC):
 
         self._on_error_handler: OnError | None = None
 
+        self._callback_recorder: CallbackRecorder | None = None
+
     def activate(self, port: int, client_id: int):
+        profiler_config = get_config().system.profiler
+
+        if profiler_config.enable:
+            callback_profiler.top_n = profiler_config.top_n
+            callback_profiler.report_interval_sec = profiler_config.report_interval_sec
+            callback_profiler.attach(self)
+            callback_profiler.start()
+
+        # `msg_queue` is replaced on connect
+        metric_ib_message_queue_size.set_function(lambda: self.msg_queue.qsize())
+
         self.connect(
             "localhost",
             port,  # Configured at TWS
@@ -50,6 +66,21 @@ class IBapiBase(EWrapper, EClient, ABC):
         api_thread = threading.Thread(target=run_loop)
         api_thread.start()
 
+    def start_capture(self, file_path: str):
+        """Capture the market data and the order status callbacks to ``file_path``, should be called before activate."""
+        self.stop_capture()
+
+        self._callback_recorder = CallbackRecorder(file_path)
+        self._callback_recorder.attach(self)
+
+    def stop_capture(self):
+        if not self._callback_recorder:
+            return
+
+        self._callback_recorder.detach(self)
+        self._callback_recorder.close()
+        self._callback_recorder = None
+
     def set_on_error(self, on_error: OnError):
         self._on_error_handler = on_error
 
@@ -10,7 +10,8 @@ from trade_ibkr.model import (
     OnExecutionFetched, OnExecutionFetchedEvent, OnExecutionFetchedGetParams, OnExecutionFetchedParams,
     OrderExecution, OrderExecutionCollection,
 )
-from trade_ibkr.utils import asyncio_run, print_error
+from trade_ibkr.perf import metric_execution_refresh
+from trade_ibkr.utils import asyncio_run, contract_registry, print_error
 from .open_order import IBapiOpenOrder
 from .position import IBapiPosition
 
@@ -28,7 +29,7 @@ class IBapiExecution(IBapiOpenOrder, IBapiPosition, ABC):
         self._execution_cache[execution.execId] = OrderExecution(
             exec_id=execution.execId,
             order_id=execution.permId,
-            contract=contract,
+            contract_id=contract_registry.register(contract),
             local_time_original=execution.time,
             side=execution.side,
             cumulative_quantity=execution.cumQty,
@@ -73,6 +74,7 @@ class IBapiExecution(IBapiOpenOrder, IBapiPosition, ABC):
             ))
 
         asyncio_run(execute_after_execution_fetched())
+        metric_execution_refresh.observe(time.time() - _time)
 
         self._execution_cache = {}
 
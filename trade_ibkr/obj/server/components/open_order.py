@@ -7,7 +7,7 @@ from ibapi.order import Order
 from ibapi.order_state import OrderState
 
 from trade_ibkr.model import OnOpenOrderFetched, OnOpenOrderFetchedEvent, OpenOrder, OpenOrderBook
-from trade_ibkr.utils import asyncio_run, get_contract_identifier, get_order_trigger_price, print_error
+from trade_ibkr.utils import asyncio_run, contract_registry, get_order_trigger_price, print_error
 from .order_base import IBapiOrderBase
 
 
@@ -28,7 +28,7 @@ class IBapiOpenOrder(IBapiOrderBase, ABC):
         self._order_cache[orderId] = order
         self._open_order_list.append(OpenOrder(
             order_id=orderId,
-            contract=contract,
+            contract_id=contract_registry.register(contract),
             price=get_order_trigger_price(order),
             quantity=order.totalQuantity,
             side=order.action,
@@ -73,6 +73,6 @@ class IBapiOpenOrder(IBapiOrderBase, ABC):
 
     def _has_open_order_of_contract(self, contract_identifier: int) -> bool:
         return any(
-            get_contract_identifier(open_order.contract) == contract_identifier
+            open_order.contract_id == contract_identifier
             for open_order in self._open_order_list
         )
@@ -1,11 +1,13 @@
 import time
 from abc import ABC
 
-from ibapi.contract import ContractDetails
+from ibapi.common import OrderId
+from ibapi.contract import Contract, ContractDetails
 from ibapi.order import Order
 
 from trade_ibkr.enums import reverse_order_side
 from trade_ibkr.model import OnOrderFilled, PositionData
+from trade_ibkr.perf import order_latency_tracer
 from trade_ibkr.utils import get_contract_symbol, make_market_order, print_error, print_log
 from .base import IBapiBase
 
@@ -27,6 +29,11 @@ class IBapiOrderBase(IBapiBase, ABC):
         print_log(f"[API] Fetched next valid order ID {orderId}")
         self._order_valid_id = orderId
 
+    def placeOrder(self, orderId: OrderId, contract: Contract, order: Order):
+        order_latency_tracer.on_order_sent(orderId, is_child=bool(order.parentId))
+
+        super().placeOrder(orderId, contract, order)
+
     @property
     def next_valid_order_id(self) -> int:
         if not self._order_valid_id:
@@ -6,9 +6,10 @@ from ibapi.contract import Contract, ContractDetails
 from ibapi.order import Order
 from ibapi.order_state import OrderState
 
-from trade_ibkr.const import RISK_MGMT_SL_X, RISK_MGMT_TP_X
+from trade_ibkr.config import get_config
 from trade_ibkr.enums import OrderSideConst
 from trade_ibkr.model import OnOrderFilled, OnOrderFilledEvent
+from trade_ibkr.perf import order_latency_tracer
 from trade_ibkr.utils import (
     asyncio_run, get_basic_contract_symbol, get_contract_identifier,
     get_detailed_contract_identifier, make_limit_bracket_order, make_limit_order, make_stop_limit_order,
@@ -42,6 +43,8 @@ class IBapiOrderManagement(IBapiExecution, IBapiOpenOrder, IBapiPosition, ABC):
         self._order_filled_avg_px = None
 
     def completedOrder(self, contract: Contract, order: Order, orderState: OrderState):
+        order_latency_tracer.on_order_completed(order.permId)
+
         if order.permId == self._order_filled_perm_id:
             self._handle_on_order_filled(contract, order)
 
@@ -51,6 +54,8 @@ class IBapiOrderManagement(IBapiExecution, IBapiOpenOrder, IBapiPosition, ABC):
             parentId: int, lastFillPrice: float, clientId: int,
             whyHeld: str, mktCapPrice: float
     ):
+        order_latency_tracer.on_order_status(orderId, permId, status, remaining)
+
         if status in ("Cancelled", "Filled"):
             # Triggered on order cancelled, or filled (along with `openOrder`, on order placed or filled)
             self.request_open_orders()
@@ -76,12 +81,14 @@ class IBapiOrderManagement(IBapiExecution, IBapiOpenOrder, IBapiPosition, ABC):
         if not order_px:
             order_px = current_px
 
+        risk_management_config = get_config().risk_management
+
         def _make_limit_order_internal() -> list[Order]:
             if force_bracket:
                 return make_limit_bracket_order(
                     side, quantity, order_px, order_id,
-                    take_profit_px_diff=diff_sma * RISK_MGMT_TP_X,
-                    stop_loss_px_diff=diff_sma * RISK_MGMT_SL_X,
+                    take_profit_px_diff=diff_sma * risk_management_config.take_profit_x,
+                    stop_loss_px_diff=diff_sma * risk_management_config.stop_loss_x,
                     min_tick=min_tick
                 )
 
@@ -94,8 +101,8 @@ class IBapiOrderManagement(IBapiExecution, IBapiOpenOrder, IBapiPosition, ABC):
 
             return make_limit_bracket_order(
                 side, quantity, order_px, order_id,
-                take_profit_px_diff=diff_sma * RISK_MGMT_TP_X,
-                stop_loss_px_diff=diff_sma * RISK_MGMT_SL_X,
+                take_profit_px_diff=diff_sma * risk_management_config.take_profit_x,
+                stop_loss_px_diff=diff_sma * risk_management_config.stop_loss_x,
                 min_tick=min_tick
             )
 
@@ -173,7 +180,7 @@ class IBapiOrderManagement(IBapiExecution, IBapiOpenOrder, IBapiPosition, ABC):
         parent_order_ids_cancelled = set()
 
         for open_order in self._open_order_list:
-            if get_contract_identifier(open_order.contract) != get_detailed_contract_identifier(contract):
+            if open_order.contract_id != get_detailed_contract_identifier(contract):
                 continue
 
             if open_order.has_parent:
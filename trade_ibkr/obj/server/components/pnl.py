@@ -3,7 +3,7 @@ from decimal import Decimal
 
 from ibapi.contract import ContractDetails
 
-from trade_ibkr.const import ACCOUNT_NUMBER_IN_USE
+from trade_ibkr.config import get_config
 from trade_ibkr.model import OnPnLUpdated, OnPnLUpdatedEvent, PnL
 from trade_ibkr.utils import asyncio_run, get_contract_symbol, get_detailed_contract_identifier, print_error, print_log
 from .px import IBapiPx
@@ -23,7 +23,7 @@ class IBapiPnL(IBapiPx, ABC):
         req_id_pnl = self.next_valid_request_id
         self.reqPnLSingle(
             req_id_pnl,
-            ACCOUNT_NUMBER_IN_USE,
+            get_config().system.account_number_in_use,
             "",
             contract_details.contract.conId
         )
@@ -5,7 +5,8 @@ from typing import Literal
 from ibapi.contract import Contract
 
 from trade_ibkr.model import OnPositionFetched, OnPositionFetchedEvent, Position, PositionData
-from trade_ibkr.utils import asyncio_run, print_error, print_log
+from trade_ibkr.perf import order_latency_tracer
+from trade_ibkr.utils import asyncio_run, contract_registry, print_error, print_log
 from .base import IBapiBase
 
 
@@ -19,7 +20,7 @@ class IBapiPosition(IBapiBase, ABC):
 
     def position(self, account: str, contract: Contract, position: Decimal, avgCost: float):
         self._position_data_list.append(PositionData(
-            contract=contract,
+            contract_id=contract_registry.register(contract),
             position=position,
             avg_cost=avgCost,
         ))
@@ -27,6 +28,8 @@ class IBapiPosition(IBapiBase, ABC):
     def positionEnd(self):
         print_log("[TWS] Position fetch completed")
 
+        order_latency_tracer.on_position_refreshed()
+
         if self._position_on_fetched == "UNDEFINED":
             print_error(
                 "Position fetched, but no corresponding handler is set. "
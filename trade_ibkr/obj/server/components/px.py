@@ -1,18 +1,22 @@
+import math
 import time
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import DefaultDict, TypeVar
+from typing import DefaultDict, Iterable, TypeVar
 
 from ibapi.common import BarData, TickAttrib, TickerId
 from ibapi.contract import Contract
 from ibapi.ticktype import TickType, TickTypeEnum
 
+from trade_ibkr.calc import BarResampler
+from trade_ibkr.config import get_config
 from trade_ibkr.model import (
     OnMarketDataReceived, OnMarketDataReceivedEvent, OnPxDataUpdatedEventNoAccount, OnPxDataUpdatedNoAccount,
-    PxData, PxDataCache, PxDataCacheEntry,
+    PxData, PxDataCache, PxDataCacheEntry, PxDataHistory, PxDataMemoryUsage, PxQuote,
 )
-from trade_ibkr.utils import asyncio_run, print_warning
+from trade_ibkr.perf import metric_ticks
+from trade_ibkr.utils import asyncio_run, get_detailed_contract_identifier, print_warning
 from .contract import IBapiContract
 
 
@@ -26,6 +30,13 @@ class PxDataCacheEntryKeepUpdate(PxDataCacheEntry):
     on_update_market: OnMarketDataReceived
 
 
+@dataclass(kw_only=True)
+class PxDataCacheEntryResampled(PxDataCacheEntry):
+    # Request ID of the Px data to resample from
+    base_req_id: int
+    resampler: BarResampler
+
+
 T = TypeVar("T", bound=PxDataCache)
 
 
@@ -45,10 +56,15 @@ class IBapiPx(IBapiContract, ABC):
 
         self._market_request_source: dict[Contract, int] = {}
 
+        # Request ID of the base Px data to the request IDs of the Px data resampled from it
+        self._px_resampled_of_base: DefaultDict[int, set[int]] = defaultdict(set)
+
     # region Historical
 
     def _on_historical_data_return(self, req_id_px: int, bar: BarData, /, is_realtime_update: bool):
-        cache_entry = self._px_data_cache.data[req_id_px]
+        if not (cache_entry := self._px_data_cache.data.get(req_id_px)):
+            # Px data canceled
+            return
 
         if contract_req_id := self._px_req_id_to_contract_req_id.get(req_id_px):
             contract = self._contract_data.get(contract_req_id)
@@ -61,11 +77,70 @@ class IBapiPx(IBapiContract, ABC):
                 return
 
             # Add contract detail to PxData object
-            cache_entry.contract = contract
+            self._px_data_cache.set_contract(req_id_px, contract)
 
         cache_entry.update_latest_history(bar, is_realtime_update=is_realtime_update)
 
+    def _resample_px_data(self, start_epoch: float, base_req_id: int, *, is_full: bool):
+        if not (px_req_ids := self._px_resampled_of_base.get(base_req_id)):
+            return
+
+        base_cache_entry = self._px_data_cache.data[base_req_id]
+
+        if not base_cache_entry.is_history_loaded or not base_cache_entry.is_ready:
+            return
+
+        base_epoch_latest = max(base_cache_entry.data.keys())
+
+        for px_req_id in px_req_ids:
+            if not (px_data_cache_entry := self._px_data_cache.data.get(px_req_id)):
+                continue
+
+            resampler = px_data_cache_entry.resampler
+
+            if is_full:
+                self._px_data_cache.set_contract(px_req_id, base_cache_entry.contract)
+                px_data_cache_entry.replace_bars(resampler.resample(base_cache_entry.data))
+                px_data_cache_entry.mark_history_loaded()
+                px_data_cache_entry.enforce_retention()
+            else:
+                # Only the resampled bar containing the latest base bar could change
+                bar = resampler.update(base_cache_entry.data, base_epoch_latest)
+
+                if not bar or not px_data_cache_entry.update_bar(bar):
+                    continue
+
+                resampler.forget_removed(px_data_cache_entry.data)
+
+            if is_full or px_data_cache_entry.is_send_px_data_ok:
+                self._on_px_data_updated(start_epoch, px_data_cache_entry)
+
+    def _update_resample_min_bars(self, base_req_id: int):
+        # Base bars of a resampled bar must be all kept, otherwise the resampled bar is rebuilt from a part of them
+        if not (base_cache_entry := self._px_data_cache.data.get(base_req_id)):
+            return
+
+        base_cache_entry.min_bars = max(
+            (
+                math.ceil(self._px_data_cache.data[px_req_id].period_sec / base_cache_entry.period_sec)
+                for px_req_id in self._px_resampled_of_base.get(base_req_id, set())
+            ),
+            default=0,
+        )
+
+        if (
+                (max_bars := get_config().data.retention.get_max_bars(base_cache_entry.period_sec))
+                and max_bars < base_cache_entry.min_bars
+        ):
+            print_warning(
+                f"[Px] Keeping {base_cache_entry.min_bars} bars instead of {max_bars} in `data.retention` "
+                f"for the Px data of period {base_cache_entry.period_sec} s, to cover a full resampled bar",
+                force=True
+            )
+
     def _on_px_data_updated(self, start_epoch: float, px_data_cache_entry: PxDataCacheEntry):
+        px_data_cache_entry.mark_historical_sent()
+
         if not px_data_cache_entry.on_update:
             return
 
@@ -78,13 +153,13 @@ class IBapiPx(IBapiContract, ABC):
 
         asyncio_run(execute_on_update())
 
-    def _request_px_data(self, *, contract: Contract, duration: str, bar_size: str, keep_update: bool) -> int:
-        request_id = self.next_valid_request_id
-
+    def _request_px_data(
+            self, request_id: int, *,
+            contract: Contract, duration: str, bar_size: str, keep_update: bool
+    ):
+        # `request_id` should be registered to the cache before the request, as the data could return right away
         self.reqHistoricalData(request_id, contract, "", duration, bar_size, "TRADES", 0, 2, keep_update, [])
 
-        return request_id
-
     def historicalData(self, reqId: int, bar: BarData):
         super().historicalData(reqId, bar)
 
@@ -96,7 +171,10 @@ class IBapiPx(IBapiContract, ABC):
 
         self._on_historical_data_return(reqId, bar, is_realtime_update=True)
 
-        px_data_cache_entry = self._px_data_cache.data[reqId]
+        if not (px_data_cache_entry := self._px_data_cache.data.get(reqId)):
+            return
+
+        self._resample_px_data(_time, reqId, is_full=False)
 
         if isinstance(px_data_cache_entry, PxDataCacheEntryKeepUpdate) and px_data_cache_entry.is_send_px_data_ok:
             # Update Px data if it should keep updated
@@ -112,7 +190,13 @@ class IBapiPx(IBapiContract, ABC):
 
         super().historicalDataEnd(reqId, start, end)
 
-        px_data_cache_entry = self._px_data_cache.data[reqId]
+        if not (px_data_cache_entry := self._px_data_cache.data.get(reqId)):
+            return
+
+        px_data_cache_entry.mark_history_loaded()
+        # Resampled before the memory budget applies, so the resampled Px data get the whole initial history
+        self._resample_px_data(_time, reqId, is_full=True)
+        px_data_cache_entry.enforce_retention()
 
         if px_data_cache_entry.is_send_px_data_ok:
             self._on_px_data_updated(_time, px_data_cache_entry)
@@ -145,10 +229,22 @@ class IBapiPx(IBapiContract, ABC):
         if name != "LAST":
             return
 
-        px_req_id = next(px_req_id for px_req_id in self._px_market_to_px_data[reqId])
+        if not (px_req_ids := self._px_market_to_px_data.get(reqId)):
+            # Market data returned before the Px data request is registered
+            return
+
+        px_req_id = next(iter(px_req_ids))
+
+        if not (px_data_cache_entry := self._px_data_cache.data.get(px_req_id)):
+            return
+
+        if px_data_cache_entry.contract:
+            metric_ticks.labels(get_detailed_contract_identifier(px_data_cache_entry.contract)).inc()
 
-        px_data_cache_entry = self._px_data_cache.data[px_req_id]
-        px_data_cache_entry.update_latest_market(price)
+        if not px_data_cache_entry.update_latest_market(price):
+            return
+
+        self._resample_px_data(time.time(), px_req_id, is_full=False)
 
         if (
                 not isinstance(px_data_cache_entry, PxDataCacheEntryKeepUpdate) or
@@ -156,11 +252,15 @@ class IBapiPx(IBapiContract, ABC):
         ):
             return
 
+        event = OnMarketDataReceivedEvent(
+            contract=px_data_cache_entry.contract,
+            px=price,
+            is_hl_broken=px_data_cache_entry.is_market_hl_broken,
+        )
+        px_data_cache_entry.mark_market_sent()
+
         async def execute_on_update():
-            await px_data_cache_entry.on_update_market(OnMarketDataReceivedEvent(
-                contract=px_data_cache_entry.contract,
-                px=price,
-            ))
+            await px_data_cache_entry.on_update_market(event)
 
         asyncio_run(execute_on_update())
 
@@ -169,6 +269,25 @@ class IBapiPx(IBapiContract, ABC):
     def get_px_data_from_cache(self, req_id: int) -> PxData:
         return self._px_data_cache.data[req_id].to_px_data()
 
+    def get_px_data_list_from_cache(self, req_ids: Iterable[int]) -> list[PxData]:
+        """Get the ``PxData`` of each of ``req_ids``, skipping the ones canceled or not ready."""
+        return [
+            px_data_cache_entry.to_px_data() for req_id in req_ids
+            if (px_data_cache_entry := self._px_data_cache.data.get(req_id)) and px_data_cache_entry.is_ready
+        ]
+
+    def get_px_quote_from_cache(self, req_id: int) -> PxQuote | None:
+        return self._px_data_cache.data[req_id].to_px_quote()
+
+    def get_px_data_memory_usage(self, req_id: int) -> PxDataMemoryUsage:
+        return self._px_data_cache.data[req_id].get_memory_usage()
+
+    def get_px_data_history(self, req_id: int) -> PxDataHistory:
+        return self._px_data_cache.data[req_id].get_history()
+
+    def get_px_req_id_of_series(self, contract_identifier: int, period_sec: int) -> int | None:
+        return self._px_data_cache.get_req_id_of_series(contract_identifier, period_sec)
+
     def get_px_data_keep_update(
             self, *,
             contract: Contract, duration: str, bar_size: str, period_sec: int, is_major: bool,
@@ -177,7 +296,7 @@ class IBapiPx(IBapiContract, ABC):
     ) -> int:
         req_contract = self.request_contract_data(contract)
         req_market = self._request_px_data_market(contract)
-        req_px = self._request_px_data(contract=contract, duration=duration, bar_size=bar_size, keep_update=True)
+        req_px = self.next_valid_request_id
 
         self._px_req_id_to_contract_req_id[req_px] = req_contract
         self._contract_req_id_to_px_req_id[req_contract].add(req_px)
@@ -192,8 +311,115 @@ class IBapiPx(IBapiContract, ABC):
             on_update=on_px_data_updated,
             on_update_market=on_market_data_received,
         )
+        self._request_px_data(req_px, contract=contract, duration=duration, bar_size=bar_size, keep_update=True)
+
+        return req_px
+
+    def get_px_data_resampled(
+            self, *,
+            base_req_id: int, period_sec: int, is_major: bool,
+            on_px_data_updated: OnPxDataUpdatedNoAccount,
+    ) -> int:
+        """
+        Get the Px data of ``period_sec`` resampled from the Px data of ``base_req_id``, without requesting TWS.
+
+        The Px data is updated on each update of the base Px data.
+        """
+        base_cache_entry = self._px_data_cache.data[base_req_id]
+        # Only to identify the Px data, never sent to TWS
+        req_px = self.next_valid_request_id
+
+        self._px_data_cache.data[req_px] = PxDataCacheEntryResampled(
+            contract=None,
+            period_sec=period_sec,
+            is_major=is_major,
+            contract_og=base_cache_entry.contract_og,
+            data={},
+            on_update=on_px_data_updated,
+            base_req_id=base_req_id,
+            resampler=BarResampler(period_sec),
+        )
+        # Replaced instead of updated, as the set is read by the callbacks
+        self._px_resampled_of_base[base_req_id] = self._px_resampled_of_base[base_req_id] | {req_px}
+        self._update_resample_min_bars(base_req_id)
+
+        if base_cache_entry.is_history_loaded:
+            self._resample_px_data(time.time(), base_req_id, is_full=True)
 
         return req_px
 
+    def cancel_px_data_keep_update(self, req_id: int):
+        """Stop updating the Px data of ``req_id``, and the market data of its contract if no other Px data uses it."""
+        if isinstance(px_data_cache_entry := self._px_data_cache.data.get(req_id), PxDataCacheEntryResampled):
+            base_req_id = px_data_cache_entry.base_req_id
+
+            if px_req_ids_left := self._px_resampled_of_base.get(base_req_id, set()) - {req_id}:
+                self._px_resampled_of_base[base_req_id] = px_req_ids_left
+            else:
+                self._px_resampled_of_base.pop(base_req_id, None)
+
+            self._px_data_cache.remove(req_id)
+            self._update_resample_min_bars(base_req_id)
+            return
+
+        self.cancelHistoricalData(req_id)
+        self._px_resampled_of_base.pop(req_id, None)
+
+        for req_market, px_req_ids in list(self._px_market_to_px_data.items()):
+            if req_id not in px_req_ids:
+                continue
+
+            # Replaced instead of updated, as the set is read by `tickPrice()`
+            if px_req_ids_left := px_req_ids - {req_id}:
+                self._px_market_to_px_data[req_market] = px_req_ids_left
+                continue
+
+            self.cancelMktData(req_market)
+            del self._px_market_to_px_data[req_market]
+            self._market_request_source = {
+                contract: req_id_market for contract, req_id_market in self._market_request_source.items()
+                if req_id_market != req_market
+            }
+
+        if (req_contract := self._px_req_id_to_contract_req_id.pop(req_id, None)) is not None:
+            self._contract_req_id_to_px_req_id[req_contract].discard(req_id)
+
+            if not self._contract_req_id_to_px_req_id[req_contract]:
+                del self._contract_req_id_to_px_req_id[req_contract]
+                self._contract_data.pop(req_contract, None)
+
+        self._px_data_cache.remove(req_id)
+
+    def refresh_px_data(self, req_id: int, *, rebuild_indicators: bool = False):
+        """Rebuild the Px data of ``req_id`` from the cached bars, then send it to its handler."""
+        px_data_cache_entry = self._px_data_cache.data[req_id]
+
+        # Memory budget could be changed with the config
+        px_data_cache_entry.enforce_retention()
+
+        if rebuild_indicators:
+            px_data_cache_entry.rebuild_indicators()
+
+        # Makes `to_px_data()` rebuild with the current config
+        px_data_cache_entry.bump_version()
+
+        if px_data_cache_entry.is_ready:
+            self._on_px_data_updated(time.time(), px_data_cache_entry)
+
+    def set_px_data_is_major(self, req_id: int, is_major: bool) -> bool:
+        """Returns if ``is_major`` of the Px data of ``req_id`` is changed."""
+        px_data_cache_entry = self._px_data_cache.data[req_id]
+
+        if px_data_cache_entry.is_major == is_major:
+            return False
+
+        px_data_cache_entry.is_major = is_major
+        px_data_cache_entry.bump_version()
+
+        return True
+
+    def is_px_data_ready(self, req_id: int) -> bool:
+        return bool(px_data_cache_entry := self._px_data_cache.data.get(req_id)) and px_data_cache_entry.is_ready
+
     def is_all_px_data_ready(self) -> bool:
         return self._px_data_cache.is_all_px_data_ready()
@@ -2,7 +2,7 @@ from abc import ABC
 
 import pandas as pd
 
-from trade_ibkr.const import SERVER_CLIENT_ID_DEMO, SERVER_CLIENT_ID_LIVE
+from trade_ibkr.config import get_config
 from trade_ibkr.model import OnExecutionFetchedEvent, OnExecutionFetchedGetParams
 from trade_ibkr.utils import print_log
 from .components import IBapiExecution
@@ -16,9 +16,11 @@ class IBapiExecutionRecorder(IBapiExecution, ABC):
     ):
         super().__init__()
 
+        client_id_config = get_config().server.client_id
+
         self.activate(
             8384 if is_demo else 8383,  # Configured at TWS
-            client_id or (SERVER_CLIENT_ID_LIVE if is_demo else SERVER_CLIENT_ID_DEMO)
+            client_id or (client_id_config.live if is_demo else client_id_config.demo)
         )
 
     async def _unaggregated_fetch(self, e: OnExecutionFetchedEvent):
@@ -1,4 +1,4 @@
-from trade_ibkr.const import FORCE_STOP_LOSS_DIFF_SMA_X, FORCE_STOP_LOSS_PERIOD_SEC
+from trade_ibkr.config import get_config
 from trade_ibkr.line import line_notify
 from trade_ibkr.model import PxData, PxDataCache, PxDataCacheEntry
 from trade_ibkr.utils import print_warning
@@ -20,9 +20,11 @@ class IBapiServer(IBapiPx, IBapiOrderManagement):
         self._check_positions_force_stop_loss(px_data_list)
 
     def _check_positions_force_stop_loss(self, px_data_list: list[PxData]):
+        force_stop_loss_config = get_config().risk_management.force_stop_loss
+
         px_data_dict: dict[int, PxData] = {
             px_data.contract_identifier: px_data for px_data in px_data_list
-            if px_data.period_sec == FORCE_STOP_LOSS_PERIOD_SEC
+            if px_data.period_sec == force_stop_loss_config.period_sec
         }
 
         if not self._position_data:
@@ -36,7 +38,7 @@ class IBapiServer(IBapiPx, IBapiOrderManagement):
                 continue
 
             diff_sma_x = float(position.px_diff(px_data.current_close)) / px_data.current_diff_sma
-            if diff_sma_x < FORCE_STOP_LOSS_DIFF_SMA_X:
+            if diff_sma_x < force_stop_loss_config.px_diff_sma_ratio:
                 print_warning(f"Force stop loss triggered @ Diff SMA {diff_sma_x:.3f}", force=True)
 
                 self.cancel_open_orders_of_contract(px_data.contract)
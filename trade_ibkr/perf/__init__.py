@@ -0,0 +1,10 @@
+from .callback_profiler import CallbackProfileData, CallbackProfiler, CallbackProfilerData, get_overridden_callbacks
+from .const import (
+    callback_profiler, metric_event_loop_lag, metric_execution_refresh, metric_ib_message_queue_size, metric_px_data_stage,
+    metric_socket_emit_errors, metric_socket_emit_lag, metric_socket_encode, metric_socket_payload, metric_ticks,
+    metrics_registry, order_latency_tracer,
+)
+from .event_loop import monitor_event_loop_lag
+from .histogram import LatencyHistogram, LatencyHistogramData
+from .metrics import Counter, Gauge, Histogram, METRICS_CONTENT_TYPE, MetricsRegistry
+from .order_latency import OrderLatencyData, OrderLatencyRecord, OrderLatencyTracer
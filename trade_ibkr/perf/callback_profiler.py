@@ -0,0 +1,174 @@
+import inspect
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, TypedDict
+
+from ibapi.wrapper import EWrapper
+
+from trade_ibkr.utils import print_log, set_asyncio_run_listener
+from .histogram import LatencyHistogram, LatencyHistogramData
+
+
+class CallbackProfileData(TypedDict):
+    callback: str
+    count: int
+    totalMs: float
+    # Time spent in the handlers run by the callback, such as the socket handlers
+    handlerMs: float
+    handlerRuns: int
+    duration: LatencyHistogramData
+
+
+class CallbackProfilerData(TypedDict):
+    # Epoch sec of the start of the profiling or the last reset
+    since: float
+    # Sorted by the total duration, descending
+    callbacks: list[CallbackProfileData]
+
+
+@dataclass(kw_only=True)
+class _CallbackStats:
+    duration: LatencyHistogram = field(default_factory=LatencyHistogram)
+    handler_sec: float = 0
+    handler_runs: int = 0
+
+
+def get_overridden_callbacks(app_cls: type) -> list[str]:
+    """Names of the ``EWrapper`` callbacks overridden by ``app_cls`` or its base classes."""
+    return [
+        name for name, method in inspect.getmembers(EWrapper, inspect.isfunction)
+        if not name.startswith("_") and getattr(app_cls, name) is not method
+    ]
+
+
+class CallbackProfiler:
+    """
+    Times each ``EWrapper`` callback overridden by the app, and the handlers run by ``asyncio_run()`` in it.
+
+    Callbacks are wrapped by the instance attributes on attach, so nothing is added to the callbacks
+    if the profiler is not attached. The top callbacks by total duration are printed every ``report_interval_sec``.
+    """
+
+    def __init__(self, *, top_n: int = 10, report_interval_sec: float | None = 60):
+        self.top_n = top_n
+        self.report_interval_sec = report_interval_sec
+
+        self._stats: dict[str, _CallbackStats] = {}
+        self._since = time.time()
+
+        # Handler duration of the callback being run on each thread, `None` if not in a callback
+        self._local = threading.local()
+
+        self._stopped = threading.Event()
+        self._reporter: threading.Thread | None = None
+
+    def _on_handler_run(self, duration_sec: float):
+        if getattr(self._local, "handler", None) is None:
+            return
+
+        handler_sec, handler_runs = self._local.handler
+        self._local.handler = (handler_sec + duration_sec, handler_runs + 1)
+
+    def _wrap(self, stats: _CallbackStats, method: Callable[..., Any]) -> Callable[..., Any]:
+        local = self._local
+        perf_counter = time.perf_counter
+
+        def wrapped(*args, **kwargs):
+            handler_outer = getattr(local, "handler", None)
+            local.handler = (0., 0)
+            start = perf_counter()
+
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats.duration.record(perf_counter() - start)
+
+                handler_sec, handler_runs = local.handler
+                stats.handler_sec += handler_sec
+                stats.handler_runs += handler_runs
+
+                # Handlers run by a nested callback are also run by the outer one
+                local.handler = (
+                    None if handler_outer is None
+                    else (handler_outer[0] + handler_sec, handler_outer[1] + handler_runs)
+                )
+
+        return wrapped
+
+    def attach(self, app: EWrapper):
+        for name in get_overridden_callbacks(type(app)):
+            stats = self._stats.setdefault(name, _CallbackStats())
+            setattr(app, name, self._wrap(stats, getattr(app, name)))
+
+        print_log(f"[Profiler] Profiling the callbacks of {type(app).__name__}")
+
+    def start(self):
+        set_asyncio_run_listener(self._on_handler_run)
+
+        if not self.report_interval_sec or self._reporter:
+            return
+
+        self._stopped.clear()
+        self._reporter = threading.Thread(target=self._run_reporter, name="CallbackProfiler", daemon=True)
+        self._reporter.start()
+
+    def stop(self):
+        set_asyncio_run_listener(None)
+
+        self._stopped.set()
+        if self._reporter:
+            self._reporter.join()
+            self._reporter = None
+
+    def _run_reporter(self):
+        while not self._stopped.wait(self.report_interval_sec):
+            self.report()
+
+    def reset(self):
+        for stats in self._stats.values():
+            stats.duration.reset()
+            stats.handler_sec = 0
+            stats.handler_runs = 0
+
+        self._since = time.time()
+
+    def snapshot(self, *, top_n: int | None = None) -> CallbackProfilerData:
+        callbacks: list[CallbackProfileData] = sorted(
+            (
+                {
+                    "callback": name,
+                    "count": stats.duration.count,
+                    "totalMs": stats.duration.total_ms,
+                    "handlerMs": stats.handler_sec * 1000,
+                    "handlerRuns": stats.handler_runs,
+                    "duration": stats.duration.to_dict(),
+                }
+                for name, stats in list(self._stats.items())
+                if stats.duration.count
+            ),
+            key=lambda data: data["totalMs"],
+            reverse=True,
+        )
+
+        return {
+            "since": self._since,
+            "callbacks": callbacks[:top_n] if top_n else callbacks,
+        }
+
+    def report(self):
+        snapshot = self.snapshot(top_n=self.top_n)
+
+        if not snapshot["callbacks"]:
+            return
+
+        print_log(f"[Profiler] Top {len(snapshot['callbacks'])} callbacks by total duration")
+
+        for data in snapshot["callbacks"]:
+            duration = data["duration"]
+
+            print_log(
+                f"[Profiler] {data['callback']:>24}: {data['count']} calls / total {data['totalMs']:.1f} ms "
+                f"(handlers {data['handlerMs']:.1f} ms in {data['handlerRuns']} runs) / "
+                f"p50 {duration['p50Ms']:.2f} ms / p99 {duration['p99Ms']:.2f} ms / max {duration['maxMs']:.2f} ms"
+            )
@@ -0,0 +1,44 @@
+from .callback_profiler import CallbackProfiler
+from .metrics import MetricsRegistry, SIZE_BUCKETS_BYTES
+from .order_latency import OrderLatencyTracer
+
+order_latency_tracer = OrderLatencyTracer()
+
+# Report settings are taken from the config on attach
+callback_profiler = CallbackProfiler()
+
+metrics_registry = MetricsRegistry()
+
+metric_ticks = metrics_registry.counter(
+    "trade_ibkr_ticks_total", "Last Px ticks received.",
+    label_names=("contract",),
+)
+metric_px_data_stage = metrics_registry.histogram(
+    "trade_ibkr_px_data_stage_seconds", "Duration of each stage building the Px data.",
+    label_names=("stage",),
+)
+metric_socket_encode = metrics_registry.histogram(
+    "trade_ibkr_socket_encode_seconds", "Duration of encoding a socket message to send.",
+    label_names=("event",),
+)
+metric_socket_payload = metrics_registry.histogram(
+    "trade_ibkr_socket_payload_bytes", "Size of the socket messages to send.",
+    label_names=("event",), buckets=SIZE_BUCKETS_BYTES,
+)
+metric_socket_emit_lag = metrics_registry.histogram(
+    "trade_ibkr_socket_emit_lag_seconds", "Duration from a socket message queued to sent to a client.",
+    label_names=("event",),
+)
+metric_socket_emit_errors = metrics_registry.counter(
+    "trade_ibkr_socket_emit_errors_total", "Socket messages failed to send to a client.",
+    label_names=("event",),
+)
+metric_ib_message_queue_size = metrics_registry.gauge(
+    "trade_ibkr_ib_message_queue_size", "Messages received from TWS but not processed yet.",
+)
+metric_execution_refresh = metrics_registry.histogram(
+    "trade_ibkr_execution_refresh_seconds", "Duration of processing the fetched executions, including the handler.",
+)
+metric_event_loop_lag = metrics_registry.histogram(
+    "trade_ibkr_event_loop_lag_seconds", "Delay of the scheduled callbacks of the event loop of the socket server.",
+)
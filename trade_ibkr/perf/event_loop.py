@@ -0,0 +1,12 @@
+import asyncio
+import time
+
+from .metrics import Histogram
+
+
+async def monitor_event_loop_lag(histogram: Histogram, *, interval_sec: float = 0.5):
+    """Observe how late the event loop running this wakes up from each sleep of ``interval_sec``."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval_sec)
+        histogram.observe(max(time.perf_counter() - start - interval_sec, 0))
@@ -0,0 +1,104 @@
+import threading
+from bisect import bisect_left
+from typing import TypedDict
+
+# Upper bounds of the buckets in milliseconds, roughly 1-2-5 log scale from 50 us to 60 s
+_DEFAULT_BOUNDS_MS: tuple[float, ...] = (
+    0.05, 0.1, 0.2, 0.5,
+    1, 2, 5,
+    10, 20, 50,
+    100, 200, 500,
+    1000, 2000, 5000,
+    10000, 30000, 60000,
+)
+
+
+class LatencyHistogramData(TypedDict):
+    count: int
+    avgMs: float | None
+    minMs: float | None
+    maxMs: float | None
+    p50Ms: float | None
+    p90Ms: float | None
+    p99Ms: float | None
+    buckets: dict[str, int]
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+
+    Recording is O(log B) and the memory usage is constant regardless of the count of the recorded samples.
+    Percentiles are estimated from the bucket upper bounds, clamped to the max recorded value.
+    """
+
+    def __init__(self, bounds_ms: tuple[float, ...] = _DEFAULT_BOUNDS_MS):
+        self._lock = threading.Lock()
+        self._bounds_ms = bounds_ms
+        self._counts: list[int] = [0] * (len(bounds_ms) + 1)  # Last bucket is overflow
+
+        self._count: int = 0
+        self._total_ms: float = 0
+        self._min_ms: float | None = None
+        self._max_ms: float | None = None
+
+    def record(self, duration_sec: float):
+        duration_ms = duration_sec * 1000
+
+        with self._lock:
+            self._counts[bisect_left(self._bounds_ms, duration_ms)] += 1
+            self._count += 1
+            self._total_ms += duration_ms
+            self._min_ms = duration_ms if self._min_ms is None else min(self._min_ms, duration_ms)
+            self._max_ms = duration_ms if self._max_ms is None else max(self._max_ms, duration_ms)
+
+    def percentile(self, pct: float) -> float | None:
+        """Returns the estimated ``pct`` (0 ~ 100) percentile in milliseconds."""
+        if not self._count:
+            return None
+
+        threshold = self._count * pct / 100
+        cumulative = 0
+
+        for idx, count in enumerate(self._counts):
+            cumulative += count
+
+            if cumulative >= threshold and count:
+                if idx >= len(self._bounds_ms):
+                    return self._max_ms
+
+                return min(self._bounds_ms[idx], self._max_ms)
+
+        return self._max_ms
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self._bounds_ms) + 1)
+            self._count = 0
+            self._total_ms = 0
+            self._min_ms = None
+            self._max_ms = None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def total_ms(self) -> float:
+        return self._total_ms
+
+    def to_dict(self) -> LatencyHistogramData:
+        with self._lock:
+            return {
+                "count": self._count,
+                "avgMs": self._total_ms / self._count if self._count else None,
+                "minMs": self._min_ms,
+                "maxMs": self._max_ms,
+                "p50Ms": self.percentile(50),
+                "p90Ms": self.percentile(90),
+                "p99Ms": self.percentile(99),
+                "buckets": {
+                    f"<={bound}": count
+                    for bound, count in zip(self._bounds_ms + ("inf",), self._counts)
+                },
+            }
@@ -0,0 +1,246 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Generic, Iterator, TypeVar
+
+# Upper bounds of the buckets in seconds, roughly 1-2-5 log scale from 50 us to 10 s
+DEFAULT_BUCKETS_SEC: tuple[float, ...] = (
+    0.00005, 0.0001, 0.0002, 0.0005,
+    0.001, 0.002, 0.005,
+    0.01, 0.02, 0.05,
+    0.1, 0.2, 0.5,
+    1, 2, 5, 10,
+)
+
+# Upper bounds of the buckets in bytes, from 64 B to 16 MB
+SIZE_BUCKETS_BYTES: tuple[float, ...] = tuple(float(4 ** exp) for exp in range(3, 13))
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names: tuple[str, ...], label_values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value: float = 0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value: float = 0
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float] | None):
+        """Get the value from ``function`` on collect instead."""
+        self._function = function
+
+    def get(self) -> float:
+        return self._function() if self._function else self.value
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self._counts: list[int] = [0] * (len(buckets) + 1)  # Last bucket is +Inf
+        self.sum: float = 0
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect_left(self._buckets, value)] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def get_cumulative_counts(self) -> list[tuple[float, int]]:
+        with self._lock:
+            counts = list(self._counts)
+
+        cumulative = 0
+        result = []
+
+        for bound, count in zip(self._buckets + (math.inf,), counts):
+            cumulative += count
+            result.append((bound, cumulative))
+
+        return result
+
+
+C = TypeVar("C")
+
+
+class _Metric(ABC, Generic[C]):
+    type_name: str
+
+    def __init__(self, name: str, documentation: str, *, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], C] = {}
+
+    @abstractmethod
+    def _make_child(self) -> C:
+        raise NotImplementedError()
+
+    def labels(self, *label_values: str | int) -> C:
+        key = tuple(str(value) for value in label_values)
+
+        if (child := self._children.get(key)) is not None:
+            return child
+
+        if len(key) != len(self.label_names):
+            raise ValueError(f"Metric {self.name} expects labels {self.label_names}, got {key}")
+
+        with self._lock:
+            return self._children.setdefault(key, self._make_child())
+
+    @abstractmethod
+    def _collect_child(self, label_values: tuple[str, ...], child: C) -> list[str]:
+        raise NotImplementedError()
+
+    def collect(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+        for label_values, child in list(self._children.items()):
+            lines.extend(self._collect_child(label_values, child))
+
+        return lines
+
+
+class Counter(_Metric[_CounterChild]):
+    type_name = "counter"
+
+    def _make_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _collect_child(self, label_values: tuple[str, ...], child: _CounterChild) -> list[str]:
+        return [f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric[_GaugeChild]):
+    type_name = "gauge"
+
+    def _make_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float] | None):
+        self.labels().set_function(function)
+
+    def _collect_child(self, label_values: tuple[str, ...], child: _GaugeChild) -> list[str]:
+        return [f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(child.get())}"]
+
+
+class Histogram(_Metric[_HistogramChild]):
+    type_name = "histogram"
+
+    def __init__(
+            self, name: str, documentation: str, *,
+            label_names: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS_SEC,
+    ):
+        super().__init__(name, documentation, label_names=label_names)
+
+        self.buckets = buckets
+
+    def _make_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _collect_child(self, label_values: tuple[str, ...], child: _HistogramChild) -> list[str]:
+        lines = []
+        total = 0
+
+        for bound, total in child.get_cumulative_counts():
+            labels = _format_labels(self.label_names, label_values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {total}")
+
+        labels = _format_labels(self.label_names, label_values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {total}")
+
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class MetricsRegistry:
+    """Metrics exposed in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+
+        return metric
+
+    def counter(self, name: str, documentation: str, *, label_names: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names=label_names))
+
+    def gauge(self, name: str, documentation: str, *, label_names: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names=label_names))
+
+    def histogram(
+            self, name: str, documentation: str, *,
+            label_names: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS_SEC,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names=label_names, buckets=buckets))
+
+    def render(self) -> str:
+        lines = []
+
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,197 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, TypedDict
+
+from trade_ibkr.enums import OrderLatencySpan, OrderLatencyStage
+from trade_ibkr.utils import print_log
+from .histogram import LatencyHistogram, LatencyHistogramData
+
+# `orderStatus` values that indicate TWS has accepted the order
+_ORDER_STATUS_ACK: set[str] = {"PreSubmitted", "Submitted", "Filled"}
+
+
+class OrderLatencyRecordData(TypedDict):
+    orderId: int
+    permId: int | None
+    source: str | None
+    sentAt: float
+    stagesMs: dict[str, float]
+
+
+class OrderLatencyData(TypedDict):
+    spans: dict[str, LatencyHistogramData]
+    orders: list[OrderLatencyRecordData]
+
+
+@dataclass(kw_only=True)
+class OrderLatencyRecord:
+    order_id: int
+    source: str | None
+    sent_at: float  # Epoch sec of the order being sent, for displaying only
+
+    perm_id: int | None = None
+    stamps: dict[OrderLatencyStage, float] = field(default_factory=dict)  # `time.perf_counter()` of each stage
+
+    def to_dict(self) -> OrderLatencyRecordData:
+        origin = self.stamps.get(OrderLatencyStage.SIGNAL, self.stamps[OrderLatencyStage.SEND])
+
+        return {
+            "orderId": self.order_id,
+            "permId": self.perm_id,
+            "source": self.source,
+            "sentAt": self.sent_at,
+            "stagesMs": {stage.value: (stamp - origin) * 1000 for stage, stamp in self.stamps.items()},
+        }
+
+
+class OrderLatencyTracer:
+    """
+    Timestamps each stage of an order (signal > send > ack > fill > completed / position refresh) by its order ID.
+
+    Durations between the stages are accumulated into histograms. Child orders (take profit / stop loss of a
+    bracket order) are not tracked, as their fill time depends on the market instead of the round trip.
+    """
+
+    def __init__(self, *, max_records: int = 1000):
+        self._lock = threading.Lock()
+        self._max_records = max_records
+
+        self._records: OrderedDict[int, OrderLatencyRecord] = OrderedDict()
+        self._perm_id_to_order_id: dict[int, int] = {}
+        self._awaiting_position: set[int] = set()
+
+        self._histograms: dict[OrderLatencySpan, LatencyHistogram] = {
+            span: LatencyHistogram() for span in OrderLatencySpan
+        }
+
+        # Signal is thread-local so orders sent from the socket handlers won't take the signal from the bot
+        self._signal = threading.local()
+
+    def _stamp(self, record: OrderLatencyRecord, stage: OrderLatencyStage, stamp: float):
+        if stage in record.stamps:
+            return
+
+        record.stamps[stage] = stamp
+
+        for span in OrderLatencySpan:
+            if span.end != stage or span.start not in record.stamps:
+                continue
+
+            self._histograms[span].record(stamp - record.stamps[span.start])
+
+    def _evict_oldest(self):
+        while len(self._records) > self._max_records:
+            _, record = self._records.popitem(last=False)
+
+            self._awaiting_position.discard(record.order_id)
+            if record.perm_id is not None:
+                self._perm_id_to_order_id.pop(record.perm_id, None)
+
+    @contextmanager
+    def signal(self, source: str) -> Iterator[None]:
+        """Orders sent within this context on the current thread are considered triggered by ``source``."""
+        self._signal.value = (source, time.perf_counter())
+
+        try:
+            yield
+        finally:
+            self._signal.value = None
+
+    def on_order_sent(self, order_id: int, *, is_child: bool):
+        stamp = time.perf_counter()
+
+        if is_child:
+            return
+
+        signal: tuple[str, float] | None = getattr(self._signal, "value", None)
+
+        with self._lock:
+            if order_id in self._records:
+                # Order modification, the original record is kept
+                return
+
+            record = OrderLatencyRecord(
+                order_id=order_id,
+                source=signal[0] if signal else None,
+                sent_at=time.time(),
+            )
+            if signal:
+                self._stamp(record, OrderLatencyStage.SIGNAL, signal[1])
+            self._stamp(record, OrderLatencyStage.SEND, stamp)
+
+            self._records[order_id] = record
+            self._evict_oldest()
+
+    def on_order_status(self, order_id: int, perm_id: int, status: str, remaining: float):
+        stamp = time.perf_counter()
+
+        with self._lock:
+            if not (record := self._records.get(order_id)):
+                return
+
+            if perm_id and record.perm_id is None:
+                record.perm_id = perm_id
+                self._perm_id_to_order_id[perm_id] = order_id
+
+            if status in _ORDER_STATUS_ACK:
+                self._stamp(record, OrderLatencyStage.ACK, stamp)
+
+            if status == "Filled" and remaining == 0 and OrderLatencyStage.FILL not in record.stamps:
+                self._stamp(record, OrderLatencyStage.FILL, stamp)
+                self._awaiting_position.add(order_id)
+
+    def on_order_completed(self, perm_id: int):
+        stamp = time.perf_counter()
+
+        with self._lock:
+            if (order_id := self._perm_id_to_order_id.get(perm_id)) is None:
+                return
+
+            if record := self._records.get(order_id):
+                self._stamp(record, OrderLatencyStage.COMPLETED, stamp)
+
+    def on_position_refreshed(self):
+        stamp = time.perf_counter()
+
+        with self._lock:
+            for order_id in self._awaiting_position:
+                if record := self._records.get(order_id):
+                    self._stamp(record, OrderLatencyStage.POSITION, stamp)
+
+            self._awaiting_position.clear()
+
+    def get_histogram(self, span: OrderLatencySpan) -> LatencyHistogram:
+        return self._histograms[span]
+
+    def snapshot(self, *, last_n_orders: int = 50) -> OrderLatencyData:
+        with self._lock:
+            records = list(self._records.values())[-last_n_orders:] if last_n_orders else []
+
+            return {
+                "spans": {span.key: histogram.to_dict() for span, histogram in self._histograms.items()},
+                "orders": [record.to_dict() for record in records],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._perm_id_to_order_id.clear()
+            self._awaiting_position.clear()
+
+            for histogram in self._histograms.values():
+                histogram.reset()
+
+    def dump_to_file(self, file_path: str | None = None) -> str:
+        file_path = file_path or f"latency-order-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+
+        with open(file_path, "w") as f:
+            json.dump(self.snapshot(last_n_orders=self._max_records), f, indent=2)
+
+        print_log(f"[yellow]Order latency data saved to {file_path}[/yellow]")
+
+        return file_path
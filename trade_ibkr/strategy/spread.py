@@ -5,6 +5,7 @@ from pandas import Series
 
 from trade_ibkr.enums import PxDataPairCol, Side
 from trade_ibkr.model import Account, CommodityPair, OnBotSpreadPxUpdatedEvent, UnrealizedPnL
+from trade_ibkr.perf import order_latency_tracer
 from trade_ibkr.utils import get_basic_contract_symbol, get_contract_identifier, print_log
 
 
@@ -59,12 +60,13 @@ def _has_open_position(params: SpreadTradeParams) -> bool:
 
 
 def _util_exit_all(params: SpreadTradeParams, message: str):
-    for commodity in params.commodity_pair.commodities:
-        try:
-            params.account.exit(contract=commodity.contract, message=message)
-        except ValueError:
-            # No order side - already exited
-            pass
+    with order_latency_tracer.signal("spread-exit"):
+        for commodity in params.commodity_pair.commodities:
+            try:
+                params.account.exit(contract=commodity.contract, message=message)
+            except ValueError:
+                # No order side - already exited
+                pass
 
 
 def _entry_out_of_band(params: SpreadTradeParams):
@@ -78,29 +80,32 @@ def _entry_out_of_band(params: SpreadTradeParams):
     print_log(
         f"[BOT - Spread] Checking entry | "
         f"{spread:.6f} | "
-        f"HI - {1 - spread_loc:.2%} - CUR - {spread_loc:.2%} - LO"
+        f"HI - {1 - spread_loc:.2%} - CUR - {spread_loc:.2%} - LO",
+        rate_limit_key="spread-entry-check",
     )
 
     if spread > spread_hi:
-        params.account.long(
-            params.on_high.contract, params.on_high.quantity, px=None,
-            message=f"ENTRY: Buy on out of BB (high) - {get_basic_contract_symbol(params.on_high.contract)}"
-        )
-        params.account.short(
-            params.on_low.contract, params.on_low.quantity, px=None,
-            message=f"ENTRY: Buy on out of BB (high) - {get_basic_contract_symbol(params.on_high.contract)}"
-        )
+        with order_latency_tracer.signal("spread-entry-high"):
+            params.account.long(
+                params.on_high.contract, params.on_high.quantity, px=None,
+                message=f"ENTRY: Buy on out of BB (high) - {get_basic_contract_symbol(params.on_high.contract)}"
+            )
+            params.account.short(
+                params.on_low.contract, params.on_low.quantity, px=None,
+                message=f"ENTRY: Buy on out of BB (high) - {get_basic_contract_symbol(params.on_high.contract)}"
+            )
         return
 
     if spread < spread_lo:
-        params.account.long(
-            params.on_low.contract, params.on_low.quantity, px=None,
-            message=f"ENTRY: Buy on out of BB (low) - {get_basic_contract_symbol(params.on_high.contract)}"
-        )
-        params.account.short(
-            params.on_high.contract, params.on_high.quantity, px=None,
-            message=f"ENTRY: Buy on out of BB (low) - {get_basic_contract_symbol(params.on_high.contract)}"
-        )
+        with order_latency_tracer.signal("spread-entry-low"):
+            params.account.long(
+                params.on_low.contract, params.on_low.quantity, px=None,
+                message=f"ENTRY: Buy on out of BB (low) - {get_basic_contract_symbol(params.on_high.contract)}"
+            )
+            params.account.short(
+                params.on_high.contract, params.on_high.quantity, px=None,
+                message=f"ENTRY: Buy on out of BB (low) - {get_basic_contract_symbol(params.on_high.contract)}"
+            )
         return
 
 
@@ -125,7 +130,8 @@ def _exit_take_profit_back_to_mid(params: SpreadTradeParams):
 
     print_log(
         f"[BOT - Spread] Checking exit - Current @ {spread_loc:.2%} (100% - 0%) | "
-        f"{spread:.6f} | High Side: {on_high_side}"
+        f"{spread:.6f} | High Side: {on_high_side}",
+        rate_limit_key="spread-exit-check",
     )
 
     if on_high_side == Side.LONG and spread < spread_mid:
@@ -1,10 +1,36 @@
-from .async_ import asyncio_run
+import importlib
+from typing import Any, TYPE_CHECKING
+
+from .async_ import asyncio_run, set_asyncio_run_listener
 from .calc import closest_diff, force_min_tick, cdf, avg
-from .contract import *  # noqa
-from .log import print_log, print_warning, print_error, print_socket_event, print_line_log
-from .order import (
-    make_market_order, make_limit_order, make_stop_order, make_stop_limit_order,
-    get_order_trigger_price, make_limit_bracket_order, update_order_price,
+from .market_date import (
+    MARKET_DATE_ROLL_HOUR, MARKET_TZ, get_market_bar_epoch_sec, get_market_date, to_market_bar_epoch_sec,
+    to_market_date_days, to_market_local_epoch_sec,
+)
+from .log import (
+    LogWriter, flush_logs, get_log_level, log_writer, set_log_level,
+    print_debug, print_log, print_warning, print_error, print_socket_event, print_line_log,
 )
-from .socket import *  # noqa
 from .system import set_current_process_to_highest_priority
+
+if TYPE_CHECKING:
+    from .contract import *  # noqa
+    from .order import (
+        make_market_order, make_limit_order, make_stop_order, make_stop_limit_order,
+        get_order_trigger_price, make_limit_bracket_order, update_order_price,
+    )
+    from .socket import *  # noqa
+
+# Submodules importing `ibapi` or `pandas`, imported on the first access of any of their names
+_LAZY_SUBMODULES = (".contract", ".order", ".socket")
+
+
+def __getattr__(name: str) -> Any:
+    for submodule_name in _LAZY_SUBMODULES:
+        submodule = importlib.import_module(submodule_name, __name__)
+
+        if name in vars(submodule) and not name.startswith("_"):
+            value = globals()[name] = vars(submodule)[name]
+            return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,25 @@
 import asyncio
+import time
+from typing import Callable
+
+# Called with the duration of each run if set, for profiling the handlers
+_on_run_completed: Callable[[float], None] | None = None
+
+
+def set_asyncio_run_listener(listener: Callable[[float], None] | None):
+    global _on_run_completed
+
+    _on_run_completed = listener
 
 
 def asyncio_run(coroutine):
-    asyncio.run(coroutine)
+    if not _on_run_completed:
+        asyncio.run(coroutine)
+        return
+
+    start = time.perf_counter()
+
+    try:
+        asyncio.run(coroutine)
+    finally:
+        _on_run_completed(time.perf_counter() - start)
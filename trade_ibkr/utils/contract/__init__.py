@@ -3,6 +3,7 @@ from .make import (
     make_contract_from_unique_identifier, make_crypto_contract, make_futures_contract, make_index_contract,
 )
 from .model import ContractParams
+from .registry import ContractRegistry, contract_registry
 from .type import ContractMakerFunction, ContractType
 from .utils import (
     get_contract_identifier, get_detailed_contract_identifier,
@@ -0,0 +1,33 @@
+from ibapi.contract import Contract
+
+from .utils import get_contract_identifier
+
+
+class ContractRegistry:
+    """
+    Contracts by their identifier, so the models hold the identifier instead of a contract each.
+
+    TWS sends a new ``Contract`` with every execution, open order and position,
+    only the latest one of each identifier is kept.
+    """
+
+    def __init__(self):
+        self._contracts: dict[int, Contract] = {}
+
+    def register(self, contract: Contract) -> int:
+        """Returns the identifier of ``contract`` to get it back."""
+        identifier = get_contract_identifier(contract)
+
+        self._contracts[identifier] = contract
+
+        return identifier
+
+    def get(self, identifier: int) -> Contract:
+        """:raises KeyError: if no contract of ``identifier`` is registered"""
+        return self._contracts[identifier]
+
+    def __len__(self) -> int:
+        return len(self._contracts)
+
+
+contract_registry = ContractRegistry()
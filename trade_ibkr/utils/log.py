@@ -1,24 +1,242 @@
+import atexit
+import json
+import queue
+import sys
+import threading
+import time
 from datetime import datetime
+from typing import NamedTuple
 
-from trade_ibkr.const import SUPPRESS_WARNINGS, console, console_error
+from rich.errors import MarkupError
+from rich.text import Text
 
+from trade_ibkr.config import Config, add_config_listener
+from trade_ibkr.const import console, console_error
+from trade_ibkr.enums import LogLevel
 
-def print_log(message: str, *, timestamp_color: str = "green"):
-    console.print(
-        f"[{timestamp_color}]{datetime.now().strftime('%H:%M:%S.%f')[:-3]}[/{timestamp_color}]: "
-        f"{message}"
-    )
 
+class _LogRecord(NamedTuple):
+    epoch_sec: float
+    level: LogLevel
+    message: str
+    timestamp_color: str
+    rate_limit_key: str | None
 
-def print_warning(message: str, *, force: bool = False):
-    if SUPPRESS_WARNINGS and not force:
+
+class _RateLimitWindow:
+    __slots__ = ("start", "count", "suppressed")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.count = 0
+        self.suppressed = 0
+
+
+def _to_plain_text(message: str) -> str:
+    try:
+        return Text.from_markup(message).plain
+    except MarkupError:
+        return message
+
+
+class LogWriter:
+    """
+    Formats and writes the logs on a background thread, so logging only costs a queue put for the caller.
+
+    Repeated messages of the same rate limit key (or the same message if no key is given) are limited to
+    ``max_per_window`` in each ``window_sec``. The count of the suppressed ones is attached to the next one written.
+
+    Messages are dropped if ``queue_size`` messages are pending, the count of which is written once the queue drains.
+    """
+
+    def __init__(
+            self, *,
+            level: LogLevel = LogLevel.INFO, is_json: bool = False, suppress_warnings: bool = True,
+            queue_size: int = 10000, window_sec: float = 1, max_per_window: int = 5,
+    ):
+        self.level = level
+        self.is_json = is_json
+        self.suppress_warnings = suppress_warnings
+        self.queue_size = queue_size
+        self.window_sec = window_sec
+        self.max_per_window = max_per_window
+
+        self._queue: queue.SimpleQueue[_LogRecord | threading.Event | None] = queue.SimpleQueue()
+        self._windows: dict[str, _RateLimitWindow] = {}
+        self._dropped: int = 0
+
+        self._writer = threading.Thread(target=self._run_writer, name="LogWriter", daemon=True)
+        self._writer.start()
+
+    def log(self, level: LogLevel, message: str, *, timestamp_color: str = "green", rate_limit_key: str | None = None):
+        if level < self.level:
+            return
+
+        if self._queue.qsize() >= self.queue_size:
+            self._dropped += 1
+            return
+
+        self._queue.put(_LogRecord(time.time(), level, message, timestamp_color, rate_limit_key))
+
+    def configure(self, config: Config):
+        log_config = config.system.log
+
+        self.level = LogLevel.from_name(log_config.level)
+        self.is_json = log_config.format == "json"
+        self.suppress_warnings = config.system.suppress_warning
+        self.queue_size = log_config.queue_size
+        self.window_sec = log_config.rate_limit.window_sec
+        self.max_per_window = log_config.rate_limit.max_per_window
+
+    def flush(self, timeout: float | None = 5) -> bool:
+        """Wait until the messages logged before this call are written."""
+        written = threading.Event()
+        self._queue.put(written)
+
+        return written.wait(timeout)
+
+    def close(self, timeout: float | None = 5):
+        """Write the pending messages and stop the writer."""
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    def _check_rate_limit(self, record: _LogRecord) -> int | None:
+        """Returns the count of the messages suppressed before ``record``, or ``None`` if ``record`` is suppressed."""
+        key = record.rate_limit_key or record.message
+
+        window = self._windows.get(key)
+
+        if not window or record.epoch_sec - window.start >= self.window_sec:
+            suppressed = window.suppressed if window else 0
+
+            if len(self._windows) >= 1000:
+                # Forget the expired windows so unique messages don't pile up
+                self._windows = {
+                    key_kept: window_kept for key_kept, window_kept in self._windows.items()
+                    if record.epoch_sec - window_kept.start < self.window_sec or window_kept.suppressed
+                }
+
+            window = self._windows[key] = _RateLimitWindow(record.epoch_sec)
+            window.count = 1
+            return suppressed
+
+        if window.count >= self.max_per_window:
+            window.suppressed += 1
+            return None
+
+        window.count += 1
+        return 0
+
+    def _write_text(self, record: _LogRecord, suppressed: int):
+        timestamp = datetime.fromtimestamp(record.epoch_sec).strftime("%H:%M:%S.%f")[:-3]
+        message = record.message
+
+        if suppressed:
+            message += f" [dim](+{suppressed} similar suppressed)[/dim]"
+
+        match record.level:
+            case LogLevel.DEBUG:
+                console.print(f"[dim]{timestamp}[/dim]: {message}")
+            case LogLevel.INFO:
+                console.print(f"[{record.timestamp_color}]{timestamp}[/{record.timestamp_color}]: {message}")
+            case LogLevel.WARNING:
+                console.print(f"[yellow]{timestamp}: {message}[/yellow]")
+            case LogLevel.ERROR:
+                console_error.print(f"[red]{timestamp}[/red]: {message}")
+
+    def _write_json(self, record: _LogRecord, suppressed: int):
+        data = {
+            "time": datetime.fromtimestamp(record.epoch_sec).isoformat(timespec="milliseconds"),
+            "level": record.level.name.lower(),
+            "message": _to_plain_text(record.message),
+        }
+
+        if record.rate_limit_key:
+            data["key"] = record.rate_limit_key
+
+        if suppressed:
+            data["suppressed"] = suppressed
+
+        stream = sys.stderr if record.level >= LogLevel.ERROR else sys.stdout
+        stream.write(json.dumps(data) + "\n")
+        stream.flush()
+
+    def _write(self, record: _LogRecord, suppressed: int):
+        if self.is_json:
+            self._write_json(record, suppressed)
+        else:
+            self._write_text(record, suppressed)
+
+    def _write_system(self, level: LogLevel, message: str):
+        self._write(_LogRecord(time.time(), level, f"[Log] {message}", "green", None), 0)
+
+    def _write_dropped(self):
+        dropped, self._dropped = self._dropped, 0
+
+        self._write_system(LogLevel.WARNING, f"{dropped} messages dropped as the queue is full")
+
+    def _write_suppressed(self):
+        for key, window in self._windows.items():
+            if window.suppressed:
+                self._write_system(LogLevel.INFO, f"{window.suppressed} messages of `{key}` suppressed")
+
+        self._windows = {}
+
+    def _run_writer(self):
+        while (record := self._queue.get()) is not None:
+            if isinstance(record, threading.Event):
+                record.set()
+                continue
+
+            try:
+                if (suppressed := self._check_rate_limit(record)) is not None:
+                    self._write(record, suppressed)
+
+                if self._dropped and self._queue.empty():
+                    self._write_dropped()
+            except Exception as ex:
+                # Logging should never stop because of a single message
+                sys.stderr.write(f"Failed to write log: {ex}\n")
+
+        self._write_suppressed()
+
+
+# Settings are the defaults until the config is loaded
+log_writer = LogWriter()
+
+add_config_listener(log_writer.configure)
+atexit.register(log_writer.close)
+
+
+def set_log_level(level: LogLevel):
+    log_writer.level = level
+
+
+def get_log_level() -> LogLevel:
+    return log_writer.level
+
+
+def flush_logs(timeout: float | None = 5) -> bool:
+    return log_writer.flush(timeout)
+
+
+def print_debug(message: str, *, rate_limit_key: str | None = None):
+    log_writer.log(LogLevel.DEBUG, message, rate_limit_key=rate_limit_key)
+
+
+def print_log(message: str, *, timestamp_color: str = "green", rate_limit_key: str | None = None):
+    log_writer.log(LogLevel.INFO, message, timestamp_color=timestamp_color, rate_limit_key=rate_limit_key)
+
+
+def print_warning(message: str, *, force: bool = False, rate_limit_key: str | None = None):
+    if log_writer.suppress_warnings and not force:
         return
 
-    console.print(f"[yellow]{datetime.now().strftime('%H:%M:%S.%f')[:-3]}: {message}[/yellow]")
+    log_writer.log(LogLevel.WARNING, message, rate_limit_key=rate_limit_key)
 
 
 def print_error(message: str):
-    console_error.print(f"[red]{datetime.now().strftime('%H:%M:%S.%f')[:-3]}[/red]: {message}")
+    log_writer.log(LogLevel.ERROR, message)
 
 
 def print_socket_event(event: str, additional: str = ""):
@@ -0,0 +1,91 @@
+import calendar
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from functools import cache
+
+import numpy as np
+import pytz
+
+MARKET_TZ = "America/Chicago"
+
+# Market date changes to the next date at 17:00 of the market timezone
+MARKET_DATE_ROLL_HOUR = 17
+
+_MARKET_DATE_ROLL_SEC = MARKET_DATE_ROLL_HOUR * 3600
+
+_EPOCH_DATE = date(1970, 1, 1)
+
+
+@cache
+def _get_utc_offset_table() -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the UTC epoch sec of each DST transition of the market timezone, and the UTC offset in seconds after it.
+
+    `pytz` is a dependency of `pandas`, which `pandas` uses for the timezone conversion,
+    so the offsets are the same as `tz_convert()`. Unlike `zoneinfo`, it does not need `tzdata` on Windows.
+    """
+    tz_info = pytz.timezone(MARKET_TZ)
+
+    # noinspection PyProtectedMember,PyUnresolvedReferences
+    transitions = np.array(
+        [calendar.timegm(transition.timetuple()) for transition in tz_info._utc_transition_times],
+        dtype=np.int64,
+    )
+    # noinspection PyProtectedMember,PyUnresolvedReferences
+    offsets = np.array(
+        [int(utc_offset.total_seconds()) for utc_offset, _, _ in tz_info._transition_info],
+        dtype=np.int64,
+    )
+
+    return transitions, offsets
+
+
+def to_market_local_epoch_sec(epoch_sec: np.ndarray) -> np.ndarray:
+    """Convert UTC epoch seconds to the seconds since epoch of the market local time, with integer arithmetic only."""
+    transitions, offsets = _get_utc_offset_table()
+    epoch_sec = epoch_sec.astype(np.int64, copy=False)
+
+    return epoch_sec + offsets[np.searchsorted(transitions, epoch_sec, side="right") - 1]
+
+
+def to_market_date_days(local_epoch_sec: np.ndarray) -> np.ndarray:
+    """Convert the market local epoch seconds to the days since epoch of the market date."""
+    return local_epoch_sec // 86400 + (local_epoch_sec % 86400 >= _MARKET_DATE_ROLL_SEC)
+
+
+def get_market_date(epoch_sec: float) -> date:
+    transitions, offsets = _get_utc_offset_table()
+    local_epoch_sec = int(epoch_sec) + int(offsets[bisect_right(transitions, epoch_sec) - 1])
+
+    days = local_epoch_sec // 86400 + (local_epoch_sec % 86400 >= _MARKET_DATE_ROLL_SEC)
+
+    return _EPOCH_DATE + timedelta(days=days)
+
+
+def _to_market_date_epoch_sec(days: int) -> int:
+    # Same as the epoch of the daily bars from TWS, which is the local midnight of `YYYYMMDD`
+    return int(datetime.combine(_EPOCH_DATE + timedelta(days=days), time()).timestamp())
+
+
+def to_market_bar_epoch_sec(epoch_sec: np.ndarray, period_sec: int) -> np.ndarray:
+    """
+    Convert UTC epoch seconds to the epoch seconds of the bar of ``period_sec`` containing them.
+
+    Intraday bars are aligned to the session start at the market date roll.
+    Daily bars are keyed by the market date, the same as the daily bars from TWS.
+    """
+    epoch_sec = epoch_sec.astype(np.int64, copy=False)
+    local_epoch_sec = to_market_local_epoch_sec(epoch_sec)
+
+    if period_sec >= 86400:
+        days, inverse = np.unique(to_market_date_days(local_epoch_sec), return_inverse=True)
+
+        return np.array([_to_market_date_epoch_sec(int(day)) for day in days], dtype=np.int64)[inverse]
+
+    sec_of_session = (local_epoch_sec - _MARKET_DATE_ROLL_SEC) % 86400
+
+    return epoch_sec - sec_of_session % period_sec
+
+
+def get_market_bar_epoch_sec(epoch_sec: int, period_sec: int) -> int:
+    return int(to_market_bar_epoch_sec(np.array([epoch_sec]), period_sec)[0])
@@ -1,10 +1,19 @@
+from .encoder import (
+    OrjsonSocketMessageEncoder, SocketMessageEncoder, StdlibSocketMessageEncoder, encode_socket_message,
+    get_socket_message_encoder, set_socket_message_encoder,
+)
 from .execution import to_socket_message_execution
 from .error import to_socket_message_error
 from .init import to_socket_message_init_data
+from .latency import to_socket_message_order_latency
 from .open_order import to_socket_message_open_order
 from .order import from_socket_message_order
 from .order_filled import to_socket_message_order_filled
 from .position import to_socket_message_position
 from .pnl import to_socket_message_pnl
-from .px_data import to_socket_message_px_data, to_socket_message_px_data_list
+from .px_data import release_socket_message_px_data, to_socket_message_px_data, to_socket_message_px_data_list
 from .px_data_market import to_socket_message_px_data_market, from_socket_message_px_data_market
+from .px_data_series import (
+    PxDataSeriesSocketMessagePack, from_socket_message_px_data_series, to_socket_message_px_data_series,
+)
+from .subscription import from_socket_message_subscription, to_socket_message_subscription
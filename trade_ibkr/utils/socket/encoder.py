@@ -0,0 +1,136 @@
+import json
+import math
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+from pandas import DataFrame
+
+from ..log import print_warning
+from .utils import df_rows_to_json, df_rows_to_list_of_data
+
+
+def _to_json_default(value: Any) -> Any:
+    # Values not supported by the encoders natively, `NaN` / `inf` is converted to `None` as it is not valid in JSON
+    if isinstance(value, Decimal):
+        return float(value) if value.is_finite() else None
+
+    if isinstance(value, np.integer):
+        return int(value)
+
+    if isinstance(value, np.floating):
+        return float(value) if math.isfinite(value) else None
+
+    if isinstance(value, np.bool_):
+        return bool(value)
+
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SocketMessageEncoder(ABC):
+    """
+    Encodes the socket messages to JSON.
+
+    Messages could be assembled from the values encoded separately using ``encode_object()`` and ``encode_array()``,
+    so the same encoder should be used for all parts of a message.
+    """
+
+    name: str
+
+    item_separator: str
+    key_separator: str
+
+    @abstractmethod
+    def encode(self, data: Any) -> str:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def encode_rows(self, df: DataFrame, columns: dict[str, str]) -> str:
+        """Encode the rows of ``df`` as a list of objects, keyed by the values of ``columns``."""
+        raise NotImplementedError()
+
+    def encode_object(self, encoded_values: dict[str, str]) -> str:
+        """Same as ``encode()`` of a ``dict``, for the values already encoded."""
+        return "{" + self.item_separator.join(
+            f"{self.encode(key)}{self.key_separator}{value}" for key, value in encoded_values.items()
+        ) + "}"
+
+    def encode_array(self, encoded_values: list[str]) -> str:
+        """Same as ``encode()`` of a ``list``, for the values already encoded."""
+        return "[" + self.item_separator.join(encoded_values) + "]"
+
+
+class StdlibSocketMessageEncoder(SocketMessageEncoder):
+    """
+    Encodes with ``json``, same as the messages sent before the encoders exist.
+
+    ``NaN`` of the ``float`` values is encoded as ``NaN``, so it should be converted to ``None`` before encoding.
+    The dataframe rows are encoded column by column with NumPy.
+    """
+
+    name = "json"
+
+    item_separator = ", "
+    key_separator = ": "
+
+    def encode(self, data: Any) -> str:
+        return json.dumps(data, default=_to_json_default)
+
+    def encode_rows(self, df: DataFrame, columns: dict[str, str]) -> str:
+        return df_rows_to_json(df, columns)
+
+
+class OrjsonSocketMessageEncoder(SocketMessageEncoder):
+    """
+    Encodes with ``orjson``, which encodes ``NaN``, NumPy values and ``int`` keys natively.
+
+    The output is compact, and the floats are formatted differently (``1e-05`` becomes ``1e-5``),
+    but it is parsed to the same data as ``StdlibSocketMessageEncoder``.
+    """
+
+    name = "orjson"
+
+    item_separator = ","
+    key_separator = ":"
+
+    def __init__(self):
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def encode(self, data: Any) -> str:
+        return self._dumps(data, default=_to_json_default, option=self._option).decode()
+
+    def encode_rows(self, df: DataFrame, columns: dict[str, str]) -> str:
+        return self.encode(df_rows_to_list_of_data(df, columns))
+
+
+def _make_default_encoder() -> SocketMessageEncoder:
+    # `orjson` is optional
+    try:
+        return OrjsonSocketMessageEncoder()
+    except ImportError:
+        print_warning("`orjson` not installed, socket messages are encoded with `json`")
+        return StdlibSocketMessageEncoder()
+
+
+_encoder: SocketMessageEncoder = _make_default_encoder()
+
+
+def get_socket_message_encoder() -> SocketMessageEncoder:
+    return _encoder
+
+
+def set_socket_message_encoder(encoder: SocketMessageEncoder):
+    global _encoder
+
+    _encoder = encoder
+
+
+def encode_socket_message(data: Any) -> str:
+    return _encoder.encode(data)
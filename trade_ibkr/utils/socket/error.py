@@ -1,6 +1,7 @@
-import json
 from typing import TYPE_CHECKING, TypedDict
 
+from .encoder import encode_socket_message
+
 if TYPE_CHECKING:
     from trade_ibkr.model import OnErrorEvent
 
@@ -9,9 +10,9 @@ class ErrorMessage(TypedDict):
     message: str
 
 
-def to_socket_message_error(error_event: "OnErrorEvent") -> str:
+def to_socket_message_error(error_event: "OnErrorEvent | str") -> str:
     data: ErrorMessage = {
         "message": str(error_event),
     }
 
-    return json.dumps(data)
+    return encode_socket_message(data)
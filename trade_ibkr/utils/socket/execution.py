@@ -1,10 +1,9 @@
-import json
 from typing import TYPE_CHECKING, TypeAlias, TypedDict
 
 from pandas import DataFrame
 
 from trade_ibkr.enums import ExecutionDataCol, OrderSideConst
-from .utils import df_rows_to_list_of_data
+from .encoder import SocketMessageEncoder, get_socket_message_encoder
 
 if TYPE_CHECKING:
     from trade_ibkr.model import OrderExecutionCollection
@@ -52,7 +51,8 @@ class ExecutionGroup(TypedDict):
 ExecutionDict: TypeAlias = dict[int, list[ExecutionGroup]]
 
 
-def _from_grouped_execution_dataframe(executions_df: DataFrame) -> list[ExecutionGroup]:
+def _encode_grouped_execution_dataframe(executions_df: DataFrame, encoder: SocketMessageEncoder) -> str:
+    # Encoded as the list of `ExecutionGroup`
     df = executions_df.copy()
     df[ExecutionDataCol.QUANTITY] = df[ExecutionDataCol.QUANTITY].astype(float)
 
@@ -87,13 +87,14 @@ def _from_grouped_execution_dataframe(executions_df: DataFrame) -> list[Executio
         ExecutionDataCol.TOTAL_LOSS: "totalLoss",
     }
 
-    return df_rows_to_list_of_data(df, columns)
+    return encoder.encode_rows(df, columns)
 
 
 def to_socket_message_execution(execution: "OrderExecutionCollection") -> str:
-    data: ExecutionDict = {
-        contract_identifier: _from_grouped_execution_dataframe(exec_df)
-        for contract_identifier, exec_df in execution.execution_dataframes.items()
-    }
+    encoder = get_socket_message_encoder()
 
-    return json.dumps(data)
+    # Encoded as `ExecutionDict`
+    return encoder.encode_object({
+        str(contract_identifier): _encode_grouped_execution_dataframe(exec_df, encoder)
+        for contract_identifier, exec_df in execution.execution_dataframes.items()
+    })
@@ -1,10 +1,7 @@
-import json
 from typing import TypeAlias, TypedDict
 
-from trade_ibkr.const import (
-    PNL_WARNING_PX_DIFF_SMA_RATIO, PNL_WARNING_PX_DIFF_VAL, PNL_WARNING_TOTAL_PNL,
-    PNL_WARNING_UNREALIZED_PNL, SR_CUSTOM_LEVELS,
-)
+from trade_ibkr.config import get_config
+from .encoder import encode_socket_message
 
 
 class PnLWarningConfig(TypedDict):
@@ -28,11 +25,13 @@ class InitData(TypedDict):
 
 
 def _to_pnl_warning_config() -> PnLWarningConfig:
+    pnl_warning_config = get_config().risk_management.pnl_warning
+
     return {
-        "pxDiffVal": PNL_WARNING_PX_DIFF_VAL,
-        "pxDiffSmaRatio": PNL_WARNING_PX_DIFF_SMA_RATIO,
-        "totalPnL": PNL_WARNING_TOTAL_PNL,
-        "unrealizedPnL": PNL_WARNING_UNREALIZED_PNL,
+        "pxDiffVal": pnl_warning_config.px_diff_val,
+        "pxDiffSmaRatio": pnl_warning_config.px_diff_sma_ratio,
+        "totalPnL": pnl_warning_config.total_pnl,
+        "unrealizedPnL": pnl_warning_config.unrealized_pnl,
     }
 
 
@@ -40,12 +39,12 @@ def _to_custom_sr_level_dict() -> CustomSrLevelDict:
     return {
         contract_id: [
             {
-                "level": sr_level["level"],
-                "strong": sr_level.get("strong", False),
+                "level": sr_level.level,
+                "strong": sr_level.strong,
             }
             for sr_level in sr_levels
         ]
-        for contract_id, sr_levels in SR_CUSTOM_LEVELS.items()
+        for contract_id, sr_levels in get_config().sr_level.custom.items()
     }
 
 
@@ -55,4 +54,4 @@ def to_socket_message_init_data() -> str:
         "customSrLevelDict": _to_custom_sr_level_dict(),
     }
 
-    return json.dumps(data)
+    return encode_socket_message(data)
@@ -0,0 +1,10 @@
+from typing import TYPE_CHECKING
+
+from .encoder import encode_socket_message
+
+if TYPE_CHECKING:
+    from trade_ibkr.perf import OrderLatencyData
+
+
+def to_socket_message_order_latency(order_latency: "OrderLatencyData") -> str:
+    return encode_socket_message(order_latency)
@@ -1,8 +1,7 @@
-import json
 from typing import TYPE_CHECKING, TypeAlias, TypedDict
 
 from trade_ibkr.enums import OrderSideConst
-from ..contract import get_contract_identifier
+from .encoder import encode_socket_message
 
 if TYPE_CHECKING:
     from trade_ibkr.model import OpenOrder, OpenOrderBook
@@ -31,7 +30,7 @@ def _from_open_order(open_order: "OpenOrder", *, override_group_id: int | None)
     return {
         "groupId": group_id,
         "orderId": open_order.order_id,
-        "identifier": get_contract_identifier(open_order.contract),
+        "identifier": open_order.contract_id,
         "side": open_order.side,
         "quantity": float(open_order.quantity),
         "px": open_order.price,
@@ -58,4 +57,4 @@ def to_socket_message_open_order(open_order: "OpenOrderBook") -> str:
         for identifier, open_orders in open_order.orders.items()
     }
 
-    return json.dumps(data)
+    return encode_socket_message(data)
@@ -1,7 +1,7 @@
-import json
 from typing import TYPE_CHECKING, TypedDict
 
 from trade_ibkr.enums import OrderSideConst
+from .encoder import encode_socket_message
 
 if TYPE_CHECKING:
     from trade_ibkr.model import OnOrderFilledEvent
@@ -24,4 +24,4 @@ def to_socket_message_order_filled(order_filled_event: "OnOrderFilledEvent") ->
         "fillPx": order_filled_event.fill_px,
     }
 
-    return json.dumps(data)
+    return encode_socket_message(data)
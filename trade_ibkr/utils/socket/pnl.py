@@ -1,6 +1,7 @@
-import json
 from typing import TYPE_CHECKING, TypeAlias, TypedDict
 
+from .encoder import encode_socket_message
+
 if TYPE_CHECKING:
     from trade_ibkr.model import PnL
 
@@ -26,4 +27,4 @@ def to_socket_message_pnl(pnl_dict: dict[int, "PnL"]) -> str:
         for contract_identifier, pnl in pnl_dict.items()
     }
 
-    return json.dumps(data)
+    return encode_socket_message(data)
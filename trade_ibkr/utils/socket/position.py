@@ -1,7 +1,6 @@
-import json
 from typing import TYPE_CHECKING, TypeAlias, TypedDict
 
-from ..contract import get_contract_identifier
+from .encoder import encode_socket_message
 
 if TYPE_CHECKING:
     from trade_ibkr.model import Position, PositionData
@@ -18,7 +17,7 @@ PositionDict: TypeAlias = dict[int, PositionEntry]
 
 def _from_position_data(position_data: "PositionData") -> PositionEntry:
     return {
-        "identifier": get_contract_identifier(position_data.contract),
+        "identifier": position_data.contract_id,
         "position": float(position_data.position),
         "avgPx": float(position_data.avg_px),
     }
@@ -30,4 +29,4 @@ def to_socket_message_position(position: "Position") -> str:
         for identifier, position_data in position.data.items()
     }
 
-    return json.dumps(data)
+    return encode_socket_message(data)
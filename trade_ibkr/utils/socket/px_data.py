@@ -1,10 +1,9 @@
-import json
 from typing import Iterable, TYPE_CHECKING, TypedDict
 
-from trade_ibkr.const import SMA_PERIODS, SR_STRONG_THRESHOLD
+from trade_ibkr.config import get_config
 from trade_ibkr.enums import DirectionConst, PxDataCol
 from trade_ibkr.utils import cdf
-from .utils import df_rows_to_list_of_data
+from .encoder import SocketMessageEncoder, get_socket_message_encoder
 
 if TYPE_CHECKING:
     from trade_ibkr.calc import ExtremaDataPoint
@@ -18,10 +17,12 @@ class PxDataBar(TypedDict):
     low: float
     close: float
     vwap: float
+    # Volume-weighted standard deviation of the close Px from `vwap`, for the VWAP bands
+    vwapStdev: float | None
     amplitudeHL: float | None
     amplitudeOC: float | None
-    extremaMin: bool | None
-    extremaMax: bool | None
+    extremaMin: float | None
+    extremaMax: float | None
     ema120: float | None
     ema120Trend: float | None
     ema120TrendChange: float | None
@@ -60,7 +61,8 @@ class PxDataExtremaPoint(TypedDict):
 
 class PxDataExtremaCurrentData(TypedDict):
     val: float
-    pct: float
+    # `None` if no extrema points of the current direction, such as the Px data of a few bars only
+    pct: float | None
 
 
 class PxDataExtremaCurrentStats(TypedDict):
@@ -71,7 +73,8 @@ class PxDataExtremaCurrentStats(TypedDict):
 
 class PxDataExtrema(TypedDict):
     points: list[PxDataExtremaPoint]
-    current: PxDataExtremaCurrentStats
+    # `None` if no extrema points
+    current: PxDataExtremaCurrentStats | None
 
 
 class PxDataDict(TypedDict):
@@ -87,7 +90,8 @@ class PxDataDict(TypedDict):
     smaPeriods: list[int]
 
 
-def _from_px_data_bars(px_data: "PxData") -> list[PxDataBar]:
+def _encode_px_data_bars(px_data: "PxData", encoder: SocketMessageEncoder) -> str:
+    # Encoded as the list of `PxDataBar`
     columns = {
         PxDataCol.EPOCH_SEC: "epochSec",
         PxDataCol.OPEN: "open",
@@ -95,6 +99,7 @@ def _from_px_data_bars(px_data: "PxData") -> list[PxDataBar]:
         PxDataCol.LOW: "low",
         PxDataCol.CLOSE: "close",
         PxDataCol.VWAP: "vwap",
+        PxDataCol.VWAP_STDEV: "vwapStdev",
         PxDataCol.AMPLITUDE_HL_EMA_10: "amplitudeHL",
         PxDataCol.AMPLITUDE_OC_EMA_10: "amplitudeOC",
         PxDataCol.LOCAL_MIN: "extremaMin",
@@ -108,20 +113,17 @@ def _from_px_data_bars(px_data: "PxData") -> list[PxDataBar]:
     }
     columns |= {
         PxDataCol.get_sma_col_name(sma_period): f"sma{sma_period}"
-        for sma_period in SMA_PERIODS
+        for sma_period in get_config().data.sma
     }
 
-    df = px_data.dataframe.copy()
-    df[PxDataCol.LOCAL_MIN] = df[PxDataCol.LOCAL_MIN].astype(bool)
-    df[PxDataCol.LOCAL_MAX] = df[PxDataCol.LOCAL_MAX].astype(bool)
-
-    return df_rows_to_list_of_data(px_data.dataframe, columns)
+    return encoder.encode_rows(px_data.dataframe, columns)
 
 
 def _from_px_data_support_resistance(px_data: "PxData") -> list[PxDataSupportResistance]:
     ret: list[PxDataSupportResistance] = []
 
     max_strength = max(px_data.sr_levels_data.levels_data, key=lambda data: data.strength).strength
+    strong_threshold = get_config().sr_level.strong_threshold
 
     for sr_level in px_data.sr_levels_data.levels_data:
         # Convert integral absolute strength (5) to relative strength (5 / 10 = 0.5)
@@ -131,7 +133,7 @@ def _from_px_data_support_resistance(px_data: "PxData") -> list[PxDataSupportRes
             "level": sr_level.level,
             "strength": strength,
             "strengthCount": sr_level.strength,
-            "strong": strength > SR_STRONG_THRESHOLD
+            "strong": strength > strong_threshold
         })
 
     return ret
@@ -146,6 +148,13 @@ def _from_px_data_contract(px_data: "PxData") -> PxDataContract:
     }
 
 
+def _get_extrema_pct(val: float, data: list[float]) -> float | None:
+    if not data:
+        return None
+
+    return (1 - cdf(val, data)) * 100
+
+
 def _from_px_data_current_stats(px_data: "PxData") -> PxDataExtremaCurrentStats:
     points = px_data.extrema.points_in_use
 
@@ -156,15 +165,15 @@ def _from_px_data_current_stats(px_data: "PxData") -> PxDataExtremaCurrentStats:
     return {
         "diff": {
             "val": diff,
-            "pct": (1 - cdf(diff, list(map(lambda point: point.diff, points)))) * 100,
+            "pct": _get_extrema_pct(diff, list(map(lambda point: point.diff, points))),
         },
         "diffSmaRatio": {
             "val": ampl_ratio,
-            "pct": (1 - cdf(ampl_ratio, list(map(lambda point: point.diff_sma_ratio, points)))) * 100,
+            "pct": _get_extrema_pct(ampl_ratio, list(map(lambda point: point.diff_sma_ratio, points))),
         },
         "length": {
             "val": length,
-            "pct": (1 - cdf(length, list(map(lambda point: point.length, points)))) * 100,
+            "pct": _get_extrema_pct(length, list(map(lambda point: point.length, points))),
         },
     }
 
@@ -183,30 +192,59 @@ def _from_px_data_extrema_point(point: "ExtremaDataPoint") -> PxDataExtremaPoint
 def _from_px_data_extrema(px_data: "PxData") -> PxDataExtrema:
     return {
         "points": [_from_px_data_extrema_point(point) for point in px_data.extrema.points],
-        "current": _from_px_data_current_stats(px_data)
+        "current": _from_px_data_current_stats(px_data) if px_data.extrema.points else None,
     }
 
 
-def _to_px_data_dict(px_data: "PxData") -> PxDataDict:
-    return {
-        "uniqueIdentifier": px_data.unique_identifier,
-        "periodSec": px_data.period_sec,
-        "contract": _from_px_data_contract(px_data),
-        "data": _from_px_data_bars(px_data),
-        "extrema": _from_px_data_extrema(px_data),
-        "supportResistance": _from_px_data_support_resistance(px_data),
-        "lastDayClose": px_data.get_last_day_close(),
-        "todayOpen": px_data.get_today_open(),
-        "isMajor": px_data.is_major,
-        "smaPeriods": SMA_PERIODS,
-    }
+def _encode_px_data(px_data: "PxData", encoder: SocketMessageEncoder) -> str:
+    # Encoded as `PxDataDict`
+    return encoder.encode_object({
+        "uniqueIdentifier": encoder.encode(px_data.unique_identifier),
+        "periodSec": encoder.encode(px_data.period_sec),
+        "contract": encoder.encode(_from_px_data_contract(px_data)),
+        # Bars are the majority of the message, which are encoded column by column
+        "data": _encode_px_data_bars(px_data, encoder),
+        "extrema": encoder.encode(_from_px_data_extrema(px_data)),
+        "supportResistance": encoder.encode(_from_px_data_support_resistance(px_data)),
+        "lastDayClose": encoder.encode(px_data.get_last_day_close()),
+        "todayOpen": encoder.encode(px_data.get_today_open()),
+        "isMajor": encoder.encode(px_data.is_major),
+        "smaPeriods": encoder.encode(get_config().data.sma),
+    })
+
+
+# Encoded message of the latest versioned `PxData` of each series, keyed by the unique identifier
+_px_data_message_cache: dict[str, tuple[int, SocketMessageEncoder, str]] = {}
 
 
 def to_socket_message_px_data(px_data: "PxData") -> str:
-    return json.dumps(_to_px_data_dict(px_data))
+    """
+    Encode ``px_data``, which is only encoded once for each version.
 
+    ``PxData`` without version is always encoded.
+    """
+    encoder = get_socket_message_encoder()
 
-def to_socket_message_px_data_list(px_data_list: Iterable["PxData"]) -> str:
-    data: list[PxDataDict] = [_to_px_data_dict(px_data) for px_data in px_data_list if px_data]
+    if px_data.version is None:
+        return _encode_px_data(px_data, encoder)
 
-    return json.dumps(data)
+    cached = _px_data_message_cache.get(px_data.unique_identifier)
+
+    if cached and cached[0] == px_data.version and cached[1] is encoder:
+        return cached[2]
+
+    message = _encode_px_data(px_data, encoder)
+    _px_data_message_cache[px_data.unique_identifier] = (px_data.version, encoder, message)
+
+    return message
+
+
+def release_socket_message_px_data(identifier: str):
+    """Drop the encoded message of the Px data of ``identifier``, such as after it is canceled."""
+    _px_data_message_cache.pop(identifier, None)
+
+
+def to_socket_message_px_data_list(px_data_list: Iterable["PxData"]) -> str:
+    return get_socket_message_encoder().encode_array([
+        to_socket_message_px_data(px_data) for px_data in px_data_list if px_data
+    ])
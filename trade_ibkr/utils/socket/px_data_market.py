@@ -5,6 +5,7 @@ from typing import TypedDict
 from ibapi.contract import ContractDetails
 
 from ..contract import get_detailed_contract_identifier
+from .encoder import encode_socket_message
 
 
 class PxDataMarket(TypedDict):
@@ -18,7 +19,7 @@ def to_socket_message_px_data_market(contract: ContractDetails, px: float) -> st
         "px": px,
     }
 
-    return json.dumps(data)
+    return encode_socket_message(data)
 
 
 @dataclass(kw_only=True)
@@ -0,0 +1,63 @@
+import json
+from dataclasses import dataclass
+from typing import TypedDict
+
+from .encoder import encode_socket_message
+
+
+class PxDataSeriesSocketMessage(TypedDict):
+    symbol: str
+    exchange: str
+    # `Futures`, `Index` or `Crypto`
+    type: str
+    duration: str
+    barSize: str
+    periodSec: int
+    isMajor: bool | None
+
+
+@dataclass(kw_only=True)
+class PxDataSeriesSocketMessagePack:
+    symbol: str
+    exchange: str
+    type_: str
+    duration: str
+    bar_size: str
+    period_sec: int
+    is_major: bool
+
+
+def from_socket_message_px_data_series(message: str) -> PxDataSeriesSocketMessagePack:
+    series_message: PxDataSeriesSocketMessage = json.loads(message)
+
+    return PxDataSeriesSocketMessagePack(
+        symbol=series_message["symbol"],
+        exchange=series_message["exchange"],
+        type_=series_message["type"],
+        duration=series_message["duration"],
+        bar_size=series_message["barSize"],
+        period_sec=series_message["periodSec"],
+        is_major=bool(series_message.get("isMajor")),
+    )
+
+
+class PxDataSeriesResult(TypedDict):
+    # `pxSubscribe` or `pxUnsubscribe`
+    action: str
+    # Unique identifier of the Px data, `None` if not available
+    identifier: str | None
+    success: bool
+    message: str | None
+
+
+def to_socket_message_px_data_series(
+        action: str, *, identifier: str | None, success: bool, message: str | None = None,
+) -> str:
+    data: PxDataSeriesResult = {
+        "action": action,
+        "identifier": identifier,
+        "success": success,
+        "message": message,
+    }
+
+    return encode_socket_message(data)
@@ -0,0 +1,57 @@
+import json
+from dataclasses import dataclass
+from typing import TypedDict
+
+from .encoder import encode_socket_message
+
+
+class MarketThrottleSocketMessage(TypedDict):
+    # Min seconds between the market Px of a contract, `None` to receive as sent by the server
+    intervalSec: float | None
+    # Only receive the market Px on a new bar, or the high / low of the current bar broken
+    hlBreakOnly: bool
+
+
+class SubscriptionSocketMessage(TypedDict):
+    # `None` to subscribe all subscribable events
+    events: list[str] | None
+    # Unique identifiers of the Px data (`<contract identifier>@<period sec>`), `None` to subscribe all Px data
+    identifiers: list[str] | None
+    # `None` to not throttle the market Px
+    market: MarketThrottleSocketMessage | None
+
+
+@dataclass(kw_only=True)
+class SubscriptionSocketMessagePack:
+    events: list[str] | None
+    identifiers: list[str] | None
+    market_interval_sec: float | None
+    market_hl_break_only: bool
+
+
+def from_socket_message_subscription(message: str) -> SubscriptionSocketMessagePack:
+    subscription_message: SubscriptionSocketMessage = json.loads(message)
+    market_throttle = subscription_message.get("market") or {}
+
+    return SubscriptionSocketMessagePack(
+        events=subscription_message.get("events"),
+        identifiers=subscription_message.get("identifiers"),
+        market_interval_sec=market_throttle.get("intervalSec"),
+        market_hl_break_only=bool(market_throttle.get("hlBreakOnly")),
+    )
+
+
+def to_socket_message_subscription(
+        events: list[str], identifiers: list[str], *,
+        market_interval_sec: float | None, market_hl_break_only: bool,
+) -> str:
+    data: SubscriptionSocketMessage = {
+        "events": events,
+        "identifiers": identifiers,
+        "market": {
+            "intervalSec": market_interval_sec,
+            "hlBreakOnly": market_hl_break_only,
+        },
+    }
+
+    return encode_socket_message(data)
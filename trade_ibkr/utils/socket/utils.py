@@ -1,7 +1,78 @@
+import json
+import math
 from typing import Any
 
-from pandas import DataFrame
+import numpy as np
+from pandas import DataFrame, Series
+from pandas.api.types import infer_dtype
+
+
+def _to_list_nullable(series: Series) -> list[Any]:
+    # `NaN` / `inf` is not valid in JSON, which is converted to `None`
+    values = series.to_numpy()
+
+    match values.dtype.kind:
+        case "f":
+            ret = values.astype(object)
+            ret[~np.isfinite(values)] = None
+            return ret.tolist()
+        case "O":
+            return [
+                None if isinstance(value, float) and not math.isfinite(value) else value
+                for value in values.tolist()
+            ]
+        case _:
+            return series.tolist()
 
 
 def df_rows_to_list_of_data(df: DataFrame, columns: dict[str, str]) -> list[dict[str, Any]]:
-    return df.rename(columns=columns)[columns.values()].to_dict("records")
+    """
+    Convert the rows of ``df`` to the list of data, keyed by the values of ``columns``.
+
+    Non-finite floats are converted to ``None`` here, so the dataframe could keep the numeric dtypes.
+    """
+    keys = list(columns.values())
+    values = [_to_list_nullable(df[column]) for column in columns]
+
+    return [dict(zip(keys, row)) for row in zip(*values)]
+
+
+def _to_json_float_tokens(values: np.ndarray) -> np.ndarray:
+    # Shortest repr of NumPy is the same as `float.__repr__()`, which `json.dumps()` uses
+    return np.where(np.isfinite(values), values.astype(str), "null")
+
+
+def _to_json_tokens(series: Series) -> list[str]:
+    values = series.to_numpy()
+
+    match values.dtype.kind:
+        case "f":
+            return _to_json_float_tokens(values).tolist()
+        case "i" | "u":
+            return values.astype(str).tolist()
+        case "b":
+            return np.where(values, "true", "false").tolist()
+        case "O" if infer_dtype(values, skipna=True) in ("floating", "integer", "mixed-integer-float", "empty"):
+            # Numbers with `None`, the `int` are encoded as `int` as `json.dumps()` does
+            tokens = _to_json_float_tokens(values.astype(float))
+            is_int = np.fromiter((isinstance(value, int) for value in values), dtype=bool, count=len(values))
+
+            if is_int.any():
+                tokens[is_int] = [str(value) for value in values[is_int]]
+
+            return tokens.tolist()
+        case _:
+            return [json.dumps(value) for value in _to_list_nullable(series)]
+
+
+def df_rows_to_json(df: DataFrame, columns: dict[str, str]) -> str:
+    """
+    Same as ``json.dumps(df_rows_to_list_of_data(df, columns))``, but without building the dict of each row.
+
+    Each column is converted to the JSON tokens at once, then the rows are filled into the same template.
+    """
+    row_template = "{" + ", ".join(f"{json.dumps(key).replace('%', '%%')}: %s" for key in columns.values()) + "}"
+    tokens = [_to_json_tokens(df[column]) for column in columns]
+
+    return "[" + ", ".join([row_template % row for row in zip(*tokens)]) + "]"
+